@@ -0,0 +1,94 @@
+"""
+Supabase session checks for endpoints that stream tenant data
+
+The app reaches Supabase with the signed-in user's access token, and RLS
+limits every row to get_user_tenant_id(): the tenant of that user's
+profile. Endpoints here that push tenant data follow the same rule. The
+access token is verified against SUPABASE_JWT_SECRET, and the tenant comes
+from the caller's profile, never from the request.
+
+Browsers cannot set headers on WebSocket or EventSource connections, so the
+token is taken from ``Authorization: Bearer`` or else from the
+``access_token`` query parameter.
+
+Routers under ``/api/tenants/{tenant_id}`` add ``Depends(require_tenant)``,
+which answers 401 without a valid token and 403 when the path names a
+tenant other than the caller's. Jobs that span every tenant, like billing
+runs, add ``Depends(require_service_role)`` instead: only the project's
+service_role key (role claim ``service_role``, no user) gets through, since
+a profile's admin role only covers its own tenant.
+"""
+
+import os
+from typing import List, Optional
+
+import jwt
+from fastapi import Depends, HTTPException
+from starlette.requests import HTTPConnection
+
+from database import get_db
+
+
+class AuthError(Exception):
+    """Missing, invalid or expired credentials, or no tenant for the user"""
+
+
+def access_token(connection: HTTPConnection) -> Optional[str]:
+    scheme, _, token = connection.headers.get('authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    return connection.query_params.get('access_token') or None
+
+
+def _decode(token: str, audience: Optional[str], required: List[str]) -> dict:
+    secret = os.environ.get('SUPABASE_JWT_SECRET')
+    if not secret:
+        raise AuthError("SUPABASE_JWT_SECRET is not configured")
+    try:
+        return jwt.decode(
+            token, secret, algorithms=['HS256'], audience=audience,
+            options={'require': required, 'verify_aud': audience is not None},
+        )
+    except jwt.PyJWTError as e:
+        raise AuthError(f"Invalid access token: {e}") from None
+
+
+def verify_token(token: str) -> dict:
+    """Claims of a Supabase access token signed with the project's JWT secret"""
+    return _decode(token, os.environ.get('SUPABASE_JWT_AUDIENCE', 'authenticated'), ['exp', 'sub'])
+
+
+async def authenticated_tenant(connection: HTTPConnection, db) -> str:
+    """Tenant of the user the connection's access token belongs to"""
+    token = access_token(connection)
+    if token is None:
+        raise AuthError("Missing access token")
+    claims = verify_token(token)
+    profile = await db.profiles.find_one({'user_id': claims['sub']}, {'_id': 0, 'tenant_id': 1})
+    if not profile or not profile.get('tenant_id'):
+        raise AuthError("No tenant for this user")
+    return str(profile['tenant_id'])
+
+
+async def require_tenant(tenant_id: str, connection: HTTPConnection, db=Depends(get_db)):
+    """Router dependency: the caller must belong to the tenant in the path"""
+    try:
+        caller_tenant = await authenticated_tenant(connection, db)
+    except AuthError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={'WWW-Authenticate': 'Bearer'})
+    if caller_tenant != tenant_id:
+        raise HTTPException(status_code=403, detail="Not allowed for this tenant")
+
+
+async def require_service_role(connection: HTTPConnection):
+    """Router dependency: the caller must hold the project's service_role key"""
+    token = access_token(connection)
+    try:
+        if token is None:
+            raise AuthError("Missing access token")
+        # Service keys carry no audience or subject
+        claims = _decode(token, None, ['exp'])
+    except AuthError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={'WWW-Authenticate': 'Bearer'})
+    if claims.get('role') != 'service_role':
+        raise HTTPException(status_code=403, detail="Service role required")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Payload size and CPU cost of each GET /api/status response encoding
+
+Serializes one page of status checks as JSON and MessagePack, then
+compresses each body with every codec the compression middleware can
+negotiate, at the configured level and the codec's fastest level.
+Codecs whose packages are not installed are skipped.
+
+Usage: python benchmarks/bench_compression.py [--rows N] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+import compression  # noqa: E402
+import server  # noqa: E402
+from bench_status_serialization import make_docs  # noqa: E402
+
+FASTEST_LEVELS = {'gzip': 1, 'br': 0, 'zstd': 1}
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    page = {'items': make_docs(args.rows), 'next_cursor': None}
+    formats = {'json': server.dump_json}
+    if server.msgpack is not None:
+        formats['msgpack'] = server.dump_msgpack
+    else:
+        print("msgpack not installed, MessagePack rows skipped")
+    missing = [name for name in compression.PREFERENCE if name not in compression.ENCODERS]
+    if missing:
+        print(f"codecs not installed, skipped: {', '.join(missing)}")
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'format':<8} {'encoding':<10} {'level':>5} {'bytes':>10} {'ratio':>7} {'encode ms':>10} {'compress ms':>12}")
+    for format_name, dump in formats.items():
+        body = dump(page)
+        encode_time = best_of(lambda: dump(page), args.repeat)
+        print(f"{format_name:<8} {'identity':<10} {'-':>5} {len(body):>10,} {1.0:>7.2f} "
+              f"{encode_time * 1000:>10.2f} {0.0:>12.2f}")
+
+        for encoding in compression.PREFERENCE:
+            if encoding not in compression.ENCODERS:
+                continue
+            for level in sorted({compression.DEFAULT_LEVELS[encoding], FASTEST_LEVELS[encoding]}):
+                compressed = compression.compress(body, encoding, level)
+                compress_time = best_of(lambda: compression.compress(body, encoding, level), args.repeat)
+                print(f"{format_name:<8} {encoding:<10} {level:>5} {len(compressed):>10,} "
+                      f"{len(body) / len(compressed):>7.2f} {encode_time * 1000:>10.2f} "
+                      f"{compress_time * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the FastAPI backend
+
+Runs the app in-process through httpx's ASGI transport, against either a
+local mongod (--mongo-url) or a mongomock-motor stand-in (default), and
+drives POST /api/status and GET /api/status at a configurable concurrency.
+Reports throughput, p50/p95/p99 latency and RSS per scenario and writes the
+results as JSON so runs can be diffed across commits.
+
+Every run uses a database of its own (--db, a fresh bench_load_<random> name
+by default), whatever DB_NAME the environment exports. Against a mongod that
+database must not exist yet, and it is dropped when the run ends.
+
+Usage:
+    python benchmarks/bench_load.py --requests 5000 --concurrency 64
+    python benchmarks/bench_load.py --mongo-url mongodb://localhost:27017 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+
+import httpx  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+import server  # noqa: E402
+
+SCENARIOS = ('post', 'get', 'mixed')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def rss_mb() -> Dict[str, float]:
+    """Current and peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() != 'Darwin':
+        peak *= 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+    current = 0.0
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        pass
+    return {'current': round(current / 2**20, 1), 'peak': round(peak / 2**20, 1)}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+@asynccontextmanager
+async def running_app(db_name: str, mongo_url: str = None):
+    """Start the app against a real mongod or a mongomock-motor stand-in"""
+    # The lifespan reads DB_NAME; never fall back to whatever the shell exports
+    os.environ['DB_NAME'] = db_name
+    if mongo_url:
+        os.environ['MONGO_URL'] = mongo_url
+        probe = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        try:
+            if db_name in await probe.list_database_names():
+                sys.exit(f"Database {db_name} already exists; pass a new --db name for the benchmark")
+        finally:
+            probe.close()
+        async with server.lifespan(server.app):
+            try:
+                yield
+            finally:
+                await server.client.drop_database(db_name)
+        return
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is not installed; pass --mongo-url to use a local mongod")
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[db_name]
+    await server.ensure_indexes()
+    yield
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def one_request(i: int):
+        if scenario == 'post' or (scenario == 'mixed' and i % 10 == 0):
+            return await client.post('/api/status', json={'client_name': f'bench-{i % 50}'})
+        return await client.get('/api/status', params={'limit': 100})
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            i = issued
+            issued += 1
+            started = time.perf_counter()
+            try:
+                response = await one_request(i)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'scenario': scenario,
+        'requests': total,
+        'concurrency': concurrency,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        'rss_mb': rss_mb(),
+    }
+
+
+async def run(args) -> dict:
+    server.status_cache.ttl_seconds = args.cache_ttl
+    results = []
+    async with running_app(args.db, args.mongo_url):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            for scenario in args.scenarios:
+                result = await run_scenario(client, scenario, args.requests, args.concurrency)
+                results.append(result)
+                latency = result['latency_ms']
+                print(f"{scenario:<6} {result['throughput_rps']:>9.1f} req/s  "
+                      f"p50 {latency['p50']:.2f}ms  p95 {latency['p95']:.2f}ms  p99 {latency['p99']:.2f}ms  "
+                      f"errors {result['errors']}  rss {result['rss_mb']['current']}MiB")
+
+    return {
+        'revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'backend': 'mongod' if args.mongo_url else 'mongomock-motor',
+        'database': args.db,
+        'python': platform.python_version(),
+        'cache_ttl': args.cache_ttl,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=['post', 'get'])
+    parser.add_argument('--mongo-url', help='use a local mongod instead of mongomock-motor')
+    parser.add_argument('--db', default=f'bench_load_{uuid.uuid4().hex[:8]}',
+                        help='scratch database for the run; must not exist yet, dropped afterwards')
+    parser.add_argument('--cache-ttl', type=float, default=0.0,
+                        help='status cache TTL during the run (0 measures uncached reads)')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
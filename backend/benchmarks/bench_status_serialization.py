@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the GET /api/status serialization path
+
+Compares the previous read path (StatusCheck(**doc) per row, then FastAPI
+re-validating the list against the response model and JSON-encoding it)
+with the fast path that dumps trusted Mongo documents straight to bytes.
+
+Usage: python benchmarks/bench_status_serialization.py [--rows N] [--repeat R]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+from server import StatusCheck, dump_json  # noqa: E402
+
+
+def make_docs(rows: int) -> List[dict]:
+    """Build documents shaped like status_checks rows without _id"""
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'client_name': f'client-{i % 50}',
+            'timestamp': start + timedelta(milliseconds=i),
+        }
+        for i in range(rows)
+    ]
+
+
+def validated_path(docs: List[dict], adapter: TypeAdapter) -> bytes:
+    models = [StatusCheck(**doc) for doc in docs]
+    validated = adapter.validate_python(models, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(docs: List[dict]) -> bytes:
+    return dump_json({'items': docs, 'next_cursor': None})
+
+
+def measure(label: str, fn, rows: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    rate = rows / best
+    print(f"{label:<28} {best * 1000:9.2f} ms  {rate:>12,.0f} rows/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    docs = make_docs(args.rows)
+    adapter = TypeAdapter(List[StatusCheck])
+
+    print(f"Serializing {args.rows} rows, best of {args.repeat} "
+          f"(orjson {'enabled' if server.orjson else 'not installed'})")
+    before = measure('validated (before)', lambda: validated_path(docs, adapter), args.rows, args.repeat)
+    after = measure('fast path (after)', lambda: fast_path(docs), args.rows, args.repeat)
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Tenant billing endpoints
+
+Server-side counterparts of the aggregate queries BillingRepository runs from
+the app, so dashboards get their numbers in a single round-trip.
+"""
+
+import uuid
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.alias_generators import to_camel
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import kpis
+from auth import require_tenant
+from database import get_db
+
+
+router = APIRouter(prefix="/api/tenants/{tenant_id}", dependencies=[Depends(require_tenant)])
+
+UNPAID_STATUSES = ['sent', 'pending']
+MAX_INVOICE_NUMBER_BLOCK = 10000
+
+InvoiceStatus = Literal['draft', 'sent', 'pending', 'paid', 'failed', 'refunded']
+
+
+class CustomerInfo(BaseModel):
+    name: str
+    email: str
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    gst_number: Optional[str] = None
+
+class Invoice(BaseModel):
+    """Same fields as Invoice.toJson() in invoice.dart"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str
+    request_ids: List[str] = Field(default_factory=list)
+    invoice_number: str
+    status: InvoiceStatus = 'draft'
+    customer_info: CustomerInfo
+    issue_date: datetime
+    due_date: datetime
+    subtotal: float
+    tax_amount: float
+    total: float
+    notes: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class InvoiceCreate(BaseModel):
+    request_ids: List[str] = Field(default_factory=list)
+    invoice_number: Optional[str] = None
+    status: InvoiceStatus = 'draft'
+    customer_info: CustomerInfo
+    issue_date: datetime
+    due_date: datetime
+    subtotal: float
+    tax_amount: float
+    total: float
+    notes: Optional[str] = None
+
+class InvoiceUpdate(BaseModel):
+    status: Optional[InvoiceStatus] = None
+    due_date: Optional[datetime] = None
+    notes: Optional[str] = None
+
+class InvoiceNumberBlock(BaseModel):
+    period: str
+    first_sequence: int
+    last_sequence: int
+    numbers: List[str]
+
+
+class BillingKPIs(BaseModel):
+    """Same shape as BillingKPIs in billing_repository.dart"""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+    unpaid_invoices: int = 0
+    overdue_invoices: int = 0
+    outstanding_amount: float = 0.0
+    monthly_revenue: float = 0.0
+
+
+def format_invoice_number(period: str, sequence: int) -> str:
+    """INV-YYYYMM-NNN, as generateInvoiceNumber builds it in the app"""
+    return f"INV-{period}-{sequence:03d}"
+
+
+async def highest_invoice_sequence(db, tenant_id: str, period: str) -> int:
+    """Largest NNN among the tenant's INV-YYYYMM-NNN numbers for ``period``"""
+    prefix = f"INV-{period}-"
+    highest = 0
+    # Anchored prefix regex, covered by tenant_invoice_number_unique; runs once per tenant and month
+    async for invoice in db.invoices.find(
+        {'tenant_id': tenant_id, 'invoice_number': {'$regex': f'^{prefix}[0-9]+$'}},
+        {'_id': 0, 'invoice_number': 1},
+    ):
+        highest = max(highest, int(invoice['invoice_number'][len(prefix):]))
+    return highest
+
+
+async def allocate_invoice_numbers(db, tenant_id: str, count: int = 1, now: Optional[datetime] = None) -> InvoiceNumberBlock:
+    """Reserve ``count`` consecutive invoice numbers for this month.
+
+    One atomic $inc on the tenant's counter document for the month, so
+    concurrent callers can never receive the same number. A month's counter
+    starts from the highest number its invoices already use (the app numbers
+    invoices itself), so numbers issued before the counter existed are not
+    handed out again.
+    """
+    period = (now or datetime.utcnow()).strftime('%Y%m')
+    key = {'tenant_id': tenant_id, 'period': period}
+    counter = await db.invoice_counters.find_one_and_update(
+        key, {'$inc': {'sequence': count}}, return_document=ReturnDocument.AFTER)
+    if counter is None:
+        # First allocation this month; $max keeps racing seeders idempotent
+        seed = await highest_invoice_sequence(db, tenant_id, period)
+        try:
+            await db.invoice_counters.update_one(key, {'$max': {'sequence': seed}}, upsert=True)
+        except DuplicateKeyError:
+            pass  # a concurrent first allocation created the counter already
+        counter = await db.invoice_counters.find_one_and_update(
+            key, {'$inc': {'sequence': count}}, return_document=ReturnDocument.AFTER)
+    last = counter['sequence']
+    first = last - count + 1
+    return InvoiceNumberBlock(
+        period=period,
+        first_sequence=first,
+        last_sequence=last,
+        numbers=[format_invoice_number(period, sequence) for sequence in range(first, last + 1)],
+    )
+
+
+def month_bounds(now: datetime) -> tuple:
+    """Start of this month and start of next month"""
+    start = datetime(now.year, now.month, 1)
+    if now.month == 12:
+        return start, datetime(now.year + 1, 1, 1)
+    return start, datetime(now.year, now.month + 1, 1)
+
+
+def billing_kpi_pipeline(tenant_id: str, now: datetime) -> list:
+    """All four billing KPIs in one pass over the tenant's invoices"""
+    month_start, month_end = month_bounds(now)
+    is_unpaid = {'$in': ['$status', UNPAID_STATUSES]}
+    is_overdue = {'$and': [
+        is_unpaid,
+        {'$eq': [{'$type': '$due_date'}, 'date']},
+        {'$lt': ['$due_date', now]},
+    ]}
+    is_month_revenue = {'$and': [
+        {'$eq': ['$status', 'paid']},
+        {'$gte': ['$updated_at', month_start]},
+        {'$lt': ['$updated_at', month_end]},
+    ]}
+    return [
+        {'$match': {
+            'tenant_id': tenant_id,
+            '$or': [
+                {'status': {'$in': UNPAID_STATUSES}},
+                {'status': 'paid', 'updated_at': {'$gte': month_start, '$lt': month_end}},
+            ],
+        }},
+        {'$group': {
+            '_id': None,
+            'unpaid_invoices': {'$sum': {'$cond': [is_unpaid, 1, 0]}},
+            'overdue_invoices': {'$sum': {'$cond': [is_overdue, 1, 0]}},
+            'outstanding_amount': {'$sum': {'$cond': [is_unpaid, '$total', 0]}},
+            'monthly_revenue': {'$sum': {'$cond': [is_month_revenue, '$total', 0]}},
+        }},
+        {'$project': {'_id': 0}},
+    ]
+
+
+@router.get("/kpis/billing", response_model=BillingKPIs)
+async def get_billing_kpis(tenant_id: str, db=Depends(get_db)):
+    rows = await db.invoices.aggregate(billing_kpi_pipeline(tenant_id, datetime.utcnow())).to_list(1)
+    return BillingKPIs(**rows[0]) if rows else BillingKPIs()
+
+
+@router.post("/invoice-numbers", response_model=InvoiceNumberBlock)
+async def reserve_invoice_numbers(
+    tenant_id: str,
+    count: int = Query(1, ge=1, le=MAX_INVOICE_NUMBER_BLOCK),
+    db=Depends(get_db),
+):
+    return await allocate_invoice_numbers(db, tenant_id, count)
+
+
+@router.post("/invoices", response_model=Invoice)
+async def create_invoice(tenant_id: str, input: InvoiceCreate, db=Depends(get_db)):
+    invoice_dict = input.dict()
+    if not invoice_dict['invoice_number']:
+        block = await allocate_invoice_numbers(db, tenant_id)
+        invoice_dict['invoice_number'] = block.numbers[0]
+    invoice_obj = Invoice(tenant_id=tenant_id, **invoice_dict)
+    doc = invoice_obj.dict()
+    try:
+        await db.invoices.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Invoice number {doc['invoice_number']} is already used")
+    await kpis.apply_invoice_change(db, tenant_id, None, doc)
+    return invoice_obj
+
+
+@router.patch("/invoices/{invoice_id}", response_model=Invoice)
+async def update_invoice(tenant_id: str, invoice_id: str, input: InvoiceUpdate, db=Depends(get_db)):
+    changes = input.dict(exclude_unset=True)
+    changes['updated_at'] = datetime.utcnow()
+    old = await db.invoices.find_one_and_update(
+        {'tenant_id': tenant_id, 'id': invoice_id},
+        {'$set': changes},
+        projection={'_id': 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if old is None:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    new = {**old, **changes}
+    await kpis.apply_invoice_change(db, tenant_id, old, new)
+    return Invoice(**new)
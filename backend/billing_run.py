@@ -0,0 +1,451 @@
+"""
+Recurring invoice generation for contracts
+
+A billing run walks every active contract in ``id`` order, one batch at a
+time, and invoices each billing period that starts between the run's window
+start and window end. A contract no run has billed before starts at its
+current period unless the window start reaches further back, since earlier
+periods were invoiced from the app. All money is integer paisa until the
+final rupee totals are derived. Invoice numbers are reserved per tenant in
+blocks, and invoices and their lines go out in bulk.
+
+After every batch the run document records the last contract id it
+finished, so an interrupted run resumes where it stopped. Invoice ids are
+derived from (contract_id, period_start) and lines are written before their
+invoice, so an invoice that exists always has its lines and a replayed batch
+rewrites the same lines instead of adding more. Invoices are unique on
+(contract_id, period_start), and periods that are already invoiced are
+skipped before numbers are reserved, so replaying a batch never duplicates
+anything.
+
+Only one run executes at a time across all workers and the CLI: starting or
+resuming takes the ``billing_run`` lease, which the run renews after every
+batch.
+
+Runs can be started over HTTP (POST /api/billing-runs, with the project's
+service_role key as the bearer token) or from the shell:
+
+    python billing_run.py --window-end 2025-02-01
+    python billing_run.py --window-start 2024-04-01 --window-end 2025-02-01
+    python billing_run.py --resume <run_id>
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import uuid
+from calendar import monthrange
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+
+import leases
+from auth import require_service_role
+from billing import allocate_invoice_numbers
+from database import get_db
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/billing-runs", dependencies=[Depends(require_service_role)])
+
+CYCLE_MONTHS = {'monthly': 1, 'annual': 12}
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_TAX_RATE_BPS = 1800  # 18% GST
+DEFAULT_DUE_DAYS = 15
+
+RUN_LEASE = 'billing_run'
+RUN_LEASE_SECONDS = 300  # renewed after every batch
+
+# Invoice ids are uuid5(namespace, "<contract_id>:<period_start>")
+INVOICE_ID_NAMESPACE = uuid.UUID('e6d0aec0-2bb3-466b-88ab-0bc78a8ba388')
+
+# Runs started over HTTP, kept so they are not garbage collected mid-flight
+_background_runs: Dict[str, asyncio.Task] = {}
+
+
+class RunInProgress(Exception):
+    """Another billing run holds the lease"""
+
+
+class BillingRunCreate(BaseModel):
+    window_start: Optional[datetime] = None
+    window_end: Optional[datetime] = None
+    batch_size: int = Field(DEFAULT_BATCH_SIZE, ge=1, le=10000)
+    tax_rate_bps: int = Field(DEFAULT_TAX_RATE_BPS, ge=0, le=10000)
+
+class BillingRun(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    status: Literal['running', 'completed', 'failed'] = 'running'
+    window_start: Optional[datetime] = None
+    window_end: datetime
+    batch_size: int = DEFAULT_BATCH_SIZE
+    tax_rate_bps: int = DEFAULT_TAX_RATE_BPS
+    last_contract_id: Optional[str] = None
+    contracts_processed: int = 0
+    invoices_created: int = 0
+    amount_paisa: int = 0
+    error: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+def add_months_clamped(anchor: datetime, months: int) -> datetime:
+    """Add calendar months, clamping to the last day of short months"""
+    year, month = divmod(anchor.month - 1 + months, 12)
+    year += anchor.year
+    month += 1
+    return anchor.replace(year=year, month=month, day=min(anchor.day, monthrange(year, month)[1]))
+
+
+def percent_of(amount_paisa: int, rate_bps: int) -> int:
+    """amount * rate in integer paisa, rounding half up"""
+    return (amount_paisa * rate_bps + 5000) // 10000
+
+
+def contract_start(contract: dict) -> Optional[datetime]:
+    return contract.get('start_at') or contract.get('start_date')
+
+
+def contract_end(contract: dict) -> Optional[datetime]:
+    return contract.get('end_at') or contract.get('end_date')
+
+
+def due_periods(contract: dict, window_end: datetime, window_start: Optional[datetime] = None) -> List[tuple]:
+    """(index, period_start, period_end) for every unbilled period that is due"""
+    anchor = contract_start(contract)
+    months = CYCLE_MONTHS.get(contract.get('billing_cycle'))
+    if anchor is None or months is None:
+        return []
+    end = contract_end(contract)
+    index = contract.get('next_billing_period')
+    if index is None:
+        index = 0
+        if window_start is None:
+            # Never billed by a run: earlier periods were invoiced from the app
+            while add_months_clamped(anchor, (index + 1) * months) <= window_end:
+                index += 1
+    if window_start is not None:
+        while add_months_clamped(anchor, index * months) < window_start:
+            index += 1
+    periods = []
+    while True:
+        period_start = add_months_clamped(anchor, index * months)
+        if period_start > window_end or (end and period_start >= end):
+            return periods
+        periods.append((index, period_start, add_months_clamped(anchor, (index + 1) * months)))
+        index += 1
+
+
+def invoice_id_for(contract_id: str, period_start: datetime) -> str:
+    """Same id for the same contract period on every attempt"""
+    return str(uuid.uuid5(INVOICE_ID_NAMESPACE, f"{contract_id}:{period_start.isoformat()}"))
+
+
+def build_invoice(contract: dict, customer: dict, period_start: datetime, period_end: datetime,
+                  tax_rate_bps: int, now: datetime) -> tuple:
+    """Invoice and line documents for one contract period"""
+    subtotal_paisa = int(contract['price_paisa'])
+    tax_paisa = percent_of(subtotal_paisa, tax_rate_bps)
+    total_paisa = subtotal_paisa + tax_paisa
+    invoice_id = invoice_id_for(contract['id'], period_start)
+    contract_type = (contract.get('type') or contract.get('contract_type') or 'contract').upper()
+
+    invoice = {
+        'id': invoice_id,
+        'tenant_id': contract['tenant_id'],
+        'contract_id': contract['id'],
+        'request_ids': [],
+        'invoice_number': None,  # filled from the tenant's reserved block
+        'status': 'draft',
+        'customer_info': customer,
+        'issue_date': now,
+        'due_date': now + timedelta(days=DEFAULT_DUE_DAYS),
+        'period_start': period_start,
+        'period_end': period_end,
+        'subtotal': subtotal_paisa / 100,
+        'tax_amount': tax_paisa / 100,
+        'total': total_paisa / 100,
+        'subtotal_paisa': subtotal_paisa,
+        'tax_paisa': tax_paisa,
+        'amount_paisa': total_paisa,
+        'currency': 'INR',
+        'notes': None,
+        'created_at': now,
+        'updated_at': now,
+    }
+    line = {
+        'id': str(uuid.uuid5(INVOICE_ID_NAMESPACE, f"{invoice_id}:1")),
+        'invoice_id': invoice_id,
+        'description': f"{contract_type} service {period_start:%d %b %Y} - {period_end:%d %b %Y}",
+        'quantity': 1.0,
+        'unit_price': subtotal_paisa / 100,
+        'line_total': subtotal_paisa / 100,
+        'tax_rate': tax_rate_bps / 10000,
+        'tax_amount': tax_paisa / 100,
+        'item_type': 'other',
+    }
+    return invoice, line
+
+
+async def _customers(db, tenant_ids: List[str]) -> Dict[str, dict]:
+    """Customer info per tenant, from the tenants collection"""
+    customers = {}
+    async for tenant in db.tenants.find({'id': {'$in': tenant_ids}}, {'_id': 0}):
+        customers[tenant['id']] = {
+            'name': tenant.get('name') or tenant['id'],
+            'email': tenant.get('email') or '',
+            'phone': tenant.get('phone'),
+            'address': tenant.get('address'),
+            'gst_number': tenant.get('gst'),
+        }
+    return customers
+
+
+async def process_batch(db, run: dict, contracts: List[dict], now: datetime) -> tuple:
+    """Invoice one batch of contracts; returns (invoices created, paisa billed)"""
+    planned = [
+        (contract, index, period_start, period_end)
+        for contract in contracts
+        for index, period_start, period_end in due_periods(contract, run['window_end'], run.get('window_start'))
+    ]
+    if not planned:
+        return 0, 0
+
+    # Periods already invoiced by an interrupted attempt are not billed again
+    existing = set()
+    async for invoice in db.invoices.find(
+        {'contract_id': {'$in': list({contract['id'] for contract, *_ in planned})},
+         'period_start': {'$in': sorted({period_start for _, _, period_start, _ in planned})}},
+        {'_id': 0, 'contract_id': 1, 'period_start': 1},
+    ):
+        existing.add((invoice['contract_id'], invoice['period_start']))
+
+    customers = await _customers(db, list({contract['tenant_id'] for contract in contracts}))
+    by_tenant = defaultdict(list)
+    lines = []
+    next_period = {}
+    for contract, index, period_start, period_end in planned:
+        next_period[contract['id']] = index + 1
+        if (contract['id'], period_start) in existing:
+            continue
+        customer = customers.get(contract['tenant_id']) or {'name': contract['tenant_id'], 'email': ''}
+        invoice, line = build_invoice(contract, customer, period_start, period_end, run['tax_rate_bps'], now)
+        by_tenant[contract['tenant_id']].append(invoice)
+        lines.append(line)
+
+    invoices = []
+    for tenant_id, tenant_invoices in by_tenant.items():
+        block = await allocate_invoice_numbers(db, tenant_id, len(tenant_invoices), now)
+        for invoice, number in zip(tenant_invoices, block.numbers):
+            invoice['invoice_number'] = number
+        invoices.extend(tenant_invoices)
+
+    if invoices:
+        # Lines first: if the invoices do not make it, the replay rebuilds
+        # them with the same ids and these upserts overwrite the same lines
+        await db.invoice_lines.bulk_write([
+            ReplaceOne({'id': line['id']}, line, upsert=True) for line in lines
+        ], ordered=False)
+        await db.invoices.insert_many(invoices, ordered=False)
+    await db.contracts.bulk_write([
+        UpdateOne({'id': contract_id}, {'$max': {'next_billing_period': period}})
+        for contract_id, period in next_period.items()
+    ], ordered=False)
+    return len(invoices), sum(invoice['amount_paisa'] for invoice in invoices)
+
+
+async def execute_run(db, run_id: str, lease_owner: str) -> dict:
+    """Process contracts after the run's checkpoint until none are left.
+
+    The caller holds the run lease as ``lease_owner``; it is renewed before
+    every batch and released when the run stops.
+    """
+    run = await db.billing_runs.find_one({'id': run_id}, {'_id': 0})
+    if run is None:
+        await leases.release(db, RUN_LEASE, lease_owner)
+        raise LookupError(f"Billing run {run_id} not found")
+    owned = {'id': run_id, 'lease_owner': lease_owner}
+
+    active = {
+        '$or': [{'status': 'active'}, {'is_active': True}],
+        'price_paisa': {'$gt': 0},
+    }
+    try:
+        while True:
+            if not await leases.acquire(db, RUN_LEASE, lease_owner, RUN_LEASE_SECONDS):
+                # Stalled past the lease; whoever holds it now owns the run document too
+                raise RunInProgress(f"Billing run {run_id} lost its lease")
+            query = dict(active)
+            if run['last_contract_id']:
+                query['id'] = {'$gt': run['last_contract_id']}
+            contracts = await db.contracts.find(query, {'_id': 0}).sort('id', 1).limit(
+                run['batch_size']).to_list(run['batch_size'])
+            if not contracts:
+                break
+
+            now = datetime.utcnow()
+            created, amount = await process_batch(db, run, contracts, now)
+            run['last_contract_id'] = contracts[-1]['id']
+            run['contracts_processed'] += len(contracts)
+            run['invoices_created'] += created
+            run['amount_paisa'] += amount
+            await db.billing_runs.update_one(owned, {'$set': {
+                'last_contract_id': run['last_contract_id'],
+                'contracts_processed': run['contracts_processed'],
+                'invoices_created': run['invoices_created'],
+                'amount_paisa': run['amount_paisa'],
+                'updated_at': now,
+            }})
+            logger.info("Billing run %s: %d contracts, %d invoices",
+                        run_id, run['contracts_processed'], run['invoices_created'])
+    except RunInProgress:
+        raise
+    except Exception as e:
+        await db.billing_runs.update_one(owned, {'$set': {
+            'status': 'failed', 'error': str(e), 'updated_at': datetime.utcnow(),
+        }})
+        raise
+    finally:
+        await leases.release(db, RUN_LEASE, lease_owner)
+
+    finished = datetime.utcnow()
+    run.update(status='completed', error=None, finished_at=finished, updated_at=finished)
+    await db.billing_runs.update_one(owned, {'$set': {
+        'status': 'completed', 'error': None, 'finished_at': finished, 'updated_at': finished,
+    }})
+    return run
+
+
+async def take_run_lease(db) -> str:
+    """Lease that lets one run execute; returns its owner token"""
+    owner = str(uuid.uuid4())
+    if not await leases.acquire(db, RUN_LEASE, owner, RUN_LEASE_SECONDS):
+        raise RunInProgress("Another billing run is in progress")
+    return owner
+
+
+async def start_run(db, input: BillingRunCreate) -> dict:
+    """Create a run holding the lease; execute_run it with run['lease_owner']"""
+    owner = await take_run_lease(db)
+    run = BillingRun(
+        window_start=input.window_start,
+        window_end=input.window_end or datetime.utcnow(),
+        batch_size=input.batch_size,
+        tax_rate_bps=input.tax_rate_bps,
+    ).dict()
+    run['lease_owner'] = owner
+    try:
+        await db.billing_runs.insert_one(dict(run))
+    except Exception:
+        await leases.release(db, RUN_LEASE, owner)
+        raise
+    return run
+
+
+async def resume_run(db, run_id: str) -> dict:
+    owner = await take_run_lease(db)
+    run = await db.billing_runs.find_one_and_update(
+        {'id': run_id, 'status': {'$ne': 'completed'}},
+        {'$set': {'status': 'running', 'error': None, 'lease_owner': owner, 'updated_at': datetime.utcnow()}},
+        projection={'_id': 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if run is None:
+        await leases.release(db, RUN_LEASE, owner)
+        raise LookupError(f"No resumable billing run {run_id}")
+    return run
+
+
+def _run_in_background(db, run: dict):
+    run_id = run['id']
+
+    async def runner():
+        try:
+            await execute_run(db, run_id, run['lease_owner'])
+        except Exception:
+            logger.exception("Billing run %s failed", run_id)
+        finally:
+            _background_runs.pop(run_id, None)
+    _background_runs[run_id] = asyncio.create_task(runner())
+
+
+@router.post("", response_model=BillingRun, status_code=202)
+async def create_billing_run(input: BillingRunCreate, db=Depends(get_db)):
+    try:
+        run = await start_run(db, input)
+    except RunInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    _run_in_background(db, run)
+    return BillingRun(**run)
+
+
+@router.post("/{run_id}/resume", response_model=BillingRun, status_code=202)
+async def resume_billing_run(run_id: str, db=Depends(get_db)):
+    if run_id in _background_runs:
+        raise HTTPException(status_code=409, detail="Billing run is already in progress")
+    try:
+        run = await resume_run(db, run_id)
+    except RunInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    _run_in_background(db, run)
+    return BillingRun(**run)
+
+
+@router.get("/{run_id}", response_model=BillingRun)
+async def get_billing_run(run_id: str, db=Depends(get_db)):
+    run = await db.billing_runs.find_one({'id': run_id}, {'_id': 0})
+    if run is None:
+        raise HTTPException(status_code=404, detail="Billing run not found")
+    return BillingRun(**run)
+
+
+async def _main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from server import mongo_client_options
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], **mongo_client_options())
+    db = client[os.environ['DB_NAME']]
+    try:
+        try:
+            if args.resume:
+                run = await resume_run(db, args.resume)
+            else:
+                run = await start_run(db, BillingRunCreate(
+                    window_start=args.window_start, window_end=args.window_end,
+                    batch_size=args.batch_size, tax_rate_bps=args.tax_rate_bps))
+        except (RunInProgress, LookupError) as e:
+            sys.exit(str(e))
+        print(f"Billing run {run['id']} (window end {run['window_end']:%Y-%m-%d})")
+        run = await execute_run(db, run['id'], run['lease_owner'])
+        print(f"Completed: {run['contracts_processed']} contracts, "
+              f"{run['invoices_created']} invoices, {run['amount_paisa'] / 100:.2f} INR")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate recurring contract invoices")
+    parser.add_argument('--window-start', type=datetime.fromisoformat,
+                        help='bill periods starting on or after this date (default: from the current '
+                             'period of contracts no run has billed yet)')
+    parser.add_argument('--window-end', type=datetime.fromisoformat,
+                        help='bill periods starting on or before this date (default: now)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--tax-rate-bps', type=int, default=DEFAULT_TAX_RATE_BPS,
+                        help='tax rate in basis points (1800 = 18%%)')
+    parser.add_argument('--resume', metavar='RUN_ID', help='continue an interrupted run')
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
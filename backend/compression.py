@@ -0,0 +1,248 @@
+"""
+Response compression negotiated from Accept-Encoding
+
+A pure ASGI middleware, so streamed responses (the NDJSON export) are
+compressed chunk by chunk instead of being buffered. zstd and brotli are
+used when their packages are installed and gzip is always available; the
+client's q-values decide, with ties going to the better codec. Bodies under
+the size threshold, empty bodies (HEAD, 204, 304) and already-compressed or
+non-text media types are sent as they are. Server-sent events and WebSockets are never touched, since
+flushing each event through a compressor defeats the point of streaming.
+"""
+
+import os
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+
+DEFAULT_MINIMUM_SIZE = 1024
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'br': 4,
+    'zstd': 3,
+}
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'text/plain',
+    'text/html',
+    'text/csv',
+)
+
+# Responses that never carry a body, whatever the app sent
+BODYLESS_STATUSES = (204, 304)
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    name = 'zstd'
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+ENCODERS = {'gzip': GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS['zstd'] = ZstdEncoder
+
+# Preference order when the client accepts several codecs with equal q
+PREFERENCE = ('zstd', 'br', 'gzip')
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """One-shot compression, used by the benchmark and tests"""
+    encoder = ENCODERS[encoding](DEFAULT_LEVELS[encoding] if level is None else level)
+    return encoder.compress(data) + encoder.finish()
+
+
+def parse_qvalues(header: str) -> Dict[str, float]:
+    """Map each coding or media range in an Accept-Encoding or Accept header to its q-value"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str, available=None) -> Optional[str]:
+    """Best available coding the client accepts, or None for identity"""
+    available = ENCODERS if available is None else available
+    accepted = parse_qvalues(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in PREFERENCE:
+        if coding not in available:
+            continue
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compression_levels_from_env() -> Dict[str, int]:
+    return {
+        'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', DEFAULT_LEVELS['gzip'])),
+        'br': int(os.environ.get('COMPRESSION_BROTLI_QUALITY', DEFAULT_LEVELS['br'])),
+        'zstd': int(os.environ.get('COMPRESSION_ZSTD_LEVEL', DEFAULT_LEVELS['zstd'])),
+    }
+
+
+def _header(headers: List[tuple], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _with_vary(headers: List[tuple]) -> List[tuple]:
+    """Add Accept-Encoding to Vary, keeping whatever CORS already put there"""
+    vary = _header(headers, b'vary')
+    headers = [(key, value) for key, value in headers if key.lower() != b'vary']
+    headers.append((b'vary', vary + b', Accept-Encoding' if vary else b'Accept-Encoding'))
+    return headers
+
+
+def _is_compressible(headers: List[tuple]) -> bool:
+    if _header(headers, b'content-encoding') is not None:
+        return False
+    content_type = (_header(headers, b'content-type') or b'').decode('latin-1').split(';')[0].strip()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses with the codec picked from Accept-Encoding"""
+
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE, levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope['headers'])
+        encoding = choose_encoding(request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+
+            if message['type'] == 'http.response.start':
+                # Hold the headers until the first body chunk shows the size
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if encoder is None:
+                headers = list(start_message.get('headers', []))
+                if (
+                    not _is_compressible(headers)
+                    or start_message['status'] in BODYLESS_STATUSES
+                    or (not more_body and (not body or len(body) < self.minimum_size))
+                ):
+                    passthrough = True
+                    if _is_compressible(headers):
+                        start_message['headers'] = _with_vary(headers)
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = ENCODERS[encoding](self.levels[encoding])
+                headers = [(key, value) for key, value in _with_vary(headers) if key.lower() != b'content-length']
+                headers.append((b'content-encoding', encoding.encode()))
+                if not more_body:
+                    compressed = encoder.compress(body) + encoder.finish()
+                    headers.append((b'content-length', str(len(compressed)).encode()))
+                    start_message['headers'] = headers
+                    await send(start_message)
+                    await send({'type': 'http.response.body', 'body': compressed})
+                    return
+                start_message['headers'] = headers
+                await send(start_message)
+
+            if more_body:
+                # Flush every chunk so streamed rows reach the client promptly
+                chunk = encoder.compress(body) + encoder.flush()
+            else:
+                chunk = encoder.compress(body) + encoder.finish()
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,14 @@
+"""
+Database access for routers that live outside server.py
+
+server.py opens the Motor client in its lifespan and publishes the database
+on ``app.state.db``. Feature routers take it through the ``get_db``
+dependency instead of importing server.py.
+"""
+
+from starlette.requests import HTTPConnection
+
+
+def get_db(connection: HTTPConnection):
+    """Motor database for the current request or websocket"""
+    return connection.app.state.db
@@ -0,0 +1,260 @@
+"""
+Materialized per-tenant KPI snapshots
+
+Each tenant has one document in ``kpi_snapshots``. Counters that only depend
+on the state of a request or invoice (open requests, unpaid invoices,
+outstanding amount, revenue per month) are adjusted with ``$inc`` whenever
+those documents are written through the API. Counters that depend on the
+clock (overdue and due-today requests, overdue invoices, PM visits) are
+recomputed by the reconcile job, which also corrects any drift in the
+incremental ones. Dashboards read the whole snapshot with one find_one.
+
+Every uvicorn worker starts the reconcile loop, but only the worker holding
+the ``kpi_reconcile`` lease runs it, so the full aggregation happens once per
+interval for the whole deployment.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+from pymongo import UpdateOne
+
+import leases
+from auth import require_tenant
+from database import get_db
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/tenants/{tenant_id}", dependencies=[Depends(require_tenant)])
+
+OPEN_REQUEST_STATUSES = ['new', 'triaged', 'assigned', 'en_route', 'on_site']
+UNPAID_INVOICE_STATUSES = ['sent', 'pending']
+ACTIVE_PM_STATUSES = ['scheduled', 'in_progress']
+
+RECONCILE_LEASE = 'kpi_reconcile'
+# Intervals a silent lease holder gets before another worker takes over
+RECONCILE_LEASE_INTERVALS = 3
+
+# Counters reset to zero by a reconcile before the fresh values are written
+RECONCILED_COUNTERS = (
+    'open_requests', 'overdue_requests', 'due_today_requests',
+    'unpaid_invoices', 'overdue_invoices', 'outstanding_amount',
+    'pm_upcoming', 'pm_due_today', 'pm_overdue',
+)
+
+
+class KpiSnapshot(BaseModel):
+    """Dashboard KPIs, named like RequestKPIs in requests_repository.dart"""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+    open_requests: int = 0
+    overdue_requests: int = 0
+    due_today_requests: int = 0
+    pm_upcoming: int = 0
+    pm_due_today: int = 0
+    pm_overdue: int = 0
+    unpaid_invoices: int = 0
+    overdue_invoices: int = 0
+    outstanding_amount: float = 0.0
+    monthly_revenue: float = 0.0
+    reconciled_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+def month_key(moment: datetime) -> str:
+    return moment.strftime('%Y-%m')
+
+
+def request_contribution(doc: Optional[dict]) -> Dict[str, float]:
+    """What a single request adds to its tenant's incremental counters"""
+    if not doc or doc.get('status') not in OPEN_REQUEST_STATUSES:
+        return {}
+    return {'open_requests': 1}
+
+
+def invoice_contribution(doc: Optional[dict]) -> Dict[str, float]:
+    """What a single invoice adds to its tenant's incremental counters"""
+    if not doc:
+        return {}
+    total = doc.get('total') or 0
+    if doc.get('status') in UNPAID_INVOICE_STATUSES:
+        return {'unpaid_invoices': 1, 'outstanding_amount': total}
+    if doc.get('status') == 'paid' and doc.get('updated_at'):
+        return {f"paid_revenue.{month_key(doc['updated_at'])}": total}
+    return {}
+
+
+async def _apply_delta(db, tenant_id: str, before: dict, after: dict):
+    delta = {
+        key: after.get(key, 0) - before.get(key, 0)
+        for key in before.keys() | after.keys()
+    }
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return
+    await db.kpi_snapshots.update_one(
+        {'tenant_id': tenant_id},
+        {'$inc': delta, '$set': {'updated_at': datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def apply_request_change(db, tenant_id: str, old: Optional[dict], new: Optional[dict]):
+    """Adjust the snapshot after a request was created, updated or deleted"""
+    await _apply_delta(db, tenant_id, request_contribution(old), request_contribution(new))
+
+
+async def apply_invoice_change(db, tenant_id: str, old: Optional[dict], new: Optional[dict]):
+    """Adjust the snapshot after an invoice was created, updated or deleted"""
+    await _apply_delta(db, tenant_id, invoice_contribution(old), invoice_contribution(new))
+
+
+def is_before(field: str, moment: datetime) -> dict:
+    """Aggregation test for a date field before ``moment``; null never matches"""
+    return {'$and': [{'$eq': [{'$type': field}, 'date']}, {'$lt': [field, moment]}]}
+
+
+def _tenant_match(tenant_id: Optional[str]) -> dict:
+    return {'tenant_id': tenant_id} if tenant_id else {}
+
+
+async def reconcile(db, tenant_id: Optional[str] = None) -> int:
+    """Recompute snapshots from the source collections.
+
+    Covers one tenant, or every tenant when ``tenant_id`` is None, with one
+    grouped aggregation per collection. Returns the number of snapshots
+    written.
+    """
+    now = datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    tomorrow = today + timedelta(days=1)
+    snapshots: Dict[str, dict] = {}
+
+    def snapshot(tenant: str) -> dict:
+        if tenant not in snapshots:
+            snapshots[tenant] = {counter: 0 for counter in RECONCILED_COUNTERS}
+            snapshots[tenant]['paid_revenue'] = {}
+        return snapshots[tenant]
+
+    request_rows = db.requests.aggregate([
+        {'$match': {**_tenant_match(tenant_id), 'status': {'$in': OPEN_REQUEST_STATUSES}}},
+        {'$group': {
+            '_id': '$tenant_id',
+            'open_requests': {'$sum': 1},
+            'overdue_requests': {'$sum': {'$cond': [{'$and': [
+                {'$eq': ['$priority', 'critical']},
+                is_before('$sla_due_at', now),
+            ]}, 1, 0]}},
+            'due_today_requests': {'$sum': {'$cond': [{'$and': [
+                {'$gte': ['$sla_due_at', today]},
+                {'$lt': ['$sla_due_at', tomorrow]},
+            ]}, 1, 0]}},
+        }},
+    ])
+    async for row in request_rows:
+        snapshot(row.pop('_id')).update(row)
+
+    is_unpaid = {'$in': ['$status', UNPAID_INVOICE_STATUSES]}
+    invoice_rows = db.invoices.aggregate([
+        {'$match': {**_tenant_match(tenant_id), 'status': {'$in': [*UNPAID_INVOICE_STATUSES, 'paid']}}},
+        {'$group': {
+            '_id': {
+                'tenant_id': '$tenant_id',
+                'paid_month': {'$cond': [
+                    {'$eq': ['$status', 'paid']},
+                    {'$dateToString': {'format': '%Y-%m', 'date': '$updated_at'}},
+                    None,
+                ]},
+            },
+            'unpaid_invoices': {'$sum': {'$cond': [is_unpaid, 1, 0]}},
+            'overdue_invoices': {'$sum': {'$cond': [
+                {'$and': [is_unpaid, is_before('$due_date', now)]}, 1, 0]}},
+            'outstanding_amount': {'$sum': {'$cond': [is_unpaid, '$total', 0]}},
+            'paid_total': {'$sum': {'$cond': [is_unpaid, 0, '$total']}},
+        }},
+    ])
+    async for row in invoice_rows:
+        target = snapshot(row['_id']['tenant_id'])
+        paid_month = row['_id']['paid_month']
+        if paid_month:
+            target['paid_revenue'][paid_month] = row['paid_total']
+        else:
+            for counter in ('unpaid_invoices', 'overdue_invoices', 'outstanding_amount'):
+                target[counter] += row[counter]
+
+    pm_rows = db.pm_visits.aggregate([
+        {'$match': {**_tenant_match(tenant_id), 'status': {'$in': ACTIVE_PM_STATUSES}}},
+        {'$group': {
+            '_id': '$tenant_id',
+            'pm_upcoming': {'$sum': 1},
+            'pm_due_today': {'$sum': {'$cond': [{'$and': [
+                {'$gte': ['$scheduled_date', today]},
+                {'$lt': ['$scheduled_date', tomorrow]},
+            ]}, 1, 0]}},
+            'pm_overdue': {'$sum': {'$cond': [is_before('$scheduled_date', today), 1, 0]}},
+        }},
+    ])
+    async for row in pm_rows:
+        snapshot(row.pop('_id')).update(row)
+
+    if tenant_id:
+        snapshot(tenant_id)
+
+    operations = [
+        UpdateOne(
+            {'tenant_id': tenant},
+            {'$set': {**values, 'reconciled_at': now, 'updated_at': now}},
+            upsert=True,
+        )
+        for tenant, values in snapshots.items()
+    ]
+    if operations:
+        await db.kpi_snapshots.bulk_write(operations, ordered=False)
+
+    if not tenant_id:
+        # Snapshots not touched above belong to tenants with nothing open
+        zeroed = {counter: 0 for counter in RECONCILED_COUNTERS}
+        await db.kpi_snapshots.update_many(
+            {'$or': [{'reconciled_at': {'$lt': now}}, {'reconciled_at': {'$exists': False}}]},
+            {'$set': {**zeroed, 'paid_revenue': {}, 'reconciled_at': now, 'updated_at': now}},
+        )
+    return len(snapshots)
+
+
+async def reconcile_loop(db, interval_seconds: float):
+    """Periodically rebuild every snapshot until cancelled, in one worker at a time"""
+    owner = str(uuid.uuid4())
+    while True:
+        try:
+            if await leases.acquire(db, RECONCILE_LEASE, owner, interval_seconds * RECONCILE_LEASE_INTERVALS):
+                count = await reconcile(db)
+                logger.info("Reconciled KPI snapshots for %d tenants", count)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("KPI reconcile failed")
+        await asyncio.sleep(interval_seconds)
+
+
+@router.get("/kpis", response_model=KpiSnapshot)
+async def get_kpi_snapshot(tenant_id: str, db=Depends(get_db)):
+    doc = await db.kpi_snapshots.find_one({'tenant_id': tenant_id}, {'_id': 0})
+    if doc is None:
+        await reconcile(db, tenant_id)
+        doc = await db.kpi_snapshots.find_one({'tenant_id': tenant_id}, {'_id': 0})
+    paid_revenue = doc.pop('paid_revenue', None) or {}
+    doc['monthly_revenue'] = paid_revenue.get(month_key(datetime.utcnow()), 0.0)
+    return KpiSnapshot(**doc)
+
+
+@router.post("/kpis/reconcile", response_model=KpiSnapshot)
+async def reconcile_kpi_snapshot(tenant_id: str, db=Depends(get_db)):
+    await reconcile(db, tenant_id)
+    return await get_kpi_snapshot(tenant_id, db)
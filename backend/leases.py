@@ -0,0 +1,34 @@
+"""
+Time-limited leases for work only one worker may do at a time
+
+uvicorn runs several worker processes and the billing CLI runs outside them
+all, so an in-process flag cannot keep two of them from doing the same job.
+A lease is one document in ``leases``, keyed by the job name, holding its
+owner and expiry. Taking it is a single conditional upsert: it matches when
+the lease is free, expired or already ours, and otherwise the upsert collides
+with the existing ``_id`` and fails with a duplicate key. A holder that dies
+simply stops renewing, and the lease passes on once it expires.
+"""
+
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+async def acquire(db, name: str, owner: str, ttl_seconds: float) -> bool:
+    """Take or renew the lease; False while someone else holds it"""
+    now = datetime.utcnow()
+    try:
+        await db.leases.update_one(
+            {'_id': name, '$or': [{'owner': owner}, {'expires_at': {'$lte': now}}]},
+            {'$set': {'owner': owner, 'expires_at': now + timedelta(seconds=ttl_seconds), 'renewed_at': now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def release(db, name: str, owner: str):
+    """Give the lease up early, if we still hold it"""
+    await db.leases.delete_one({'_id': name, 'owner': owner})
@@ -0,0 +1,182 @@
+"""
+In-process metrics in the Prometheus text exposition format
+
+Request counts, in-flight requests and latency histograms per route and
+status code are recorded by an HTTP middleware, and Mongo command timings by
+a pymongo CommandListener. Everything is rendered by /api/metrics, so a local
+Prometheus (or curl) can scrape it without any external agent.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+from starlette.requests import Request
+
+
+# Latency buckets in seconds, tuned for an API that should answer in < 1s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def dec(self, *label_values: str, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, [list(series[0]), series[1], series[2]]) for key, series in self._series.items())
+        lines = []
+        bucket_labels = (*self.labels, 'le')
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float('inf')), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, (*key, le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in registration order"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    'http_requests_total', 'HTTP requests handled', ('method', 'route', 'status')))
+http_requests_in_flight = registry.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being served', ('method',)))
+http_request_duration_seconds = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency until response headers',
+    ('method', 'route', 'status')))
+mongo_commands_total = registry.register(Counter(
+    'mongo_commands_total', 'MongoDB commands issued', ('command', 'outcome')))
+mongo_command_duration_seconds = registry.register(Histogram(
+    'mongo_command_duration_seconds', 'MongoDB command round-trip time', ('command', 'outcome')))
+
+
+def route_label(request: Request) -> str:
+    """Route template rather than raw path, to keep label cardinality bounded"""
+    route = request.scope.get('route')
+    return getattr(route, 'path', None) or 'unmatched'
+
+
+async def metrics_middleware(request: Request, call_next):
+    method = request.method
+    http_requests_in_flight.inc(method)
+    started = time.perf_counter()
+    status = '500'
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        http_requests_in_flight.dec(method)
+        route = route_label(request)
+        http_requests_total.inc(method, route, status)
+        http_request_duration_seconds.observe(elapsed, method, route, status)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records every command's duration; called from pymongo's threads"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, 'ok')
+
+    def failed(self, event):
+        self._record(event, 'failed')
+
+    def _record(self, event, outcome: str):
+        mongo_commands_total.inc(event.command_name, outcome)
+        mongo_command_duration_seconds.observe(event.duration_micros / 1e6, event.command_name, outcome)
+
+
+mongo_command_listener = MongoCommandMetrics()
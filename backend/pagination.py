@@ -0,0 +1,41 @@
+"""
+Opaque keyset cursors over (<timestamp field> DESC, id DESC)
+
+Mirrors the cursor pagination the app does against Supabase: a page ends on
+its last row, and the next page selects rows strictly after it, so deep pages
+cost an index seek instead of an offset scan.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def encode_cursor(timestamp: datetime, id: str) -> str:
+    """Encode the last row of a page as an opaque cursor"""
+    raw = json.dumps({'ts': timestamp.isoformat(), 'id': id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode an opaque cursor back into (timestamp, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data['ts']), str(data['id'])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: Optional[str], field: str) -> dict:
+    """Build the Mongo filter selecting rows strictly after the cursor"""
+    if not cursor:
+        return {}
+    timestamp, id = decode_cursor(cursor)
+    return {'$or': [
+        {field: {'$lt': timestamp}},
+        {field: timestamp, 'id': {'$lt': id}},
+    ]}
@@ -0,0 +1,142 @@
+"""
+Planned maintenance schedule generation
+
+Server-side version of PMRepository.generateSchedule90d. Visit dates depend
+only on the contract, so they are computed once and crossed with the
+contract's facilities. Visits are upserted on (contract_id, facility_id,
+scheduled_date), which makes regeneration idempotent and lets the response
+carry only the visits that did not exist yet.
+"""
+
+import itertools
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+
+from auth import require_tenant
+from database import get_db
+
+
+router = APIRouter(prefix="/api/tenants/{tenant_id}", dependencies=[Depends(require_tenant)])
+
+PM_FREQUENCY_MONTHS = {
+    'monthly': 1,
+    'quarterly': 3,
+    'biannual': 6,
+}
+DEFAULT_HORIZON_DAYS = 90
+MAX_HORIZON_DAYS = 730
+UPSERT_CHUNK_SIZE = 1000
+
+
+class PMVisit(BaseModel):
+    """Same fields as PMVisit.toJson() in pm_visit.dart"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str
+    contract_id: str
+    facility_id: str
+    scheduled_date: datetime
+    completed_date: Optional[datetime] = None
+    status: str = 'scheduled'
+    engineer_name: Optional[str] = None
+    notes: Optional[str] = None
+    checklist_id: Optional[str] = None
+    attachment_paths: List[str] = Field(default_factory=list)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PMScheduleResult(BaseModel):
+    contract_id: str
+    horizon_days: int
+    planned: int
+    created: int
+    visits: List[PMVisit]
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """Add calendar months, overflowing the day like Dart's DateTime does"""
+    year, month = divmod(moment.month - 1 + months, 12)
+    year += moment.year
+    month += 1
+    first = moment.replace(year=year, month=month, day=1)
+    return first + timedelta(days=moment.day - 1)
+
+
+def schedule_dates(start: datetime, interval_months: int, window_start: datetime,
+                   window_end: datetime, contract_end: Optional[datetime] = None) -> List[datetime]:
+    """Visit dates aligned with the contract start inside the window"""
+    candidate = start
+    while candidate < window_start:
+        candidate = add_months(candidate, interval_months)
+
+    end = min(window_end, contract_end) if contract_end else window_end
+    dates = []
+    while candidate.date() <= end.date():
+        dates.append(candidate)
+        candidate = add_months(candidate, interval_months)
+    return dates
+
+
+async def generate_schedule(db, tenant_id: str, contract: dict, horizon_days: int,
+                            now: Optional[datetime] = None) -> PMScheduleResult:
+    interval = PM_FREQUENCY_MONTHS.get(contract.get('pm_frequency'))
+    if interval is None:
+        raise HTTPException(status_code=422, detail=f"Unknown PM frequency: {contract.get('pm_frequency')}")
+
+    now = now or datetime.utcnow()
+    dates = schedule_dates(
+        contract['start_date'], interval, now, now + timedelta(days=horizon_days), contract.get('end_date')
+    )
+    planned = [
+        PMVisit(
+            tenant_id=tenant_id,
+            contract_id=contract['id'],
+            facility_id=facility_id,
+            scheduled_date=scheduled_date,
+        ).dict()
+        for facility_id, scheduled_date in itertools.product(contract.get('facility_ids') or [], dates)
+    ]
+
+    created = []
+    for start in range(0, len(planned), UPSERT_CHUNK_SIZE):
+        chunk = planned[start:start + UPSERT_CHUNK_SIZE]
+        result = await db.pm_visits.bulk_write([
+            UpdateOne(
+                {
+                    'contract_id': visit['contract_id'],
+                    'facility_id': visit['facility_id'],
+                    'scheduled_date': visit['scheduled_date'],
+                },
+                {'$setOnInsert': visit},
+                upsert=True,
+            )
+            for visit in chunk
+        ], ordered=False)
+        created.extend(chunk[index] for index in sorted(result.upserted_ids))
+
+    return PMScheduleResult(
+        contract_id=contract['id'],
+        horizon_days=horizon_days,
+        planned=len(planned),
+        created=len(created),
+        visits=[PMVisit(**visit) for visit in created],
+    )
+
+
+@router.post("/contracts/{contract_id}/pm-schedule", response_model=PMScheduleResult)
+async def generate_pm_schedule(
+    tenant_id: str,
+    contract_id: str,
+    horizon_days: int = Query(DEFAULT_HORIZON_DAYS, ge=1, le=MAX_HORIZON_DAYS),
+    db=Depends(get_db),
+):
+    contract = await db.contracts.find_one({'tenant_id': tenant_id, 'id': contract_id}, {'_id': 0})
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    if not contract.get('is_active', True):
+        raise HTTPException(status_code=409, detail="Contract is not active")
+    return await generate_schedule(db, tenant_id, contract, horizon_days)
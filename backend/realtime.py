@@ -0,0 +1,460 @@
+"""
+Realtime fan-out hub
+
+One change stream on the database feeds every connected device. Changes are
+grouped into per-tenant channels named like the app's RealtimeClient
+channels (``<table>_<tenant_id>``), debounced on the server into batches and
+serialized once, then handed to every subscribed socket through a bounded
+per-connection queue. A consumer that falls behind has its backlog replaced
+by a single ``resync`` message instead of holding the hub back. When the
+change stream cannot resume (its history is gone or the token is invalid),
+the hub drops its buffers, starts a fresh stream and sends every subscriber
+a ``resync``.
+
+The same batches are offered over Server-Sent Events for clients behind
+proxies that drop WebSockets. Each batch carries the change-stream resume
+token of its last event as its id, so a reconnecting client sends
+``Last-Event-ID`` and receives only what it missed: from the hub's buffer of
+recent batches when possible, otherwise from a short-lived change stream
+resumed at that token.
+
+Both endpoints authenticate the connection with the caller's Supabase access
+token and stream only the tenant of that user's profile (see auth.py).
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pymongo.errors import PyMongoError
+
+from auth import AuthError, authenticated_tenant
+from database import get_db
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api")
+
+# Tables the app subscribes to, see RealtimeClient.subscribeToTable callers
+WATCHED_TABLES = ('requests', 'pm_visits', 'invoices')
+OPERATION_EVENT_TYPES = {'insert': 'INSERT', 'update': 'UPDATE', 'replace': 'UPDATE'}
+
+DEBOUNCE_SECONDS = 0.3   # same quiet period as RealtimeClient._debounceDelay
+MAX_BATCH_DELAY = 1.0    # flush a busy channel at least this often
+MAX_BATCH_EVENTS = 500
+CONNECTION_QUEUE_SIZE = 64
+MAX_RETRY_DELAY = 60.0
+RECENT_BATCHES = 1024    # replay window for resuming SSE clients
+SSE_KEEPALIVE_SECONDS = 15.0
+SSE_RETRY_MS = 3000
+WS_POLICY_VIOLATION = 1008
+SUBSCRIPTION_ACTIONS = ('subscribe', 'unsubscribe')
+# InvalidResumeToken, ChangeStreamHistoryLost: the stream must start over from now
+LOST_HISTORY_CODES = (260, 286)
+
+# (event id, serialized message); resync notices have no id
+Message = Tuple[Optional[str], str]
+
+
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, default=lambda value: value.isoformat(), separators=(',', ':'))
+
+
+def channel_key(table: str, tenant_id: str) -> str:
+    return f"{table}_{tenant_id}"
+
+
+class Subscriber:
+    """One consumer of the hub with its own bounded outbound queue"""
+
+    def __init__(self, max_queue: int = CONNECTION_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.channels: Set[str] = set()
+        self.dropped = 0
+
+    def offer(self, message: Message, table: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and tell the client to refetch
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(resync_message(table))
+
+
+def resync_message(table: str) -> Message:
+    return None, dumps({'type': 'resync', 'table': table})
+
+
+class RealtimeHub:
+    """Single upstream change stream, debounced and fanned out per channel"""
+
+    def __init__(self, tables=WATCHED_TABLES):
+        self.tables = tables
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._pending: Dict[str, List[dict]] = {}
+        self._pending_tokens: Dict[str, Optional[str]] = {}
+        self._first_pending_at: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._recent = deque(maxlen=RECENT_BATCHES)
+        self.resume_token: Optional[dict] = None
+        self.batches_sent = 0
+        self.events_received = 0
+
+    # Subscriptions
+
+    def subscribe(self, subscriber: Subscriber, table: str, tenant_id: str):
+        key = channel_key(table, tenant_id)
+        self._subscribers[key].add(subscriber)
+        subscriber.channels.add(key)
+
+    def unsubscribe(self, subscriber: Subscriber, table: str, tenant_id: str):
+        key = channel_key(table, tenant_id)
+        self._subscribers[key].discard(subscriber)
+        subscriber.channels.discard(key)
+        if not self._subscribers[key]:
+            del self._subscribers[key]
+
+    def remove(self, subscriber: Subscriber):
+        for key in list(subscriber.channels):
+            self._subscribers[key].discard(subscriber)
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+        subscriber.channels.clear()
+
+    # Change stream
+
+    def pipeline(self) -> list:
+        return [{'$match': {
+            'ns.coll': {'$in': list(self.tables)},
+            'operationType': {'$in': list(OPERATION_EVENT_TYPES)},
+        }}]
+
+    def start(self, db):
+        self._task = asyncio.create_task(self._watch(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+
+    async def _watch(self, db):
+        delay = 1.0
+        while True:
+            try:
+                async with db.watch(
+                    self.pipeline(), full_document='updateLookup', resume_after=self.resume_token
+                ) as stream:
+                    delay = 1.0
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        self.handle_change(change)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                if getattr(e, 'code', None) in LOST_HISTORY_CODES:
+                    logger.warning("Realtime change stream cannot resume (%s), restarting with a resync", e)
+                    self.restart_history()
+                    continue
+                # Standalone servers have no change streams; keep retrying quietly
+                logger.warning("Realtime change stream unavailable (%s), retrying in %.0fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def restart_history(self):
+        """Forget the resume point and everything buffered; every subscriber refetches"""
+        self.resume_token = None
+        self._recent.clear()
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pending.clear()
+        self._pending_tokens.clear()
+        self._first_pending_at.clear()
+        # Longest first, so "pm_visits_t1" is not read as table "pm"
+        tables = sorted(self.tables, key=len, reverse=True)
+        for key, subscribers in list(self._subscribers.items()):
+            table = next((table for table in tables if key.startswith(f"{table}_")), None)
+            if table is None:
+                continue
+            for subscriber in list(subscribers):
+                subscriber.offer(resync_message(table), table)
+
+    def handle_change(self, change: dict):
+        record = change.get('fullDocument')
+        if not record or not record.get('tenant_id'):
+            return
+        record = {key: value for key, value in record.items() if key != '_id'}
+        table = change['ns']['coll']
+        self.events_received += 1
+        self.add_event(table, record['tenant_id'], {
+            'table': table,
+            'eventType': OPERATION_EVENT_TYPES[change['operationType']],
+            'new': record,
+            'old': None,
+        }, token=(self.resume_token or {}).get('_data'))
+
+    # Debounce and fan-out
+
+    def add_event(self, table: str, tenant_id: str, event: dict, token: Optional[str] = None):
+        key = channel_key(table, tenant_id)
+        if key not in self._subscribers:
+            return
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(key, [])
+        pending.append(event)
+        self._first_pending_at.setdefault(key, loop.time())
+        self._pending_tokens[key] = token
+
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        waited = loop.time() - self._first_pending_at[key]
+        if len(pending) >= MAX_BATCH_EVENTS or waited >= MAX_BATCH_DELAY:
+            self.flush(key, table, tenant_id)
+        else:
+            delay = min(DEBOUNCE_SECONDS, MAX_BATCH_DELAY - waited)
+            self._timers[key] = loop.call_later(delay, self.flush, key, table, tenant_id)
+
+    def flush(self, key: str, table: str, tenant_id: str):
+        self._timers.pop(key, None)
+        self._first_pending_at.pop(key, None)
+        events = self._pending.pop(key, None)
+        token = self._pending_tokens.pop(key, None)
+        if not events:
+            return
+        batch = {
+            'type': 'batch',
+            'id': token,
+            'table': table,
+            'tenant_id': tenant_id,
+            'events': events,
+            'timestamp': datetime.utcnow(),
+        }
+        self.publish(key, table, batch)
+
+    def publish(self, key: str, table: str, batch: dict):
+        message = (batch['id'], dumps(batch))  # serialized once for every subscriber
+        for subscriber in self._subscribers.get(key, ()):
+            subscriber.offer(message, table)
+        if batch['id']:
+            self._recent.append((key, message))
+        self.batches_sent += 1
+
+    def replay_after(self, event_id: str, channels: Iterable[str]) -> Optional[List[Message]]:
+        """Buffered batches after ``event_id`` for these channels.
+
+        None means the id is no longer (or never was) in the buffer.
+        """
+        channels = set(channels)
+        recent = list(self._recent)
+        for index, (_, (batch_id, _)) in enumerate(recent):
+            if batch_id == event_id:
+                return [message for key, message in recent[index + 1:] if key in channels]
+        return None
+
+
+hub = RealtimeHub()
+
+
+async def _pump(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        _, message = await subscriber.queue.get()
+        await websocket.send_text(message)
+
+
+@router.websocket("/ws")
+async def realtime_socket(
+    websocket: WebSocket,
+    tables: str = Query(','.join(WATCHED_TABLES)),
+    db=Depends(get_db),
+):
+    """Stream event batches for the authenticated user's tenant.
+
+    Tables given in ``tables`` are subscribed on connect; the client can send
+    ``{"action": "subscribe"|"unsubscribe", "table": ...}`` afterwards.
+    """
+    try:
+        tenant_id = await authenticated_tenant(websocket, db)
+    except AuthError as e:
+        await websocket.close(code=WS_POLICY_VIOLATION, reason=str(e))
+        return
+    await websocket.accept()
+    subscriber = Subscriber()
+    for table in parse_tables(tables):
+        hub.subscribe(subscriber, table, tenant_id)
+
+    pump = asyncio.create_task(_pump(websocket, subscriber))
+    try:
+        while True:
+            error = None
+            try:
+                message = json.loads(await websocket.receive_text())
+            except (ValueError, KeyError):  # not JSON, or a binary frame
+                message = None
+            if not isinstance(message, dict):
+                error = "Expected a JSON object"
+            elif message.get('action') not in SUBSCRIPTION_ACTIONS:
+                error = f"Unknown action: {message.get('action')}"
+            elif message.get('table') not in WATCHED_TABLES:
+                error = f"Unknown table: {message.get('table')}"
+            if error:
+                await websocket.send_text(dumps({'type': 'error', 'detail': error}))
+            elif message['action'] == 'subscribe':
+                hub.subscribe(subscriber, message['table'], tenant_id)
+            else:
+                hub.unsubscribe(subscriber, message['table'], tenant_id)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pump.cancel()
+        hub.remove(subscriber)
+
+
+def parse_tables(tables: str) -> List[str]:
+    return [table for table in tables.split(',') if table in WATCHED_TABLES]
+
+
+def sse_event(message: Message) -> str:
+    event_id, data = message
+    if not event_id:
+        return f"event: resync\ndata: {data}\n\n"
+    return f"event: batch\nid: {event_id}\ndata: {data}\n\n"
+
+
+async def catch_up(db, tenant_id: str, tables: List[str], event_id: str, seen: Set[str]) -> AsyncIterator[Message]:
+    """Batches of the changes after ``event_id``, read from a resumed change stream"""
+    pipeline = [{'$match': {
+        'ns.coll': {'$in': tables},
+        'operationType': {'$in': list(OPERATION_EVENT_TYPES)},
+        'fullDocument.tenant_id': tenant_id,
+    }}]
+    try:
+        async with db.watch(pipeline, full_document='updateLookup', resume_after={'_data': event_id}) as stream:
+            # Insertion order is the order of each table's oldest pending event
+            pending: Dict[str, List[dict]] = defaultdict(list)
+            checkpoint = event_id
+            while True:
+                # try_next returns None once the stream has nothing further buffered
+                change = await stream.try_next()
+                token = stream.resume_token['_data'] if stream.resume_token else None
+                if change is None:
+                    break
+                seen.add(token)
+                table = change['ns']['coll']
+                record = {key: value for key, value in change['fullDocument'].items() if key != '_id'}
+                pending[table].append({
+                    'table': table,
+                    'eventType': OPERATION_EVENT_TYPES[change['operationType']],
+                    'new': record,
+                    'old': None,
+                })
+                if len(pending[table]) >= MAX_BATCH_EVENTS:
+                    for message in _catch_up_batches(checkpoint, token, tenant_id, pending):
+                        yield message
+                    checkpoint = token
+            for message in _catch_up_batches(checkpoint, token, tenant_id, pending):
+                yield message
+    except PyMongoError as e:
+        # Token too old for the oplog or unknown: the client has to refetch
+        logger.info("Cannot resume SSE stream at %s (%s), sending resync", event_id, e)
+        for table in tables:
+            yield resync_message(table)
+
+
+def _catch_up_batches(checkpoint: str, token: Optional[str], tenant_id: str,
+                      pending: Dict[str, List[dict]]) -> List[Message]:
+    """One batch per pending table, oldest first, emptying ``pending``.
+
+    Only the last batch carries ``token``; the others keep the previous
+    checkpoint, so a client that drops mid-group resumes before all of it.
+    """
+    tables = list(pending)
+    messages = [
+        _catch_up_batch(token if index == len(tables) - 1 else checkpoint, table, tenant_id, pending[table])
+        for index, table in enumerate(tables)
+    ]
+    pending.clear()
+    return messages
+
+
+def _catch_up_batch(token: Optional[str], table: str, tenant_id: str, events: List[dict]) -> Message:
+    return token, dumps({
+        'type': 'batch',
+        'id': token,
+        'table': table,
+        'tenant_id': tenant_id,
+        'events': events,
+        'timestamp': datetime.utcnow(),
+    })
+
+
+async def sse_stream(request: Request, db, tenant_id: str, tables: List[str],
+                     last_event_id: Optional[str]) -> AsyncIterator[str]:
+    subscriber = Subscriber()
+    # Subscribe before replaying so nothing published meanwhile is lost
+    for table in tables:
+        hub.subscribe(subscriber, table, tenant_id)
+    seen: Set[str] = set()
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if last_event_id:
+            replay = hub.replay_after(last_event_id, subscriber.channels)
+            if replay is not None:
+                for message in replay:
+                    yield sse_event(message)
+            else:
+                async for message in catch_up(db, tenant_id, tables, last_event_id, seen):
+                    yield sse_event(message)
+
+        while not await request.is_disconnected():
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message[0] in seen:
+                continue  # already delivered by the catch-up stream
+            yield sse_event(message)
+    finally:
+        hub.remove(subscriber)
+
+
+@router.get("/sse")
+async def realtime_events(
+    request: Request,
+    tables: str = Query(','.join(WATCHED_TABLES)),
+    last_event_id: Optional[str] = Header(None),
+    db=Depends(get_db),
+):
+    """Server-Sent Events fallback for /api/ws with Last-Event-ID resume"""
+    try:
+        tenant_id = await authenticated_tenant(request, db)
+    except AuthError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={'WWW-Authenticate': 'Bearer'})
+    return StreamingResponse(
+        sse_stream(request, db, tenant_id, parse_tables(tables), last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,26 +1,245 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
 from dotenv import load_dotenv
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import BulkWriteError, OperationFailure
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, ValidationError
+from typing import Awaitable, Callable, List, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import billing
+import billing_run
+from compression import CompressionMiddleware, compression_levels_from_env, parse_qvalues
+import kpis
+import pm
+import realtime
+import service_requests
+from metrics import Gauge, metrics_middleware, mongo_command_listener, registry
+from pagination import encode_cursor, keyset_filter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional response format
+    msgpack = None
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened per worker process in the app lifespan
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+def mongo_client_options() -> dict:
+    """Motor pool and transport settings from the environment.
+
+    MONGO_TOTAL_POOL_SIZE is a budget for the whole deployment and is split
+    across WEB_CONCURRENCY uvicorn workers; MONGO_MAX_POOL_SIZE sets the
+    per-worker pool directly.
+    """
+    workers = max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+    if 'MONGO_TOTAL_POOL_SIZE' in os.environ:
+        max_pool_size = max(1, int(os.environ['MONGO_TOTAL_POOL_SIZE']) // workers)
+    else:
+        max_pool_size = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+
+    options = {
+        'maxPoolSize': max_pool_size,
+        'minPoolSize': min(max_pool_size, int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))),
+        'maxIdleTimeMS': int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        'serverSelectionTimeoutMS': int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        'event_listeners': [mongo_command_listener],
+    }
+    compressors = os.environ.get('MONGO_COMPRESSORS')
+    if compressors:
+        options['compressors'] = compressors
+    return options
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db
+    options = mongo_client_options()
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], **options)
+    db = client[os.environ['DB_NAME']]
+    app.state.db = db
+    try:
+        # Warm up so the first request doesn't pay for server selection
+        await client.admin.command('ping')
+        logger.info("Connected to MongoDB (pool %s-%s)", options['minPoolSize'], options['maxPoolSize'])
+        await ensure_indexes()
+        reconcile_task = asyncio.create_task(kpis.reconcile_loop(
+            db, float(os.environ.get('KPI_RECONCILE_INTERVAL', '60'))))
+        realtime.hub.start(db)
+        try:
+            yield
+        finally:
+            reconcile_task.cancel()
+            await realtime.hub.stop()
+    finally:
+        client.close()
+
+# Declared indexes per collection, applied on startup
+INDEX_REGISTRY = {
+    'status_checks': [
+        IndexModel([('timestamp', DESCENDING), ('id', DESCENDING)], name='timestamp_id_desc'),
+        IndexModel([('client_name', ASCENDING), ('timestamp', DESCENDING)], name='client_name_timestamp_desc'),
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+    ],
+    'invoices': [
+        IndexModel([('tenant_id', ASCENDING), ('status', ASCENDING), ('due_date', ASCENDING)],
+                   name='tenant_status_due_date'),
+        IndexModel([('tenant_id', ASCENDING), ('id', ASCENDING)], name='tenant_id_unique', unique=True),
+        IndexModel([('tenant_id', ASCENDING), ('invoice_number', ASCENDING)], name='tenant_invoice_number_unique',
+                   unique=True),
+        IndexModel([('contract_id', ASCENDING), ('period_start', ASCENDING)], name='contract_period_unique',
+                   unique=True, partialFilterExpression={'period_start': {'$exists': True}}),
+    ],
+    'invoice_lines': [
+        IndexModel([('invoice_id', ASCENDING)], name='invoice_id'),
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+    ],
+    'billing_runs': [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+    ],
+    'requests': [
+        IndexModel([('tenant_id', ASCENDING), ('id', ASCENDING)], name='tenant_id_unique', unique=True),
+        IndexModel([('tenant_id', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='requests_tenant_created_id_desc'),
+        IndexModel([('tenant_id', ASCENDING), ('status', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='tenant_status_created_id_desc'),
+    ],
+    'pm_visits': [
+        IndexModel([('tenant_id', ASCENDING), ('status', ASCENDING), ('scheduled_date', ASCENDING)],
+                   name='tenant_status_scheduled_date'),
+        IndexModel([('contract_id', ASCENDING), ('facility_id', ASCENDING), ('scheduled_date', ASCENDING)],
+                   name='contract_facility_scheduled_unique', unique=True),
+    ],
+    'profiles': [
+        IndexModel([('user_id', ASCENDING)], name='user_id'),
+    ],
+    'facilities': [
+        IndexModel([('tenant_id', ASCENDING), ('id', ASCENDING)], name='tenant_id_unique', unique=True),
+    ],
+    'contracts': [
+        IndexModel([('tenant_id', ASCENDING), ('id', ASCENDING)], name='tenant_id_unique', unique=True),
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+    ],
+    'invoice_counters': [
+        IndexModel([('tenant_id', ASCENDING), ('period', ASCENDING)], name='tenant_period_unique', unique=True),
+    ],
+    'kpi_snapshots': [
+        IndexModel([('tenant_id', ASCENDING)], name='tenant_id_unique', unique=True),
+    ],
+}
+
+class ResponseCache:
+    """LRU response cache with per-entry TTL and single-flight loading.
+
+    All bookkeeping happens between awaits on the event loop, so no lock is
+    needed; concurrent misses for one key share a single in-flight load.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, key: tuple, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        # The load runs as its own task that every caller shields, so a
+        # caller that is cancelled (its client went away) does not cancel
+        # the load for the others
+        load = asyncio.ensure_future(self._load(key, loader, self._generation))
+        load.add_done_callback(lambda task: task.cancelled() or task.exception())  # nobody may be left to await it
+        self._inflight[key] = load
+        return await asyncio.shield(load)
+
+    async def _load(self, key: tuple, loader: Callable[[], Awaitable[bytes]], generation: int) -> bytes:
+        try:
+            value = await loader()
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        # A write landed while loading; the value may already be stale
+        if generation == self._generation:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: tuple, value: bytes):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+status_cache = ResponseCache(
+    max_entries=int(os.environ.get('STATUS_CACHE_SIZE', '256')),
+    ttl_seconds=float(os.environ.get('STATUS_CACHE_TTL', '5')),
+)
+
+status_cache_metrics = registry.register(Gauge(
+    'status_cache', 'Status response cache counters', ('stat',)))
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -35,6 +254,111 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class StatusCheckSparse(BaseModel):
+    """StatusCheck with every field optional, for projected reads"""
+    id: Optional[str] = None
+    client_name: Optional[str] = None
+    timestamp: Optional[datetime] = None
+
+class StatusCheckPage(BaseModel):
+    items: List[StatusCheckSparse]
+    next_cursor: Optional[str] = None
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkStatusResult(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+def dump_json(obj) -> bytes:
+    """Serialize trusted Mongo documents straight to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(
+        obj, default=lambda value: value.isoformat(), separators=(',', ':')
+    ).encode()
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+def dump_msgpack(obj) -> bytes:
+    """Serialize to MessagePack, with datetimes as ISO strings like the JSON"""
+    return msgpack.packb(obj, default=lambda value: value.isoformat())
+
+def response_media_type(request: Request) -> str:
+    """MessagePack when the client asks for it at least as strongly as JSON
+    and msgpack is installed; only an explicit application/msgpack counts,
+    and the most specific range decides JSON's q-value"""
+    if msgpack is None:
+        return 'application/json'
+    accepted = parse_qvalues(request.headers.get('accept', ''))
+    msgpack_q = accepted.get(MSGPACK_MEDIA_TYPE, 0.0)
+    json_q = accepted.get('application/json', accepted.get('application/*', accepted.get('*/*', 0.0)))
+    if msgpack_q > 0 and msgpack_q >= json_q:
+        return MSGPACK_MEDIA_TYPE
+    return 'application/json'
+
+def dump_body(obj, media_type: str) -> bytes:
+    return dump_msgpack(obj) if media_type == MSGPACK_MEDIA_TYPE else dump_json(obj)
+
+
+# Keyset pagination over (timestamp DESC, id DESC), mirroring the
+# (tenant_id, created_at DESC, id DESC) cursors used on the Supabase side.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 500
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_ITEMS = 50000
+
+# Sort keys always travel with the row so the next cursor can be built
+KEYSET_FIELDS = ('timestamp', 'id')
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a comma separated fields= selector against StatusCheck"""
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in StatusCheck.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+def status_projection(selected: Optional[List[str]]) -> dict:
+    """Mongo projection that never returns _id and only the requested fields"""
+    if selected is None:
+        return {'_id': 0}
+    projection = {field: 1 for field in (*selected, *KEYSET_FIELDS)}
+    projection['_id'] = 0
+    return projection
+
+def status_filter(
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    """Translate query parameters into a Mongo filter"""
+    query = {}
+    if client_name is not None:
+        query['client_name'] = client_name
+    if since is not None or until is not None:
+        query['timestamp'] = {}
+        if since is not None:
+            query['timestamp']['$gte'] = since
+        if until is not None:
+            query['timestamp']['$lt'] = until
+    return query
+
+# Summary bucket sizes: $dateTrunc unit and default look-back window
+SUMMARY_BUCKETS = {
+    '1m': ('minute', timedelta(hours=1)),
+    '1h': ('hour', timedelta(days=7)),
+    '1d': ('day', timedelta(days=90)),
+}
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -45,15 +369,220 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
     _ = await db.status_checks.insert_one(status_obj.dict())
+    status_cache.invalidate()
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+@api_router.get("/status", response_model=StatusCheckPage, response_model_exclude_unset=True)
+async def get_status_checks(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields)
+    query = status_filter(client_name, since, until)
+    after_query = keyset_filter(after, 'timestamp')
+    if after_query:
+        query = {'$and': [query, after_query]} if query else after_query
+
+    media_type = response_media_type(request)
+    key = ('status', media_type, limit, after, client_name, since, until,
+           tuple(sorted(set(selected))) if selected is not None else None)
+
+    async def load() -> bytes:
+        # Fetch one extra row to know whether another page exists
+        cursor = db.status_checks.find(query, status_projection(selected)).sort(
+            [('timestamp', -1), ('id', -1)]
+        ).limit(limit + 1)
+        status_checks = await cursor.to_list(limit + 1)
+
+        next_cursor = None
+        if len(status_checks) > limit:
+            status_checks = status_checks[:limit]
+            last = status_checks[-1]
+            next_cursor = encode_cursor(last['timestamp'], last['id'])
+
+        if selected is not None:
+            status_checks = [
+                {field: doc[field] for field in selected if field in doc}
+                for doc in status_checks
+            ]
+
+        # Rows were validated on write; skip re-validating them on every read
+        return dump_body({'items': status_checks, 'next_cursor': next_cursor}, media_type)
+
+    content = await status_cache.get_or_load(key, load)
+    return Response(content=content, media_type=media_type, headers={'Vary': 'Accept'})
+
+@api_router.get("/status/summary")
+async def get_status_summary(
+    request: Request,
+    bucket: str = Query('1h', pattern='^(1m|1h|1d)$'),
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    media_type = response_media_type(request)
+    key = ('summary', media_type, bucket, client_name, since, until)
+
+    async def load() -> bytes:
+        unit, default_window = SUMMARY_BUCKETS[bucket]
+        window_start = since
+        if window_start is None:
+            window_start = (until or datetime.utcnow()) - default_window
+
+        pipeline = [
+            {'$match': status_filter(client_name, window_start, until)},
+            {'$group': {
+                '_id': {
+                    'client_name': '$client_name',
+                    'start': {'$dateTrunc': {'date': '$timestamp', 'unit': unit}},
+                },
+                'count': {'$sum': 1},
+                'last_seen': {'$max': '$timestamp'},
+            }},
+            {'$sort': {'_id.start': 1}},
+            {'$group': {
+                '_id': '$_id.client_name',
+                'total': {'$sum': '$count'},
+                'last_seen': {'$max': '$last_seen'},
+                'buckets': {'$push': {'start': '$_id.start', 'count': '$count'}},
+            }},
+            {'$project': {
+                '_id': 0,
+                'client_name': '$_id',
+                'total': 1,
+                'last_seen': 1,
+                'buckets': 1,
+            }},
+            {'$sort': {'client_name': 1}},
+        ]
+        clients = await db.status_checks.aggregate(pipeline).to_list(None)
+
+        return dump_body({
+            'bucket': bucket,
+            'since': window_start,
+            'until': until,
+            'clients': clients,
+        }, media_type)
+
+    content = await status_cache.get_or_load(key, load)
+    return Response(content=content, media_type=media_type, headers={'Vary': 'Accept'})
+
+class MalformedLine:
+    """Stands in for an NDJSON line that is not valid JSON"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+def parse_ndjson_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return MalformedLine(f"Malformed JSON: {e}")
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Parse a bulk payload given either as a JSON array or as NDJSON.
+
+    NDJSON lines are independent, so a bad line becomes a MalformedLine for
+    its item instead of failing the batch; a broken JSON array still does.
+    """
+    if 'ndjson' in content_type:
+        return [parse_ndjson_line(line) for line in body.splitlines() if line.strip()]
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed JSON payload")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    return items
+
+@api_router.post("/status/bulk", response_model=BulkStatusResult)
+async def create_status_checks_bulk(request: Request):
+    items = parse_bulk_body(await request.body(), request.headers.get('content-type', ''))
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+
+    # Validate everything up front; only valid rows are sent to Mongo
+    results = [BulkItemResult(index=index) for index in range(len(items))]
+    pending = []
+    for index, item in enumerate(items):
+        if isinstance(item, MalformedLine):
+            results[index].error = item.error
+            continue
+        try:
+            status_input = StatusCheckCreate.model_validate(item)
+        except ValidationError as e:
+            results[index].error = str(e.errors()[0]['msg'])
+            continue
+        status_obj = StatusCheck(**status_input.dict())
+        results[index].id = status_obj.id
+        pending.append((index, status_obj.dict()))
+
+    try:
+        for start in range(0, len(pending), BULK_CHUNK_SIZE):
+            chunk = pending[start:start + BULK_CHUNK_SIZE]
+            try:
+                await db.status_checks.insert_many([doc for _, doc in chunk], ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details.get('writeErrors', []):
+                    index = chunk[write_error['index']][0]
+                    results[index].id = None
+                    results[index].error = write_error.get('errmsg', 'Write failed')
+    finally:
+        # Earlier chunks may be in even if a later one raised
+        if pending:
+            status_cache.invalidate()
+
+    failed = sum(1 for result in results if result.error)
+    return BulkStatusResult(inserted=len(items) - failed, failed=failed, results=results)
+
+@api_router.get("/status/cache")
+async def get_status_cache_stats():
+    return status_cache.stats()
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    for stat, value in status_cache.stats().items():
+        status_cache_metrics.set(stat, value=value)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+async def iter_status_ndjson(batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield every status check as one JSON line, one cursor batch at a time"""
+    cursor = db.status_checks.find({}, {'_id': 0}).sort(
+        [('timestamp', -1), ('id', -1)]
+    ).batch_size(batch_size)
+    async for doc in cursor:
+        yield dump_json(doc) + b'\n'
+
+@api_router.get("/status/export")
+async def export_status_checks():
+    return StreamingResponse(
+        iter_status_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="status_checks.ndjson"'},
+    )
 
 # Include the router in the main app
 app.include_router(api_router)
+app.include_router(billing.router)
+app.include_router(billing_run.router)
+app.include_router(kpis.router)
+app.include_router(pm.router)
+app.include_router(realtime.router)
+app.include_router(service_requests.router)
+
+app.middleware("http")(metrics_middleware)
+
+# Compress bodies of COMPRESSION_MIN_SIZE bytes and up (0 compresses everything)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024')),
+    levels=compression_levels_from_env(),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -70,6 +599,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+# Index options whose absence changes behaviour, with their server defaults
+INDEX_OPTIONS = {
+    'unique': False,
+    'sparse': False,
+    'partialFilterExpression': None,
+    'expireAfterSeconds': None,
+}
+
+def index_drift(declared: dict, existing: dict) -> List[str]:
+    """How an existing index (from index_information) differs from its declaration"""
+    drift = []
+    key = list(declared['key'].items())
+    if list(existing['key']) != key:
+        drift.append(f"key existing={list(existing['key'])} declared={key}")
+    for option, default in INDEX_OPTIONS.items():
+        have, want = existing.get(option, default), declared.get(option, default)
+        if have != want:
+            drift.append(f"{option} existing={have} declared={want}")
+    return drift
+
+async def ensure_indexes():
+    """Create declared indexes that are missing and log drift against the rest.
+
+    Existing indexes are never rebuilt or dropped here. A declared index whose
+    name, keys or options (unique, sparse, partial filter, TTL) clash with an
+    existing one, or a unique index the current data violates, is logged and
+    skipped so the app still starts.
+    """
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        existing_by_key = {tuple(info['key']): name for name, info in existing.items()}
+        declared = {index.document['name']: index for index in indexes}
+
+        missing = []
+        for name, index in declared.items():
+            key = list(index.document['key'].items())
+            if name in existing:
+                drift = index_drift(index.document, existing[name])
+                if drift:
+                    logger.warning("Index %s.%s differs from declaration: %s",
+                                   collection_name, name, '; '.join(drift))
+            elif tuple(key) in existing_by_key:
+                logger.warning(
+                    "Index %s.%s is declared but its keys already exist as %s",
+                    collection_name, name, existing_by_key[tuple(key)],
+                )
+            else:
+                missing.append(index)
+        for name in existing:
+            if name != '_id_' and name not in declared:
+                logger.warning("Index %s.%s exists but is not declared", collection_name, name)
+
+        for index in missing:
+            name = index.document['name']
+            logger.info("Index %s.%s missing, creating", collection_name, name)
+            try:
+                await collection.create_indexes([index])
+            except OperationFailure as e:
+                if e.code == 11000:
+                    logger.error("Index %s.%s not created, existing documents have duplicate keys: %s",
+                                 collection_name, name, e.details.get('errmsg', e) if e.details else e)
+                else:
+                    logger.error("Index %s.%s not created: %s", collection_name, name, e)
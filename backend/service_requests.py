@@ -0,0 +1,169 @@
+"""
+Tenant service request endpoints
+
+Documents use the same field names as ServiceRequest.toJson() in the app.
+Every write also adjusts the tenant's KPI snapshot. Listing pages with
+keyset cursors over (created_at DESC, id DESC), the order of the
+requests_tenant_created_id_desc index.
+"""
+
+import uuid
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+
+import kpis
+from auth import require_tenant
+from database import get_db
+from pagination import encode_cursor, keyset_filter
+
+
+router = APIRouter(prefix="/api/tenants/{tenant_id}", dependencies=[Depends(require_tenant)])
+
+RequestStatus = Literal['new', 'triaged', 'assigned', 'en_route', 'on_site', 'completed', 'verified']
+RequestPriority = Literal['critical', 'standard']
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+INCLUDES = {'facility'}
+
+
+class ServiceRequest(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str
+    facility_id: str
+    type: Literal['on_demand', 'contract']
+    priority: RequestPriority = 'standard'
+    description: str
+    media_urls: List[str] = Field(default_factory=list)
+    status: RequestStatus = 'new'
+    assigned_engineer_name: Optional[str] = None
+    eta: Optional[datetime] = None
+    sla_due_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ServiceRequestListItem(ServiceRequest):
+    facility: Optional[dict] = None
+
+class ServiceRequestPage(BaseModel):
+    items: List[ServiceRequestListItem]
+    next_cursor: Optional[str] = None
+
+class ServiceRequestCreate(BaseModel):
+    facility_id: str
+    type: Literal['on_demand', 'contract']
+    priority: RequestPriority = 'standard'
+    description: str
+    media_urls: List[str] = Field(default_factory=list)
+    sla_due_at: Optional[datetime] = None
+
+class ServiceRequestUpdate(BaseModel):
+    status: Optional[RequestStatus] = None
+    priority: Optional[RequestPriority] = None
+    description: Optional[str] = None
+    assigned_engineer_name: Optional[str] = None
+    eta: Optional[datetime] = None
+    sla_due_at: Optional[datetime] = None
+
+
+def split_param(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in value.split(',') if part.strip()] if value else []
+
+
+def request_list_pipeline(tenant_id: str, statuses: List[str], priorities: List[str],
+                          facility_ids: List[str], after: Optional[str], limit: int,
+                          include_facility: bool) -> list:
+    query = {'tenant_id': tenant_id}
+    if statuses:
+        query['status'] = {'$in': statuses}
+    if priorities:
+        query['priority'] = {'$in': priorities}
+    if facility_ids:
+        query['facility_id'] = {'$in': facility_ids}
+    query.update(keyset_filter(after, 'created_at'))
+
+    pipeline = [
+        {'$match': query},
+        {'$sort': {'created_at': -1, 'id': -1}},
+        # One extra row tells whether another page exists
+        {'$limit': limit + 1},
+        {'$project': {'_id': 0}},
+    ]
+    if include_facility:
+        # Joined after the limit, so at most one facility lookup per row
+        pipeline += [
+            {'$lookup': {
+                'from': 'facilities',
+                'let': {'facility_id': '$facility_id'},
+                'pipeline': [
+                    # tenant_id stays a plain equality: inside $expr a value
+                    # starting with '$' would be read as a field path
+                    {'$match': {
+                        'tenant_id': tenant_id,
+                        '$expr': {'$eq': ['$id', '$$facility_id']},
+                    }},
+                    {'$project': {'_id': 0}},
+                ],
+                'as': 'facility',
+            }},
+            {'$set': {'facility': {'$first': '$facility'}}},
+        ]
+    return pipeline
+
+
+@router.get("/requests", response_model=ServiceRequestPage)
+async def list_requests(
+    tenant_id: str,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    facility_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    include: Optional[str] = None,
+    db=Depends(get_db),
+):
+    includes = set(split_param(include))
+    if includes - INCLUDES:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(includes - INCLUDES))}")
+
+    pipeline = request_list_pipeline(
+        tenant_id, split_param(status), split_param(priority), split_param(facility_id),
+        after, limit, 'facility' in includes,
+    )
+    rows = await db.requests.aggregate(pipeline).to_list(limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    return ServiceRequestPage(items=rows, next_cursor=next_cursor)
+
+
+@router.post("/requests", response_model=ServiceRequest)
+async def create_request(tenant_id: str, input: ServiceRequestCreate, db=Depends(get_db)):
+    request_obj = ServiceRequest(tenant_id=tenant_id, **input.dict())
+    doc = request_obj.dict()
+    await db.requests.insert_one(doc)
+    await kpis.apply_request_change(db, tenant_id, None, doc)
+    return request_obj
+
+
+@router.patch("/requests/{request_id}", response_model=ServiceRequest)
+async def update_request(tenant_id: str, request_id: str, input: ServiceRequestUpdate, db=Depends(get_db)):
+    changes = input.dict(exclude_unset=True)
+    changes['updated_at'] = datetime.utcnow()
+    old = await db.requests.find_one_and_update(
+        {'tenant_id': tenant_id, 'id': request_id},
+        {'$set': changes},
+        projection={'_id': 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if old is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    new = {**old, **changes}
+    await kpis.apply_request_change(db, tenant_id, old, new)
+    return ServiceRequest(**new)
@@ -16,18 +16,28 @@ Focus: Comprehensive validation of billing system implementation as per MVP requ
 """
 
 import asyncio
+import argparse
 import json
 import sys
-import traceback
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-import re
+
+from harness.catalog import CATALOG_DIR, Catalog, load_catalog
+from harness.executor import catalog_tests
+from harness.incremental import IncrementalCache, code_fingerprint
+from harness.runner import HarnessRunner
+from harness.source_cache import source_cache
+
+CATALOG_PATH = CATALOG_DIR / 'billing.json'
 
 class BillingBackendTester:
     """Comprehensive test suite for Round 7 Billing + PhonePe implementation"""
     
-    def __init__(self):
-        self.test_results = []
+    def __init__(self, jobs: int = 1, pool: str = 'thread', incremental: Optional[IncrementalCache] = None,
+                 catalog: Optional[Catalog] = None):
+        self.catalog = catalog or load_catalog(CATALOG_PATH)
+        self.runner = HarnessRunner(jobs, pool, incremental)
+        self.test_results = self.runner.results
         self.errors = []
         self.warnings = []
         
@@ -40,7 +50,6 @@ class BillingBackendTester:
             'timestamp': datetime.now().isoformat(),
             'details': details or {}
         }
-        self.test_results.append(result)
         
         status_emoji = {
             'PASS': '✅',
@@ -49,106 +58,28 @@ class BillingBackendTester:
             'WARNING': '⚠️'
         }
         
-        print(f"{status_emoji.get(status, '❓')} {test_name}: {message}")
+        text = f"{status_emoji.get(status, '❓')} {test_name}: {message}"
         if details:
-            print(f"   Details: {json.dumps(details, indent=2)}")
+            text += f"\n   Details: {json.dumps(details, indent=2)}"
+        # The runner prints now, or buffers until the test's turn in a parallel run
+        self.runner.record(result, text)
     
     def test_invoice_model_structure(self):
         """Test Invoice domain model structure and business logic"""
         test_name = "Invoice Model Structure & Business Logic"
+        spec = self.catalog.test('test_invoice_model_structure')
         
         try:
-            with open('/app/lib/features/billing/domain/invoice.dart', 'r') as f:
-                content = f.read()
-            
-            # Core model structure checks
-            model_checks = {
-                'class_definition': 'class Invoice extends Equatable',
-                'tenant_isolation': 'final String tenantId',
-                'request_ids': 'final List<String> requestIds',
-                'invoice_number': 'final String invoiceNumber',
-                'status_field': 'final InvoiceStatus status',
-                'customer_info': 'final CustomerInfo customerInfo',
-                'financial_fields': 'final double total',
-                'date_fields': 'final DateTime issueDate',
-                'json_serialization': 'factory Invoice.fromJson',
-                'json_deserialization': 'Map<String, dynamic> toJson()',
-                'copy_with': 'Invoice copyWith(',
-                'equatable_props': 'List<Object?> get props'
-            }
-            
-            # Business logic checks
-            business_logic_checks = {
-                'is_paid_getter': 'bool get isPaid',
-                'is_unpaid_getter': 'bool get isUnpaid',
-                'is_overdue_getter': 'bool get isOverdue',
-                'days_until_due': 'int get daysUntilDue',
-                'overdue_calculation': 'DateTime.now().isAfter(dueDate)'
-            }
-            
-            # Status enumeration checks
-            status_enum_checks = {
-                'status_enum': 'enum InvoiceStatus',
-                'draft_status': 'draft(\'draft\')',
-                'sent_status': 'sent(\'sent\')',
-                'pending_status': 'pending(\'pending\')',
-                'paid_status': 'paid(\'paid\')',
-                'failed_status': 'failed(\'failed\')',
-                'refunded_status': 'refunded(\'refunded\')',
-                'status_transitions': 'List<InvoiceStatus> get validNextStatuses',
-                'can_transition': 'bool canTransitionTo(InvoiceStatus nextStatus)',
-                'display_properties': 'String get displayName',
-                'color_coding': 'String get colorHex'
-            }
-            
-            # Customer info checks
-            customer_checks = {
-                'customer_class': 'class CustomerInfo extends Equatable',
-                'required_fields': 'required this.name',
-                'email_field': 'required this.email',
-                'optional_fields': 'this.phone',
-                'gst_support': 'this.gstNumber'
-            }
-            
-            # Totals calculation checks
-            totals_checks = {
-                'totals_class': 'class InvoiceTotals extends Equatable',
-                'from_line_items': 'factory InvoiceTotals.fromLineItems',
-                'decimal_rounding': 'toStringAsFixed(2)',
-                'subtotal_calculation': 'subtotal += line.lineTotal',
-                'tax_calculation': 'taxAmount += line.taxAmount'
-            }
-            
-            all_checks = {
-                **model_checks,
-                **business_logic_checks, 
-                **status_enum_checks,
-                **customer_checks,
-                **totals_checks
-            }
+            content = source_cache.read(spec.path('invoice'))
             
-            passed_checks = []
-            failed_checks = []
+            all_checks = spec.group('all_checks').patterns
             
-            for check_name, pattern in all_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'all_checks', 'transition_patterns')
+            hits = found['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
-            # Validate status transition logic
-            transition_patterns = [
-                'draft.*sent',
-                'sent.*pending.*paid.*failed',
-                'pending.*paid.*failed',
-                'paid.*refunded',
-                'failed.*pending.*paid'
-            ]
-            
-            transition_logic_found = any(
-                re.search(pattern, content, re.IGNORECASE | re.DOTALL) 
-                for pattern in transition_patterns
-            )
+            transition_logic_found = bool(found['transition_patterns'])
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -166,81 +97,23 @@ class BillingBackendTester:
     def test_invoice_line_model_structure(self):
         """Test InvoiceLine domain model structure and calculations"""
         test_name = "InvoiceLine Model Structure & Tax Calculations"
+        spec = self.catalog.test('test_invoice_line_model_structure')
         
         try:
-            with open('/app/lib/features/billing/domain/invoice_line.dart', 'r') as f:
-                content = f.read()
-            
-            # Core model checks
-            model_checks = {
-                'class_definition': 'class InvoiceLine extends Equatable',
-                'invoice_reference': 'final String invoiceId',
-                'description_field': 'final String description',
-                'quantity_field': 'final double quantity',
-                'unit_price': 'final double unitPrice',
-                'line_total': 'final double lineTotal',
-                'tax_rate': 'final double taxRate',
-                'tax_amount': 'final double taxAmount',
-                'item_type': 'final InvoiceLineType itemType'
-            }
-            
-            # Calculation checks
-            calculation_checks = {
-                'total_with_tax': 'double get totalWithTax',
-                'from_service_data': 'factory InvoiceLine.fromServiceData',
-                'decimal_precision': 'toStringAsFixed(2)',
-                'line_total_calc': 'quantity * unitPrice',
-                'tax_amount_calc': 'lineTotal * taxRate'
-            }
-            
-            # Line item type enum checks
-            type_enum_checks = {
-                'line_type_enum': 'enum InvoiceLineType',
-                'labor_type': 'labor(\'labor\')',
-                'materials_type': 'materials(\'materials\')',
-                'tax_type': 'tax(\'tax\')',
-                'discount_type': 'discount(\'discount\')',
-                'other_type': 'other(\'other\')'
-            }
-            
-            # Template and validation checks
-            template_checks = {
-                'line_template_class': 'class LineItemTemplate',
-                'labor_rates': 'static const Map<String, double> laborRates',
-                'tax_rates': 'static const Map<String, double> taxRates',
-                'material_prices': 'static const Map<String, double> materialPrices',
-                'create_labor_line': 'static InvoiceLine createLaborLine',
-                'create_material_line': 'static InvoiceLine createMaterialLine',
-                'validator_class': 'class LineItemValidator',
-                'validate_line_item': 'static List<String> validateLineItem',
-                'validate_calculations': 'Line total calculation is incorrect'
-            }
-            
-            all_checks = {
-                **model_checks,
-                **calculation_checks,
-                **type_enum_checks,
-                **template_checks
-            }
+            content = source_cache.read(spec.path('invoice_line'))
             
-            passed_checks = []
-            failed_checks = []
+            all_checks = spec.group('all_checks').patterns
             
-            for check_name, pattern in all_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'all_checks', 'tax_calculation_patterns')
+            hits = found['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
             # Check for proper tax calculation logic
-            tax_calculation_patterns = [
-                r'lineTotal \* taxRate',
-                r'quantity \* unitPrice',
-                r'toStringAsFixed\(2\)'
-            ]
+            tax_calculation_patterns = spec.group('tax_calculation_patterns').patterns
             
-            tax_logic_found = all(
-                re.search(pattern, content) for pattern in tax_calculation_patterns
+            tax_logic_found = (
+                len(found['tax_calculation_patterns']) == len(tax_calculation_patterns)
             )
             
             if failed_checks:
@@ -259,96 +132,22 @@ class BillingBackendTester:
     def test_payment_attempt_model_structure(self):
         """Test PaymentAttempt domain model and PhonePe integration"""
         test_name = "PaymentAttempt Model & PhonePe Integration"
+        spec = self.catalog.test('test_payment_attempt_model_structure')
         
         try:
-            with open('/app/lib/features/billing/domain/payment_attempt.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('payment_attempt'))
             
-            # Core model checks
-            model_checks = {
-                'class_definition': 'class PaymentAttempt extends Equatable',
-                'invoice_reference': 'final String invoiceId',
-                'attempt_date': 'final DateTime attemptDate',
-                'amount_field': 'final double amount',
-                'reference_id': 'final String referenceId',
-                'status_field': 'final PaymentAttemptStatus status',
-                'payment_method': 'final PaymentMethod paymentMethod',
-                'error_handling': 'final String? errorMessage',
-                'provider_transaction': 'final String? providerTransactionId'
-            }
+            all_checks = spec.group('all_checks').patterns
             
-            # Status checks
-            status_checks = {
-                'attempt_status_enum': 'enum PaymentAttemptStatus',
-                'initiated_status': 'initiated(\'initiated\')',
-                'pending_status': 'pending(\'pending\')',
-                'success_status': 'success(\'success\')',
-                'failed_status': 'failed(\'failed\')',
-                'cancelled_status': 'cancelled(\'cancelled\')',
-                'timeout_status': 'timeout(\'timeout\')'
-            }
-            
-            # Payment method checks
-            method_checks = {
-                'payment_method_enum': 'enum PaymentMethod',
-                'phonepe_method': 'phonepe(\'phonepe\')',
-                'upi_method': 'upi(\'upi\')',
-                'card_method': 'card(\'card\')',
-                'cash_method': 'cash(\'cash\')',
-                'method_display': 'String get displayName',
-                'method_colors': 'String get colorHex',
-                'auto_status_support': 'bool get supportsAutoStatus'
-            }
-            
-            # PhonePe utility checks
-            phonepe_checks = {
-                'phonepe_utils_class': 'class PhonePeUtils',
-                'generate_deeplink': 'static String generateDeeplink',
-                'generate_upi_intent': 'static String generateUpiIntent',
-                'generate_reference_id': 'static String generateReferenceId',
-                'validate_transaction_id': 'static bool isValidTransactionId',
-                'format_amount': 'static String formatAmount',
-                'parse_amount': 'static double parseAmount',
-                'deeplink_format': 'phonepe://pay?',
-                'upi_intent_format': 'upi://pay?',
-                'amount_in_paise': 'amount * 100',
-                'reference_generation': 'DateTime.now().millisecondsSinceEpoch'
-            }
-            
-            # Factory method checks
-            factory_checks = {
-                'create_phonepe_attempt': 'factory PaymentAttempt.createPhonePeAttempt',
-                'phonepe_method_assignment': 'paymentMethod: PaymentMethod.phonepe',
-                'initiated_status_assignment': 'status: PaymentAttemptStatus.initiated'
-            }
-            
-            all_checks = {
-                **model_checks,
-                **status_checks,
-                **method_checks,
-                **phonepe_checks,
-                **factory_checks
-            }
-            
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in all_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'all_checks', 'phonepe_patterns')
+            hits = found['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
             # Check PhonePe specific patterns
-            phonepe_patterns = [
-                r'PhonePe.*Purple.*#5F2D91',
-                r'phonepe://pay\?.*amount.*trid',
-                r'upi://pay\?.*pa.*am.*tr',
-                r'TXN_.*timestamp.*random'
-            ]
+            phonepe_patterns = spec.group('phonepe_patterns').patterns
             
-            phonepe_integration = sum(1 for pattern in phonepe_patterns 
-                                    if re.search(pattern, content, re.IGNORECASE))
+            phonepe_integration = len(found['phonepe_patterns'])
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -367,109 +166,22 @@ class BillingBackendTester:
     def test_billing_repository_structure(self):
         """Test BillingRepository CRUD operations and data integrity"""
         test_name = "BillingRepository CRUD Operations & Data Integrity"
+        spec = self.catalog.test('test_billing_repository_structure')
         
         try:
-            with open('/app/lib/features/billing/data/billing_repository.dart', 'r') as f:
-                content = f.read()
-            
-            # Repository structure checks
-            structure_checks = {
-                'class_definition': 'class BillingRepository',
-                'singleton_pattern': 'static final BillingRepository _instance',
-                'supabase_client': 'final SupabaseClient _client',
-                'instance_getter': 'static BillingRepository get instance'
-            }
-            
-            # CRUD operation checks
-            crud_checks = {
-                'create_invoice': 'Future<Invoice> createInvoice(Invoice draft, List<InvoiceLine> lines)',
-                'get_invoice': 'Future<Invoice?> getInvoice(String invoiceId)',
-                'get_invoice_lines': 'Future<List<InvoiceLine>> getInvoiceLines(String invoiceId)',
-                'list_invoices': 'Future<PaginatedInvoices> listInvoices',
-                'update_invoice_status': 'Future<Invoice> updateInvoiceStatus',
-                'delete_invoice': 'Future<void> deleteInvoice(String invoiceId)'
-            }
-            
-            # Payment attempt operations
-            payment_checks = {
-                'log_payment_attempt': 'Future<PaymentAttempt> logPaymentAttempt',
-                'get_payment_attempts': 'Future<List<PaymentAttempt>> getPaymentAttempts',
-                'update_payment_status': 'Future<PaymentAttempt> updatePaymentAttemptStatus'
-            }
-            
-            # Transaction integrity checks
-            transaction_checks = {
-                'validation_method': 'List<String> _validateInvoiceCreation',
-                'create_invoice_first': 'final invoiceResponse = await _client',
-                'create_line_items': 'await _client.*from(SupabaseTables.invoiceLines)',
-                'status_transition_validation': 'if (!currentInvoice.status.canTransitionTo(nextStatus))',
-                'draft_deletion_check': 'if (invoice.status != InvoiceStatus.draft)'
-            }
-            
-            # Totals calculation checks
-            calculation_checks = {
-                'compute_totals': 'Future<InvoiceTotals> computeTotals',
-                'totals_from_lines': 'InvoiceTotals.fromLineItems(lines)',
-                'decimal_rounding': 'toStringAsFixed(2)'
-            }
-            
-            # KPI and analytics checks
-            kpi_checks = {
-                'get_billing_kpis': 'Future<BillingKPIs> getBillingKPIs',
-                'unpaid_invoices': 'unpaidResponse.*count',
-                'overdue_invoices': 'overdueResponse.*count',
-                'outstanding_amount': 'outstandingAmount +=',
-                'monthly_revenue': 'monthlyRevenue +='
-            }
-            
-            # Pagination and filtering checks
-            pagination_checks = {
-                'pagination_support': 'int page = 1',
-                'page_size': 'int pageSize = 20',
-                'invoice_filters': 'InvoiceFilters? filters',
-                'apply_filters': 'PostgrestFilterBuilder _applyInvoiceFilters',
-                'tenant_filtering': '.eq(\'tenant_id\', tenantId)',
-                'status_filtering': '.eq(\'status\', status)',
-                'date_range_filtering': '.gte(\'issue_date\'',
-                'search_filtering': '.or(\'invoice_number.ilike'
-            }
-            
-            # Table reference checks
-            table_checks = {
-                'invoices_table': 'SupabaseTables.invoices',
-                'invoice_lines_table': 'SupabaseTables.invoiceLines',
-                'payment_attempts_table': 'SupabaseTables.paymentAttempts'
-            }
-            
-            all_checks = {
-                **structure_checks,
-                **crud_checks,
-                **payment_checks,
-                **transaction_checks,
-                **calculation_checks,
-                **kpi_checks,
-                **pagination_checks,
-                **table_checks
-            }
+            content = source_cache.read(spec.path('billing_repository'))
             
-            passed_checks = []
-            failed_checks = []
+            all_checks = spec.group('all_checks').patterns
             
-            for check_name, pattern in all_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'all_checks', 'error_patterns')
+            hits = found['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
             # Check error handling patterns
-            error_patterns = [
-                r'try\s*{.*}.*catch.*{.*debugPrint.*rethrow',
-                r'debugPrint\(.*❌.*Failed to',
-                r'debugPrint\(.*✅.*created.*updated'
-            ]
+            error_patterns = spec.group('error_patterns').patterns
             
-            error_handling_score = sum(1 for pattern in error_patterns 
-                                     if re.search(pattern, content, re.DOTALL))
+            error_handling_score = len(found['error_patterns'])
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -488,118 +200,22 @@ class BillingBackendTester:
     def test_billing_service_business_logic(self):
         """Test BillingService business logic and admin operations"""
         test_name = "BillingService Business Logic & Admin Operations"
+        spec = self.catalog.test('test_billing_service_business_logic')
         
         try:
-            with open('/app/lib/features/billing/domain/billing_service.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('billing_service'))
             
-            # Service structure checks
-            structure_checks = {
-                'class_definition': 'class BillingService extends ChangeNotifier',
-                'provider_definition': 'final billingServiceProvider = ChangeNotifierProvider',
-                'auth_service_dependency': 'final AuthService _authService',
-                'requests_service_dependency': 'final RequestsService _requestsService',
-                'repository_instance': 'final BillingRepository _repository',
-                'state_management': 'BillingState _state'
-            }
+            all_checks = spec.group('all_checks').patterns
             
-            # Invoice generation checks
-            generation_checks = {
-                'generate_from_requests': 'Future<Invoice> generateFromRequests',
-                'validate_requests': 'Future<List<ServiceRequest>> _validateAndFetchRequests',
-                'completed_requests_only': 'if (!request.status.isClosed)',
-                'extract_customer_info': 'CustomerInfo _extractCustomerInfo',
-                'generate_invoice_number': 'await _repository.generateInvoiceNumber',
-                'generate_line_items': 'List<InvoiceLine> _generateLineItemsFromRequests',
-                'calculate_totals': 'await _repository.computeTotals',
-                'create_with_lines': 'await _repository.createInvoice(invoiceDraft, lineItems)'
-            }
-            
-            # Status transition methods
-            status_checks = {
-                'send_invoice': 'Future<void> sendInvoice(String invoiceId)',
-                'mark_pending': 'Future<void> markPending(String invoiceId)',
-                'mark_paid': 'Future<void> markPaid(String invoiceId)',
-                'mark_failed': 'Future<void> markFailed(String invoiceId)',
-                'mark_refunded': 'Future<void> markRefunded(String invoiceId)',
-                'draft_to_sent': 'nextStatus: InvoiceStatus.sent',
-                'sent_to_pending': 'nextStatus: InvoiceStatus.pending',
-                'pending_to_paid': 'nextStatus: InvoiceStatus.paid'
-            }
-            
-            # PhonePe integration checks
-            phonepe_checks = {
-                'record_phonepe_attempt': 'Future<PaymentAttempt> recordPhonePeAttempt',
-                'phonepe_attempt_creation': 'PaymentAttempt.createPhonePeAttempt',
-                'log_attempt': 'await _repository.logPaymentAttempt(attempt)',
-                'auto_mark_pending': 'if (invoice?.status == InvoiceStatus.sent)',
-                'reference_id_param': 'required String referenceId'
-            }
-            
-            # Admin authorization checks
-            admin_checks = {
-                'is_admin_check': 'bool get _isAdmin',
-                'admin_role_validation': '_authService.userProfile?.role == UserRole.admin',
-                'send_admin_only': 'if (!_isAdmin).*Only admins can send invoices',
-                'paid_admin_only': 'if (!_isAdmin).*Only admins can mark invoices as paid',
-                'refund_admin_only': 'if (!_isAdmin).*Only admins can process refunds',
-                'delete_admin_only': 'if (!_isAdmin).*Only admins can delete invoices'
-            }
-            
-            # Business logic checks
-            business_checks = {
-                'tenant_validation': 'if (_tenantId != tenantId)',
-                'estimate_hours': 'double _estimateHoursFromRequest',
-                'labor_rate_calculation': 'double _getLaborRate',
-                'materials_requirement': 'bool _requestRequiresMaterials',
-                'priority_based_pricing': 'switch (request.priority)',
-                'line_item_templates': 'LineItemTemplate.createLaborLine',
-                'state_updates': '_updateInvoiceInState',
-                'notification_listeners': 'notifyListeners()'
-            }
-            
-            # Data loading and filtering checks
-            data_checks = {
-                'load_invoices': 'Future<void> loadInvoices',
-                'pagination_support': 'int page = 1',
-                'filtering_support': 'InvoiceFilters? filters',
-                'get_invoice_detail': 'Future<InvoiceDetail?> getInvoiceDetail',
-                'get_billing_kpis': 'Future<BillingKPIs> getBillingKPIs',
-                'apply_filters': 'Future<void> applyFilters',
-                'clear_filters': 'Future<void> clearFilters'
-            }
-            
-            all_checks = {
-                **structure_checks,
-                **generation_checks,
-                **status_checks,
-                **phonepe_checks,
-                **admin_checks,
-                **business_checks,
-                **data_checks
-            }
-            
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in all_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'all_checks', 'business_patterns')
+            hits = found['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
             # Check business logic patterns
-            business_patterns = [
-                r'critical.*4\.0.*hours',
-                r'high.*3\.0.*hours',
-                r'medium.*2\.0.*hours',
-                r'critical.*1200\.0.*rate',
-                r'high.*800\.0.*rate',
-                r'RequestPriority\.high.*RequestPriority\.critical.*materials'
-            ]
+            business_patterns = spec.group('business_patterns').patterns
             
-            business_logic_score = sum(1 for pattern in business_patterns 
-                                     if re.search(pattern, content, re.IGNORECASE))
+            business_logic_score = len(found['business_patterns'])
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -618,78 +234,24 @@ class BillingBackendTester:
     def test_supabase_table_integration(self):
         """Test Supabase table references and database schema integration"""
         test_name = "Supabase Table Integration & Database Schema"
+        spec = self.catalog.test('test_supabase_table_integration')
         
         try:
-            with open('/app/lib/core/supabase/client.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('client'))
             
-            # Table constants checks
-            table_checks = {
-                'supabase_tables_class': 'abstract class SupabaseTables',
-                'invoices_table': 'static const String invoices = \'invoices\'',
-                'invoice_lines_table': 'static const String invoiceLines = \'invoice_lines\'',
-                'payment_attempts_table': 'static const String paymentAttempts = \'payment_attempts\'',
-                'tenant_isolation': 'static const String tenants = \'tenants\'',
-                'profiles_table': 'static const String profiles = \'profiles\'',
-                'requests_table': 'static const String requests = \'requests\''
-            }
+            all_checks = spec.group('all_checks').patterns
             
-            # Client configuration checks
-            client_checks = {
-                'supabase_service_class': 'class SupabaseService',
-                'client_singleton': 'static SupabaseClient get client',
-                'auth_client': 'static GoTrueClient get auth',
-                'database_client': 'static PostgrestClient get database',
-                'storage_client': 'static SupabaseStorageClient get storage',
-                'realtime_client': 'static RealtimeClient get realtime'
-            }
-            
-            # Tenant isolation checks
-            isolation_checks = {
-                'tenant_extension': 'extension SupabaseClientExtension',
-                'from_tenant_method': 'PostgrestFilterBuilder<Map<String, dynamic>> fromTenant',
-                'tenant_filtering': '.eq(\'tenant_id\', tenantId)',
-                'tenant_subscription': 'RealtimeChannel createTenantSubscription',
-                'tenant_scoped_path': 'String getStoragePath'
-            }
-            
-            # Storage integration checks
-            storage_checks = {
-                'storage_buckets': 'abstract class SupabaseBuckets',
-                'attachments_bucket': 'static const String attachments = \'attachments\'',
-                'signed_url_method': 'static Future<String> getSignedUrl',
-                'upload_file_method': 'static Future<String> uploadFile'
-            }
-            
-            all_checks = {
-                **table_checks,
-                **client_checks,
-                **isolation_checks,
-                **storage_checks
-            }
-            
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in all_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = spec.scan(content, 'all_checks')['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
             # Check for billing-specific table usage in repository
             try:
-                with open('/app/lib/features/billing/data/billing_repository.dart', 'r') as f:
-                    repo_content = f.read()
+                repo_content = source_cache.read(spec.path('billing_repository'))
                 
-                table_usage_patterns = [
-                    r'SupabaseTables\.invoices',
-                    r'SupabaseTables\.invoiceLines',
-                    r'SupabaseTables\.paymentAttempts'
-                ]
+                table_usage_patterns = spec.group('table_usage_patterns').patterns
                 
-                table_usage_score = sum(1 for pattern in table_usage_patterns 
-                                      if re.search(pattern, repo_content))
+                table_usage_score = len(spec.scan(repo_content, 'table_usage_patterns')['table_usage_patterns'])
                 
             except:
                 table_usage_score = 0
@@ -711,73 +273,36 @@ class BillingBackendTester:
     def test_kpi_integration(self):
         """Test KPI integration with billing metrics"""
         test_name = "KPI Integration & Billing Metrics"
+        spec = self.catalog.test('test_kpi_integration')
         
         try:
             # Check BillingKPIs class in repository
-            with open('/app/lib/features/billing/data/billing_repository.dart', 'r') as f:
-                repo_content = f.read()
-            
-            kpi_checks = {
-                'billing_kpis_class': 'class BillingKPIs',
-                'unpaid_invoices_field': 'final int unpaidInvoices',
-                'overdue_invoices_field': 'final int overdueInvoices',
-                'outstanding_amount_field': 'final double outstandingAmount',
-                'monthly_revenue_field': 'final double monthlyRevenue',
-                'get_billing_kpis_method': 'Future<BillingKPIs> getBillingKPIs',
-                'unpaid_count_query': 'unpaidResponse.*count',
-                'overdue_count_query': 'overdueResponse.*count',
-                'outstanding_calculation': 'outstandingAmount +=',
-                'revenue_calculation': 'monthlyRevenue +='
-            }
-            
-            # Check KPI queries
-            query_checks = {
-                'unpaid_status_filter': '.inFilter(\'status\', [\'sent\', \'pending\'])',
-                'overdue_date_filter': '.lt(\'due_date\', now.toIso8601String())',
-                'paid_status_filter': '.eq(\'status\', \'paid\')',
-                'monthly_date_range': '.gte(\'updated_at\', monthStart.toIso8601String())',
-                'tenant_isolation_kpis': '.eq(\'tenant_id\', tenantId)'
-            }
+            repo_content = source_cache.read(spec.path('billing_repository'))
             
-            all_checks = {**kpi_checks, **query_checks}
+            all_checks = spec.group('all_checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in all_checks.items():
-                if pattern in repo_content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = spec.scan(repo_content, 'all_checks')['all_checks']
+            passed_checks = [name for name in all_checks if name in hits]
+            failed_checks = [name for name in all_checks if name not in hits]
             
             # Check if KPIs are used in service layer
             try:
-                with open('/app/lib/features/billing/domain/billing_service.dart', 'r') as f:
-                    service_content = f.read()
+                service_content = source_cache.read(spec.path('billing_service'))
                 
-                service_kpi_usage = [
-                    'Future<BillingKPIs> getBillingKPIs',
-                    'await _repository.getBillingKPIs'
-                ]
+                service_kpi_usage = spec.group('service_kpi_usage').patterns
                 
-                service_integration = all(pattern in service_content for pattern in service_kpi_usage)
+                service_integration = len(spec.scan(service_content, 'service_kpi_usage')['service_kpi_usage']) == len(service_kpi_usage)
                 
             except:
                 service_integration = False
             
             # Check for potential RequestKPIs integration
             try:
-                with open('/app/lib/features/home/kpi_service.dart', 'r') as f:
-                    kpi_service_content = f.read()
+                kpi_service_content = source_cache.read(spec.path('kpi_service'))
                 
-                request_kpi_patterns = [
-                    'unpaidInvoices',
-                    'outstandingAmount',
-                    'billing'
-                ]
+                request_kpi_patterns = spec.group('request_kpi_patterns').patterns
                 
-                request_kpi_integration = sum(1 for pattern in request_kpi_patterns 
-                                            if pattern in kpi_service_content)
+                request_kpi_integration = len(spec.scan(kpi_service_content, 'request_kpi_patterns')['request_kpi_patterns'])
                 
             except:
                 request_kpi_integration = 0
@@ -801,43 +326,20 @@ class BillingBackendTester:
     def test_error_handling_validation(self):
         """Test error handling and validation patterns"""
         test_name = "Error Handling & Validation Patterns"
+        spec = self.catalog.test('test_error_handling_validation')
         
         try:
-            files_to_check = [
-                '/app/lib/features/billing/data/billing_repository.dart',
-                '/app/lib/features/billing/domain/billing_service.dart',
-                '/app/lib/features/billing/domain/invoice_line.dart'
-            ]
-            
-            error_patterns = {
-                'try_catch_blocks': r'try\s*{.*}.*catch.*{',
-                'debug_logging': r'debugPrint\(.*❌.*Failed to',
-                'success_logging': r'debugPrint\(.*✅.*',
-                'rethrow_pattern': r'rethrow;',
-                'validation_errors': r'List<String>.*errors',
-                'exception_throwing': r'throw Exception\(',
-                'error_state_management': r'error:.*toString\(\)'
-            }
+            files_to_check = spec.path('files_to_check')
             
-            validation_patterns = {
-                'invoice_validation': r'_validateInvoiceCreation',
-                'line_item_validation': r'LineItemValidator\.validateLineItem',
-                'status_transition_validation': r'canTransitionTo\(nextStatus\)',
-                'tenant_validation': r'if \(_tenantId != tenantId\)',
-                'admin_validation': r'if \(!_isAdmin\)',
-                'required_field_validation': r'\.isEmpty.*required',
-                'calculation_validation': r'abs\(\) > 0\.01',
-                'date_validation': r'issueDate\.isAfter\(dueDate\)'
-            }
+            error_patterns = spec.group('error_patterns').patterns
             
-            all_patterns = {**error_patterns, **validation_patterns}
+            all_patterns = spec.group('all_patterns').patterns
             
             file_results = {}
             
             for file_path in files_to_check:
                 try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
+                    content = source_cache.read(file_path)
                     
                     file_name = file_path.split('/')[-1]
                     file_results[file_name] = {
@@ -846,8 +348,9 @@ class BillingBackendTester:
                         'total_patterns': 0
                     }
                     
-                    for pattern_name, pattern in all_patterns.items():
-                        if re.search(pattern, content, re.DOTALL | re.IGNORECASE):
+                    hits = spec.scan(content, 'all_patterns')['all_patterns']
+                    for pattern_name in all_patterns:
+                        if pattern_name in hits:
                             file_results[file_name]['total_patterns'] += 1
                             if pattern_name in error_patterns:
                                 file_results[file_name]['error_handling'] += 1
@@ -886,38 +389,22 @@ class BillingBackendTester:
     def test_tenant_isolation_security(self):
         """Test multi-tenant isolation and security patterns"""
         test_name = "Multi-Tenant Isolation & Security"
+        spec = self.catalog.test('test_tenant_isolation_security')
         
         try:
-            files_to_check = [
-                '/app/lib/features/billing/data/billing_repository.dart',
-                '/app/lib/features/billing/domain/billing_service.dart'
-            ]
+            files_to_check = spec.path('files_to_check')
             
-            isolation_patterns = {
-                'tenant_id_field': r'tenantId',
-                'tenant_filtering': r'\.eq\(\'tenant_id\', tenantId\)',
-                'tenant_validation': r'if \(_tenantId != tenantId\)',
-                'tenant_context_check': r'if \(tenantId == null\)',
-                'unauthorized_exception': r'Unauthorized.*Cannot access tenant data',
-                'tenant_scoped_queries': r'tenantId.*required String tenantId'
-            }
+            isolation_patterns = spec.group('isolation_patterns').patterns
             
-            security_patterns = {
-                'admin_authorization': r'if \(!_isAdmin\)',
-                'role_based_access': r'UserRole\.admin',
-                'admin_only_operations': r'Only admins can',
-                'auth_service_integration': r'_authService\.userProfile',
-                'tenant_context_validation': r'No tenant context'
-            }
+            security_patterns = spec.group('security_patterns').patterns
             
-            all_patterns = {**isolation_patterns, **security_patterns}
+            all_patterns = spec.group('all_patterns').patterns
             
             file_results = {}
             
             for file_path in files_to_check:
                 try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
+                    content = source_cache.read(file_path)
                     
                     file_name = file_path.split('/')[-1]
                     file_results[file_name] = {
@@ -926,8 +413,9 @@ class BillingBackendTester:
                         'found_patterns': []
                     }
                     
-                    for pattern_name, pattern in all_patterns.items():
-                        if re.search(pattern, content, re.IGNORECASE):
+                    hits = spec.scan(content, 'all_patterns')['all_patterns']
+                    for pattern_name in all_patterns:
+                        if pattern_name in hits:
                             file_results[file_name]['found_patterns'].append(pattern_name)
                             if pattern_name in isolation_patterns:
                                 file_results[file_name]['isolation_patterns'] += 1
@@ -938,16 +426,10 @@ class BillingBackendTester:
                     file_results[file_path.split('/')[-1]] = {'error': str(e)}
             
             # Check specific admin-only operations
-            admin_operations = [
-                'sendInvoice',
-                'markPaid',
-                'markRefunded',
-                'deleteDraftInvoice'
-            ]
+            admin_operations = spec.group('admin_operations').patterns
             
             try:
-                with open('/app/lib/features/billing/domain/billing_service.dart', 'r') as f:
-                    service_content = f.read()
+                service_content = source_cache.read(spec.path('billing_service'))
                 
                 admin_protected_ops = sum(1 for op in admin_operations 
                                         if f'{op}' in service_content and 'if (!_isAdmin)' in service_content)
@@ -988,31 +470,24 @@ class BillingBackendTester:
     def test_presentation_layer_integration(self):
         """Test presentation layer components and UI integration"""
         test_name = "Presentation Layer & UI Integration"
+        spec = self.catalog.test('test_presentation_layer_integration')
         
         try:
-            presentation_files = [
-                '/app/lib/features/billing/presentation/invoice_list_page.dart',
-                '/app/lib/features/billing/presentation/invoice_detail_page.dart',
-                '/app/lib/features/billing/presentation/collect_payment_sheet.dart'
-            ]
+            presentation_files = spec.path('presentation_files')
             
-            ui_patterns = {
-                'invoice_list_page': 'class InvoiceListPage',
-                'invoice_detail_page': 'class InvoiceDetailPage',
-                'collect_payment_sheet': 'class CollectPaymentSheet',
-                'phonepe_button': '_buildPhonePeButton',
-                'payment_launcher': 'PhonePe.*launcher',
-                'manual_status_update': 'manual.*status.*update'
-            }
+            ui_patterns = spec.group('ui_patterns').patterns
+            
+            # PhonePe specific UI patterns are checked in the same pass
+            phonepe_ui_patterns = spec.group('phonepe_ui_patterns').patterns
             
             found_files = []
             missing_files = []
             ui_components = {}
+            phonepe_ui_found = 0
             
             for file_path in presentation_files:
                 try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
+                    content = source_cache.read(file_path)
                     
                     found_files.append(file_path.split('/')[-1])
                     
@@ -1021,38 +496,20 @@ class BillingBackendTester:
                         'found_patterns': []
                     }
                     
-                    for pattern_name, pattern in ui_patterns.items():
-                        if re.search(pattern, content, re.IGNORECASE):
+                    found = spec.scan(content, 'ui_patterns', 'phonepe_ui_patterns')
+                    hits = found['ui_patterns']
+                    for pattern_name in ui_patterns:
+                        if pattern_name in hits:
                             ui_components[file_name]['found_patterns'].append(pattern_name)
+                    
+                    if found['phonepe_ui_patterns']:
+                        phonepe_ui_found += 1
                 
                 except FileNotFoundError:
                     missing_files.append(file_path.split('/')[-1])
                 except Exception as e:
                     ui_components[file_path.split('/')[-1]] = {'error': str(e)}
             
-            # Check for PhonePe specific UI patterns
-            phonepe_ui_patterns = [
-                'PhonePe.*payment.*button',
-                'phonepe.*deeplink',
-                'payment.*launcher',
-                'manual.*status',
-                'collect.*payment'
-            ]
-            
-            phonepe_ui_found = 0
-            for file_path in presentation_files:
-                try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
-                    
-                    for pattern in phonepe_ui_patterns:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            phonepe_ui_found += 1
-                            break
-                
-                except:
-                    continue
-            
             implementation_score = len(found_files) / len(presentation_files) * 100
             
             if missing_files or implementation_score < 100:
@@ -1090,17 +547,13 @@ class BillingBackendTester:
             self.test_tenant_isolation_security,
             self.test_presentation_layer_integration
         ]
+        # Catalog entries without a method above run from their declared scoring
+        test_methods += catalog_tests(self.catalog, test_methods, self.log_result)
         
-        for test_method in test_methods:
-            try:
-                test_method()
-            except Exception as e:
-                self.log_result(test_method.__name__, 'FAIL', 
-                    f'Test execution failed: {str(e)}')
-                traceback.print_exc()
+        self.runner.run(test_methods, self.log_result)
         
         # Print summary
-        self.print_summary()
+        return self.print_summary()
     
     def print_summary(self):
         """Print comprehensive test summary"""
@@ -1118,6 +571,8 @@ class BillingBackendTester:
         print(f"⚠️  WARNINGS: {warnings}")
         print(f"⏭️  SKIPPED: {skipped}")
         print(f"📊 TOTAL: {len(self.test_results)}")
+        cache_stats = self.runner.source_stats()
+        print(f"📂 SOURCE FILES: {cache_stats['files']} read, {cache_stats['hits']} cache hits")
         
         if failed > 0:
             print("\n❌ FAILED TESTS:")
@@ -1131,6 +586,10 @@ class BillingBackendTester:
                 if result['status'] == 'WARNING':
                     print(f"  • {result['test']}: {result['message']}")
         
+        print("\n⏱️  TIMING:")
+        for line in self.runner.timing_report():
+            print(line)
+        
         print("\n" + "=" * 80)
         print("🔍 KEY FINDINGS:")
         print("• Domain Models: Invoice, InvoiceLine, PaymentAttempt with business logic")
@@ -1148,11 +607,34 @@ class BillingBackendTester:
 
 def main():
     """Main test execution"""
-    tester = BillingBackendTester()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='run test methods on a pool of N workers')
+    parser.add_argument('--pool', choices=('thread', 'process'), default='thread',
+                        help='worker type used when --jobs is above 1')
+    parser.add_argument('--incremental', action='store_true',
+                        help='replay cached results for tests whose Dart files are unchanged')
+    parser.add_argument('--cache-file', default='.harness_cache/backend_test.json',
+                        help='where --incremental keeps results between runs')
+    parser.add_argument('--catalog', default=str(CATALOG_PATH),
+                        help='check catalog (JSON, or YAML with PyYAML installed)')
+    parser.add_argument('--lib-root',
+                        help='Flutter lib/ directory to check instead of the catalog root')
+    parser.add_argument('--no-pickle', action='store_true',
+                        help='compile the catalog from source instead of reusing its pickled build')
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog, root=args.lib_root, pickled=not args.no_pickle)
+    incremental = None
+    if args.incremental:
+        # Results also depend on where the sources live and what the catalog checks
+        fingerprint = code_fingerprint(__file__, args.catalog, salt=catalog.root)
+        incremental = IncrementalCache(args.cache_file, fingerprint)
+    tester = BillingBackendTester(jobs=args.jobs, pool=args.pool, incremental=incremental, catalog=catalog)
     success = tester.run_all_tests()
     
     # Exit with appropriate code
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -13,17 +13,28 @@ This test suite validates the Flutter realtime implementation for:
 Focus: Realtime event processing logic, notification priorities, tenant isolation, debouncing patterns
 """
 
+import argparse
 import json
 import sys
-import traceback
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+from harness.catalog import CATALOG_DIR, Catalog, load_catalog
+from harness.executor import catalog_tests
+from harness.incremental import IncrementalCache, code_fingerprint
+from harness.runner import HarnessRunner
+from harness.source_cache import source_cache
+
+CATALOG_PATH = CATALOG_DIR / 'realtime.json'
+
 class FlutterRealtimeBackendTester:
     """Test suite for Flutter realtime implementation"""
     
-    def __init__(self):
-        self.test_results = []
+    def __init__(self, jobs: int = 1, pool: str = 'thread', incremental: Optional[IncrementalCache] = None,
+                 catalog: Optional[Catalog] = None):
+        self.catalog = catalog or load_catalog(CATALOG_PATH)
+        self.runner = HarnessRunner(jobs, pool, incremental)
+        self.test_results = self.runner.results
         self.errors = []
         self.warnings = []
         
@@ -36,7 +47,6 @@ class FlutterRealtimeBackendTester:
             'timestamp': datetime.now().isoformat(),
             'details': details or {}
         }
-        self.test_results.append(result)
         
         status_emoji = {
             'PASS': '✅',
@@ -45,50 +55,26 @@ class FlutterRealtimeBackendTester:
             'WARNING': '⚠️'
         }
         
-        print(f"{status_emoji.get(status, '❓')} {test_name}: {message}")
+        text = f"{status_emoji.get(status, '❓')} {test_name}: {message}"
         if details:
-            print(f"   Details: {json.dumps(details, indent=2)}")
+            text += f"\n   Details: {json.dumps(details, indent=2)}"
+        # The runner prints now, or buffers until the test's turn in a parallel run
+        self.runner.record(result, text)
     
     def test_realtime_client_structure(self):
         """Test RealtimeClient structure and core functionality"""
         test_name = "RealtimeClient Structure & Core Functionality"
+        spec = self.catalog.test('test_realtime_client_structure')
         
         try:
-            with open('/app/lib/core/realtime/realtime_client.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('realtime_client'))
             
             # Check core realtime client patterns
-            checks = {
-                'provider_definition': 'final realtimeClientProvider = Provider<RealtimeClient>',
-                'connection_states': 'enum RealtimeConnectionState',
-                'connection_states_values': 'connecting,\n  connected,\n  disconnected,\n  reconnecting',
-                'realtime_event_class': 'class RealtimeEvent',
-                'event_batch_class': 'class EventBatch',
-                'supabase_client': 'final SupabaseClient _client = SupabaseService.client',
-                'tenant_filtering': 'String? get _tenantId => _authService.tenantId',
-                'debounce_delay': 'static const Duration _debounceDelay = Duration(milliseconds: 300)',
-                'subscribe_to_table': 'Stream<EventBatch> subscribeToTable',
-                'channel_management': 'final Map<String, RealtimeChannel> _channels',
-                'event_controllers': 'final Map<String, StreamController<EventBatch>> _eventControllers',
-                'debounce_timers': 'final Map<String, Timer?> _debounceTimers',
-                'pending_events': 'final Map<String, List<RealtimeEvent>> _pendingEvents',
-                'tenant_scoped_channels': 'final channelKey = \'${table}_$tenantId\'',
-                'tenant_filters': 'final tenantFilters = {\n        \'tenant_id\': \'eq.$tenantId\'',
-                'event_filtering': "if (!['INSERT', 'UPDATE'].contains(eventType))",
-                'cross_tenant_validation': 'if (recordTenantId != currentTenantId)',
-                'reconnection_logic': 'void _scheduleReconnect()',
-                'max_reconnect_attempts': 'static const int _maxReconnectAttempts = 5',
-                'exponential_backoff': 'final delay = _reconnectDelay * _reconnectAttempts'
-            }
-            
-            passed_checks = []
-            failed_checks = []
+            checks = spec.group('checks').patterns
             
-            for check_name, pattern in checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = spec.scan(content, 'checks')['checks']
+            passed_checks = [name for name in checks if name in hits]
+            failed_checks = [name for name in checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -105,61 +91,25 @@ class FlutterRealtimeBackendTester:
     def test_snackbar_notifier_structure(self):
         """Test SnackbarNotifier structure and priority styling"""
         test_name = "SnackbarNotifier Structure & Priority Styling"
+        spec = self.catalog.test('test_snackbar_notifier_structure')
         
         try:
-            with open('/app/lib/core/ui/snackbar_notifier.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('snackbar_notifier'))
             
             # Check snackbar notifier patterns
-            checks = {
-                'priority_enum': 'enum SnackbarPriority',
-                'priority_values': 'info,\n  warning,\n  critical,\n  success',
-                'notification_class': 'class SnackbarNotification',
-                'provider_definition': 'final snackbarNotifierProvider = ChangeNotifierProvider<SnackbarNotifier>',
-                'context_management': 'BuildContext? _context',
-                'set_context_method': 'void setContext(BuildContext context)',
-                'show_method': 'void show(SnackbarNotification notification)',
-                'priority_colors': 'Color _getPriorityColor(SnackbarPriority priority)',
-                'priority_icons': 'IconData _getPriorityIcon(SnackbarPriority priority)',
-                'default_durations': 'Duration _getDefaultDuration(SnackbarPriority priority)',
-                'critical_duration': 'return const Duration(seconds: 6)',
-                'warning_duration': 'return const Duration(seconds: 4)',
-                'success_duration': 'return const Duration(seconds: 3)',
-                'info_duration': 'return const Duration(seconds: 3)',
-                'critical_color': 'return Colors.red',
-                'warning_color': 'return Colors.orange',
-                'success_color': 'return Colors.green',
-                'info_color': 'return Colors.blue',
-                'floating_behavior': 'behavior: SnackBarBehavior.floating',
-                'rounded_corners': 'shape: RoundedRectangleBorder',
-                'action_support': 'action: notification.actionLabel != null'
-            }
+            checks = spec.group('checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'checks', 'duration_checks')
+            hits = found['checks']
+            passed_checks = [name for name in checks if name in hits]
+            failed_checks = [name for name in checks if name not in hits]
             
             # Check specific duration requirements
-            duration_checks = {
-                'critical_6s': 'critical:\n        return const Duration(seconds: 6)',
-                'warning_4s': 'warning:\n        return const Duration(seconds: 4)', 
-                'success_3s': 'success:\n        return const Duration(seconds: 3)',
-                'info_3s': 'info:\n        return const Duration(seconds: 3)'
-            }
-            
-            duration_passed = []
-            duration_failed = []
-            
-            for check_name, pattern in duration_checks.items():
-                if pattern in content:
-                    duration_passed.append(check_name)
-                else:
-                    duration_failed.append(check_name)
+            duration_checks = spec.group('duration_checks').patterns
+            
+            hits = found['duration_checks']
+            duration_passed = [name for name in duration_checks if name in hits]
+            duration_failed = [name for name in duration_checks if name not in hits]
             
             if failed_checks or duration_failed:
                 self.log_result(test_name, 'FAIL', 
@@ -181,45 +131,17 @@ class FlutterRealtimeBackendTester:
     def test_connection_indicator_structure(self):
         """Test ConnectionIndicator structure and states"""
         test_name = "ConnectionIndicator Structure & Connection States"
+        spec = self.catalog.test('test_connection_indicator_structure')
         
         try:
-            with open('/app/lib/core/ui/connection_indicator.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('connection_indicator'))
             
             # Check connection indicator patterns
-            checks = {
-                'connection_indicator_class': 'class ConnectionIndicator extends ConsumerWidget',
-                'floating_indicator_class': 'class FloatingConnectionIndicator extends ConsumerWidget',
-                'realtime_client_watch': 'final realtimeClient = ref.watch(realtimeClientProvider)',
-                'connection_state_access': 'final connectionState = realtimeClient.connectionState',
-                'hide_when_connected': 'if (connectionState == RealtimeConnectionState.connected && !showLabel)',
-                'animated_opacity': 'AnimatedOpacity',
-                'opacity_method': 'double _getOpacity(RealtimeConnectionState state)',
-                'background_color_method': 'Color _getBackgroundColor(RealtimeConnectionState state)',
-                'border_color_method': 'Color _getBorderColor(RealtimeConnectionState state)',
-                'icon_color_method': 'Color _getIconColor(RealtimeConnectionState state)',
-                'text_color_method': 'Color _getTextColor(RealtimeConnectionState state)',
-                'icon_method': 'IconData _getIcon(RealtimeConnectionState state)',
-                'status_text_method': 'String _getStatusText(RealtimeConnectionState state)',
-                'loading_indicator': 'CircularProgressIndicator',
-                'retry_button': 'onTap: onRetry',
-                'refresh_icon': 'Icons.refresh',
-                'wifi_icons': 'Icons.wifi',
-                'offline_state': 'return \'Offline\'',
-                'connecting_state': 'return \'Connecting...\'',
-                'reconnecting_state': 'return \'Reconnecting...\'',
-                'live_state': 'return \'Live\'',
-                'positioned_floating': 'Positioned'
-            }
-            
-            passed_checks = []
-            failed_checks = []
+            checks = spec.group('checks').patterns
             
-            for check_name, pattern in checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = spec.scan(content, 'checks')['checks']
+            passed_checks = [name for name in checks if name in hits]
+            failed_checks = [name for name in checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -236,73 +158,25 @@ class FlutterRealtimeBackendTester:
     def test_requests_realtime_manager(self):
         """Test RequestsRealtimeManager structure and priority notifications"""
         test_name = "RequestsRealtimeManager Structure & Priority Notifications"
+        spec = self.catalog.test('test_requests_realtime_manager')
         
         try:
-            with open('/app/lib/features/requests/realtime/requests_realtime.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('requests_realtime'))
             
             # Check requests realtime manager patterns
-            checks = {
-                'provider_definition': 'final requestsRealtimeProvider = Provider<RequestsRealtimeManager>',
-                'realtime_manager_class': 'class RequestsRealtimeManager',
-                'dependencies': 'final RealtimeClient _realtimeClient',
-                'requests_service': 'final RequestsService _requestsService',
-                'snackbar_notifier': 'final SnackbarNotifier _snackbarNotifier',
-                'auth_service': 'final AuthService _authService',
-                'subscription_management': 'StreamSubscription<EventBatch>? _subscription',
-                'processed_event_ids': 'final Set<String> _processedEventIds',
-                'notification_cooldown': 'final Map<String, DateTime> _lastNotificationTimes',
-                'last_known_states': 'final Map<String, ServiceRequest> _lastKnownStates',
-                'cooldown_duration': 'static const Duration _notificationCooldown = Duration(seconds: 10)',
-                'subscribe_method': 'void subscribe()',
-                'unsubscribe_method': 'void unsubscribe()',
-                'handle_event_batch': 'void _handleEventBatch(EventBatch batch)',
-                'process_event': 'EventProcessingResult _processEvent(RealtimeEvent event)',
-                'process_update_event': 'EventProcessingResult _processUpdateEvent',
-                'handle_critical_event': 'void _handleCriticalEvent(RealtimeEvent event)',
-                'notification_cooldown_method': 'void _showNotificationWithCooldown',
-                'table_subscription': '_realtimeClient.subscribeToTable(\n        \'requests\'',
-                'insert_update_events': 'events: [\'INSERT\', \'UPDATE\']',
-                'duplicate_prevention': 'if (_processedEventIds.contains(eventId))',
-                'service_refresh': '_requestsService.refreshRequests()',
-                'memory_cleanup': 'if (_processedEventIds.length > 1000)'
-            }
+            checks = spec.group('checks').patterns
             
             # Check priority notification patterns
-            priority_checks = {
-                'priority_1_onsite': '// Priority 1: Request status → on_site (critical)',
-                'onsite_status_check': 'if (newStatus.toLowerCase() == \'on_site\')',
-                'priority_2_sla_breach': '// Priority 2: SLA breach + ≤15m warning',
-                'sla_breach_notification': 'SLA BREACH: Request #$shortId is overdue!',
-                'sla_warning_notification': 'SLA Warning: Request #$shortId due in ${timeUntilBreach.inMinutes}m',
-                'priority_4_new_critical': '// Priority 4: New critical request created',
-                'critical_request_check': 'if (event.isInsert && request.priority == RequestPriority.critical)',
-                'priority_5_assignee_changed': '// Priority 5: Assignee changed',
-                'assignee_notification': 'You have been assigned to Request #$shortId',
-                'current_user_check': 'if (currentUserName == request.assignedEngineerName)',
-                'critical_priority': 'priority: SnackbarPriority.critical',
-                'warning_priority': 'priority: SnackbarPriority.warning',
-                'info_priority': 'priority: SnackbarPriority.info',
-                'action_route': 'actionRoute: \'/requests/$requestId\'',
-                'notification_durations': '_getNotificationDuration(priority)'
-            }
-            
-            passed_checks = []
-            failed_checks = []
-            priority_passed = []
-            priority_failed = []
+            priority_checks = spec.group('priority_checks').patterns
             
-            for check_name, pattern in checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            found = spec.scan(content, 'checks', 'priority_checks')
+            hits = found['checks']
+            passed_checks = [name for name in checks if name in hits]
+            failed_checks = [name for name in checks if name not in hits]
             
-            for check_name, pattern in priority_checks.items():
-                if pattern in content:
-                    priority_passed.append(check_name)
-                else:
-                    priority_failed.append(check_name)
+            hits = found['priority_checks']
+            priority_passed = [name for name in priority_checks if name in hits]
+            priority_failed = [name for name in priority_checks if name not in hits]
             
             if failed_checks or priority_failed:
                 self.log_result(test_name, 'FAIL', 
@@ -324,69 +198,25 @@ class FlutterRealtimeBackendTester:
     def test_pm_realtime_manager(self):
         """Test PMRealtimeManager structure and completion notifications"""
         test_name = "PMRealtimeManager Structure & Completion Notifications"
+        spec = self.catalog.test('test_pm_realtime_manager')
         
         try:
-            with open('/app/lib/features/pm/realtime/pm_realtime.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('pm_realtime'))
             
             # Check PM realtime manager patterns
-            checks = {
-                'provider_definition': 'final pmRealtimeProvider = Provider<PMRealtimeManager>',
-                'pm_realtime_manager_class': 'class PMRealtimeManager',
-                'dependencies': 'final RealtimeClient _realtimeClient',
-                'pm_service': 'final PMService _pmService',
-                'snackbar_notifier': 'final SnackbarNotifier _snackbarNotifier',
-                'auth_service': 'final AuthService _authService',
-                'subscription_management': 'StreamSubscription<EventBatch>? _subscription',
-                'processed_event_ids': 'final Set<String> _processedEventIds',
-                'notification_cooldown': 'final Map<String, DateTime> _lastNotificationTimes',
-                'last_known_states': 'final Map<String, PMVisit> _lastKnownStates',
-                'cooldown_duration': 'static const Duration _notificationCooldown = Duration(seconds: 10)',
-                'table_name': 'static const String _tableName = \'pm_visits\'',
-                'subscribe_method': 'void subscribe()',
-                'unsubscribe_method': 'void unsubscribe()',
-                'handle_event_batch': 'void _handleEventBatch(EventBatch batch)',
-                'process_event': 'EventProcessingResult _processEvent(RealtimeEvent event)',
-                'process_update_event': 'EventProcessingResult _processUpdateEvent',
-                'handle_critical_event': 'void _handleCriticalEvent(RealtimeEvent event)',
-                'selective_refresh': 'void _refreshPMServiceSelectively(List<RealtimeEvent> events)',
-                'update_state_directly': '_pmService.updateStateDirectly(newState)',
-                'table_subscription': '_realtimeClient.subscribeToTable(\n        _tableName',
-                'insert_update_events': 'events: [\'INSERT\', \'UPDATE\']',
-                'tenant_validation': 'if (tenantId == null)',
-                'completion_status_check': 'if (newStatus.toLowerCase() == \'completed\')',
-                'completion_date_check': 'if (oldCompletedDate != newCompletedDate && newCompletedDate != null)'
-            }
+            checks = spec.group('checks').patterns
             
             # Check PM notification patterns
-            notification_checks = {
-                'priority_3_completion': '// Priority 3: PM visit → completed (success)',
-                'completion_notification': 'PM Visit completed at $facilityName',
-                'overdue_notification': 'PM Visit overdue at $facilityName',
-                'success_priority': 'priority: SnackbarPriority.success',
-                'warning_priority': 'priority: SnackbarPriority.warning',
-                'pm_action_route': 'actionRoute: \'/pm/$pmVisitId\'',
-                'facility_name_fallback': 'final facilityName = record[\'facility_name\'] as String? ?? \'Facility\'',
-                'completion_status_comparison': 'previousVisit.status != PMVisitStatus.completed && \n          pmVisit.status == PMVisitStatus.completed',
-                'overdue_check': 'if (pmVisit.isOverdue && pmVisit.status != PMVisitStatus.completed)'
-            }
+            notification_checks = spec.group('notification_checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            notification_passed = []
-            notification_failed = []
+            found = spec.scan(content, 'checks', 'notification_checks')
+            hits = found['checks']
+            passed_checks = [name for name in checks if name in hits]
+            failed_checks = [name for name in checks if name not in hits]
             
-            for check_name, pattern in checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
-            
-            for check_name, pattern in notification_checks.items():
-                if pattern in content:
-                    notification_passed.append(check_name)
-                else:
-                    notification_failed.append(check_name)
+            hits = found['notification_checks']
+            notification_passed = [name for name in notification_checks if name in hits]
+            notification_failed = [name for name in notification_checks if name not in hits]
             
             if failed_checks or notification_failed:
                 self.log_result(test_name, 'FAIL', 
@@ -408,42 +238,25 @@ class FlutterRealtimeBackendTester:
     def test_realtime_hooks_integration(self):
         """Test realtime hooks and UI integration"""
         test_name = "Realtime Hooks & UI Integration"
+        spec = self.catalog.test('test_realtime_hooks_integration')
         
         try:
             # Check requests realtime hook
-            with open('/app/lib/features/requests/realtime/requests_realtime.dart', 'r') as f:
-                requests_content = f.read()
+            requests_content = source_cache.read(spec.path('requests_realtime'))
             
             # Check PM realtime hook
-            with open('/app/lib/features/pm/realtime/pm_realtime.dart', 'r') as f:
-                pm_content = f.read()
+            pm_content = source_cache.read(spec.path('pm_realtime'))
             
             # Check hook patterns
-            hook_checks = {
-                'requests_hook_class': 'class RequestsRealtimeHook extends ConsumerStatefulWidget',
-                'requests_hook_state': 'class _RequestsRealtimeHookState extends ConsumerState<RequestsRealtimeHook>',
-                'requests_auto_subscribe': 'ref.read(requestsRealtimeProvider).subscribe()',
-                'requests_auto_unsubscribe': 'ref.read(requestsRealtimeProvider).unsubscribe()',
-                'requests_context_setting': 'ref.read(snackbarNotifierProvider).setContext(context)',
-                'requests_post_frame_callback': 'WidgetsBinding.instance.addPostFrameCallback',
-                'pm_hook_class': 'class PMRealtimeHook extends ConsumerStatefulWidget',
-                'pm_hook_state': 'class _PMRealtimeHookState extends ConsumerState<PMRealtimeHook>',
-                'pm_auto_subscribe': 'ref.read(pmRealtimeProvider).subscribe()',
-                'pm_auto_unsubscribe': 'ref.read(pmRealtimeProvider).unsubscribe()',
-                'pm_context_setting': 'ref.read(snackbarNotifierProvider).setContext(context)',
-                'pm_post_frame_callback': 'WidgetsBinding.instance.addPostFrameCallback'
-            }
+            hook_checks = spec.group('hook_checks').patterns
             
+            requests_hits = spec.scan(requests_content, 'hook_checks')['hook_checks']
+            pm_hits = spec.scan(pm_content, 'hook_checks')['hook_checks']
             passed_checks = []
             failed_checks = []
-            
-            for check_name, pattern in hook_checks.items():
-                if 'requests' in check_name:
-                    content = requests_content
-                else:
-                    content = pm_content
-                    
-                if pattern in content:
+            for check_name in hook_checks:
+                hits = requests_hits if 'requests' in check_name else pm_hits
+                if check_name in hits:
                     passed_checks.append(check_name)
                 else:
                     failed_checks.append(check_name)
@@ -463,46 +276,20 @@ class FlutterRealtimeBackendTester:
     def test_event_processing_logic(self):
         """Test event processing and filtering logic"""
         test_name = "Event Processing & Filtering Logic"
+        spec = self.catalog.test('test_event_processing_logic')
         
         try:
-            with open('/app/lib/core/realtime/realtime_client.dart', 'r') as f:
-                realtime_content = f.read()
+            realtime_content = source_cache.read(spec.path('realtime_client'))
             
-            with open('/app/lib/features/requests/realtime/requests_realtime.dart', 'r') as f:
-                requests_content = f.read()
+            requests_content = source_cache.read(spec.path('requests_realtime'))
             
             # Check event processing patterns
-            processing_checks = {
-                'event_type_filtering': "if (!['INSERT', 'UPDATE'].contains(eventType))",
-                'tenant_validation': 'if (recordTenantId != currentTenantId)',
-                'duplicate_prevention': 'if (_processedEventIds.contains(eventId))',
-                'event_id_generation': 'String _generateEventId(RealtimeEvent event)',
-                'memory_cleanup': 'if (_processedEventIds.length > 1000)',
-                'debounce_buffer': 'void _addEventToBuffer(String table, RealtimeEvent event)',
-                'flush_events': 'void _flushEvents(String channelKey, String table)',
-                'batch_processing': 'void _handleEventBatch(EventBatch batch)',
-                'event_coalescing': 'now.difference(lastNotification) < _notificationCooldown',
-                'selective_refresh': 'bool shouldRefreshService = false',
-                'critical_event_detection': 'final criticalEvents = <RealtimeEvent>[]',
-                'status_change_detection': 'if (oldStatus != newStatus && newStatus != null)',
-                'assignee_change_detection': 'if (oldAssignee != newAssignee)',
-                'sla_breach_detection': 'final isOverdue = DateTime.now().isAfter(slaDueAt)',
-                'completion_detection': 'if (newStatus.toLowerCase() == \'completed\')',
-                'insert_detection': 'if (event.isInsert)',
-                'update_detection': 'if (event.isUpdate && oldRecord != null)'
-            }
+            processing_checks = spec.group('processing_checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in processing_checks.items():
-                found_in_realtime = pattern in realtime_content
-                found_in_requests = pattern in requests_content
-                
-                if found_in_realtime or found_in_requests:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = (spec.scan(realtime_content, 'processing_checks')['processing_checks']
+                    | spec.scan(requests_content, 'processing_checks')['processing_checks'])
+            passed_checks = [name for name in processing_checks if name in hits]
+            failed_checks = [name for name in processing_checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -519,37 +306,17 @@ class FlutterRealtimeBackendTester:
     def test_debouncing_and_batching(self):
         """Test debouncing and batching implementation"""
         test_name = "Debouncing & Batching Implementation"
+        spec = self.catalog.test('test_debouncing_and_batching')
         
         try:
-            with open('/app/lib/core/realtime/realtime_client.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('realtime_client'))
             
             # Check debouncing patterns
-            debounce_checks = {
-                'debounce_delay': 'static const Duration _debounceDelay = Duration(milliseconds: 300)',
-                'debounce_timers': 'final Map<String, Timer?> _debounceTimers',
-                'pending_events': 'final Map<String, List<RealtimeEvent>> _pendingEvents',
-                'timer_cancellation': '_debounceTimers[channelKey]?.cancel()',
-                'timer_creation': '_debounceTimers[channelKey] = Timer(_debounceDelay',
-                'event_buffering': '_pendingEvents[channelKey] ??= []',
-                'buffer_addition': '_pendingEvents[channelKey]!.add(event)',
-                'batch_creation': 'final batch = EventBatch',
-                'batch_emission': 'controller.add(batch)',
-                'buffer_clearing': '_pendingEvents[channelKey]?.clear()',
-                'flush_trigger': '_flushEvents(channelKey, table)',
-                'batch_timestamp': 'timestamp: DateTime.now()',
-                'event_copy': 'events: List.from(events)',
-                'controller_check': 'if (controller != null && !controller.isClosed)'
-            }
+            debounce_checks = spec.group('debounce_checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in debounce_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = spec.scan(content, 'debounce_checks')['debounce_checks']
+            passed_checks = [name for name in debounce_checks if name in hits]
+            failed_checks = [name for name in debounce_checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -566,42 +333,20 @@ class FlutterRealtimeBackendTester:
     def test_notification_priorities_and_durations(self):
         """Test notification priorities and durations match specification"""
         test_name = "Notification Priorities & Durations"
+        spec = self.catalog.test('test_notification_priorities_and_durations')
         
         try:
-            with open('/app/lib/features/requests/realtime/requests_realtime.dart', 'r') as f:
-                requests_content = f.read()
+            requests_content = source_cache.read(spec.path('requests_realtime'))
             
-            with open('/app/lib/features/pm/realtime/pm_realtime.dart', 'r') as f:
-                pm_content = f.read()
+            pm_content = source_cache.read(spec.path('pm_realtime'))
             
             # Check priority specifications
-            priority_checks = {
-                'critical_6s_duration': 'return const Duration(seconds: 6); // Red emphasis',
-                'warning_6s_duration': 'return const Duration(seconds: 6); // Amber, auto-dismiss 6s',
-                'success_4s_duration': 'return const Duration(seconds: 4); // Green, auto-dismiss 4s',
-                'info_3s_duration': 'return const Duration(seconds: 3); // Default',
-                'onsite_critical': 'priority: SnackbarPriority.critical,\n          message: \'Engineer on-site for Request',
-                'sla_breach_critical': 'priority: SnackbarPriority.critical,\n          message: \'SLA BREACH: Request',
-                'sla_warning_warning': 'priority: SnackbarPriority.warning,\n          message: \'SLA Warning: Request',
-                'new_critical_critical': 'priority: SnackbarPriority.critical,\n          message: \'New Critical Request',
-                'assignee_info': 'priority: SnackbarPriority.info,\n          message: \'You have been assigned',
-                'pm_completion_success': 'priority: SnackbarPriority.success,\n          message: \'PM Visit completed',
-                'pm_overdue_warning': 'priority: SnackbarPriority.warning,\n          message: \'PM Visit overdue',
-                'notification_cooldown_10s': 'now.difference(lastNotification) < _notificationCooldown',
-                'cooldown_duration': 'static const Duration _notificationCooldown = Duration(seconds: 10)'
-            }
+            priority_checks = spec.group('priority_checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in priority_checks.items():
-                found_in_requests = pattern in requests_content
-                found_in_pm = pattern in pm_content
-                
-                if found_in_requests or found_in_pm:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = (spec.scan(requests_content, 'priority_checks')['priority_checks']
+                    | spec.scan(pm_content, 'priority_checks')['priority_checks'])
+            passed_checks = [name for name in priority_checks if name in hits]
+            failed_checks = [name for name in priority_checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -618,46 +363,23 @@ class FlutterRealtimeBackendTester:
     def test_tenant_isolation_and_security(self):
         """Test tenant isolation and security validation"""
         test_name = "Tenant Isolation & Security Validation"
+        spec = self.catalog.test('test_tenant_isolation_and_security')
         
         try:
-            with open('/app/lib/core/realtime/realtime_client.dart', 'r') as f:
-                realtime_content = f.read()
+            realtime_content = source_cache.read(spec.path('realtime_client'))
             
-            with open('/app/lib/features/requests/realtime/requests_realtime.dart', 'r') as f:
-                requests_content = f.read()
+            requests_content = source_cache.read(spec.path('requests_realtime'))
             
-            with open('/app/lib/features/pm/realtime/pm_realtime.dart', 'r') as f:
-                pm_content = f.read()
+            pm_content = source_cache.read(spec.path('pm_realtime'))
             
             # Check tenant isolation patterns
-            isolation_checks = {
-                'tenant_id_access': 'String? get _tenantId => _authService.tenantId',
-                'tenant_scoped_channels': 'final channelKey = \'${table}_$tenantId\'',
-                'tenant_filters': 'final tenantFilters = {\n        \'tenant_id\': \'eq.$tenantId\'',
-                'cross_tenant_validation': 'if (recordTenantId != currentTenantId)',
-                'cross_tenant_ignore': 'debugPrint(\'⚠️ Ignoring cross-tenant event',
-                'tenant_context_check': 'if (tenantId == null)',
-                'no_tenant_exception': 'throw Exception(\'No tenant context available',
-                'tenant_subscription_refresh': 'refreshing realtime subscriptions for tenant',
-                'tenant_unsubscribe': 'No tenant, unsubscribing from all channels',
-                'auth_change_listener': '_authService.addListener(_onAuthChanged)',
-                'tenant_validation_requests': 'if (tenantId == null) {\n      debugPrint(\'⚠️ [PMRT] No tenant context',
-                'tenant_logging': 'for tenant: $tenantId',
-                'security_filter': 'filter: tenantFilters.entries'
-            }
-            
-            passed_checks = []
-            failed_checks = []
+            isolation_checks = spec.group('isolation_checks').patterns
             
-            for check_name, pattern in isolation_checks.items():
-                found_in_realtime = pattern in realtime_content
-                found_in_requests = pattern in requests_content
-                found_in_pm = pattern in pm_content
-                
-                if found_in_realtime or found_in_requests or found_in_pm:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = set()
+            for content in (realtime_content, requests_content, pm_content):
+                hits |= spec.scan(content, 'isolation_checks')['isolation_checks']
+            passed_checks = [name for name in isolation_checks if name in hits]
+            failed_checks = [name for name in isolation_checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -674,43 +396,17 @@ class FlutterRealtimeBackendTester:
     def test_error_handling_and_reconnection(self):
         """Test error handling and reconnection logic"""
         test_name = "Error Handling & Reconnection Logic"
+        spec = self.catalog.test('test_error_handling_and_reconnection')
         
         try:
-            with open('/app/lib/core/realtime/realtime_client.dart', 'r') as f:
-                content = f.read()
+            content = source_cache.read(spec.path('realtime_client'))
             
             # Check error handling patterns
-            error_checks = {
-                'channel_error_handling': 'channel.onError((error) =>',
-                'channel_close_handling': 'channel.onClose(() =>',
-                'subscription_error_handling': 'onError: (error) =>',
-                'try_catch_blocks': 'try {\n      debugPrint',
-                'error_logging': 'debugPrint(\'❌',
-                'reconnection_scheduling': 'void _scheduleReconnect()',
-                'max_reconnect_attempts': 'static const int _maxReconnectAttempts = 5',
-                'reconnect_attempts_counter': 'int _reconnectAttempts = 0',
-                'exponential_backoff': 'final delay = _reconnectDelay * _reconnectAttempts',
-                'reconnect_timer': 'Timer? _reconnectTimer',
-                'reconnect_delay': 'static const Duration _reconnectDelay = Duration(seconds: 2)',
-                'connection_state_updates': '_updateConnectionState(RealtimeConnectionState.disconnected)',
-                'reconnecting_state': '_updateConnectionState(RealtimeConnectionState.reconnecting)',
-                'manual_reconnect': 'void reconnect()',
-                'reconnect_reset': '_reconnectAttempts = 0',
-                'timer_cancellation': '_reconnectTimer?.cancel()',
-                'max_attempts_check': 'if (_reconnectAttempts >= _maxReconnectAttempts)',
-                'giving_up_log': 'debugPrint(\'🔴 Max reconnect attempts reached, giving up\')',
-                'already_scheduled_check': 'if (_reconnectTimer?.isActive == true)',
-                'connection_state_notification': 'notifyListeners()'
-            }
+            error_checks = spec.group('error_checks').patterns
             
-            passed_checks = []
-            failed_checks = []
-            
-            for check_name, pattern in error_checks.items():
-                if pattern in content:
-                    passed_checks.append(check_name)
-                else:
-                    failed_checks.append(check_name)
+            hits = spec.scan(content, 'error_checks')['error_checks']
+            passed_checks = [name for name in error_checks if name in hits]
+            failed_checks = [name for name in error_checks if name not in hits]
             
             if failed_checks:
                 self.log_result(test_name, 'FAIL', 
@@ -727,28 +423,19 @@ class FlutterRealtimeBackendTester:
     def test_service_state_updates(self):
         """Test service state update methods"""
         test_name = "Service State Update Methods"
+        spec = self.catalog.test('test_service_state_updates')
         
         try:
             # Check if services have updateStateDirectly methods
-            files_to_check = [
-                '/app/lib/features/requests/domain/requests_service.dart',
-                '/app/lib/features/pm/domain/pm_service.dart'
-            ]
-            
-            update_patterns = {
-                'update_state_directly': 'updateStateDirectly',
-                'state_management': '_state =',
-                'notify_listeners': 'notifyListeners()',
-                'state_copy_with': '.copyWith(',
-                'selective_updates': 'selective'
-            }
+            files_to_check = spec.path('files_to_check')
+            
+            update_patterns = spec.group('update_patterns').patterns
             
             file_results = {}
             
             for file_path in files_to_check:
                 try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
+                    content = source_cache.read(file_path)
                     
                     file_name = file_path.split('/')[-1]
                     file_results[file_name] = {
@@ -757,8 +444,9 @@ class FlutterRealtimeBackendTester:
                         'exists': True
                     }
                     
-                    for pattern_name, pattern in update_patterns.items():
-                        if pattern in content:
+                    hits = spec.scan(content, 'update_patterns')['update_patterns']
+                    for pattern_name in update_patterns:
+                        if pattern_name in hits:
                             file_results[file_name]['passed'].append(pattern_name)
                         else:
                             file_results[file_name]['failed'].append(pattern_name)
@@ -807,17 +495,13 @@ class FlutterRealtimeBackendTester:
             self.test_error_handling_and_reconnection,
             self.test_service_state_updates
         ]
+        # Catalog entries without a method above run from their declared scoring
+        test_methods += catalog_tests(self.catalog, test_methods, self.log_result)
         
-        for test_method in test_methods:
-            try:
-                test_method()
-            except Exception as e:
-                self.log_result(test_method.__name__, 'FAIL', 
-                    f'Test execution failed: {str(e)}')
-                traceback.print_exc()
+        self.runner.run(test_methods, self.log_result)
         
         # Print summary
-        self.print_summary()
+        return self.print_summary()
     
     def print_summary(self):
         """Print test summary"""
@@ -835,6 +519,8 @@ class FlutterRealtimeBackendTester:
         print(f"⚠️  WARNINGS: {warnings}")
         print(f"⏭️  SKIPPED: {skipped}")
         print(f"📊 TOTAL: {len(self.test_results)}")
+        cache_stats = self.runner.source_stats()
+        print(f"📂 SOURCE FILES: {cache_stats['files']} read, {cache_stats['hits']} cache hits")
         
         if failed > 0:
             print("\n❌ FAILED TESTS:")
@@ -848,6 +534,10 @@ class FlutterRealtimeBackendTester:
                 if result['status'] == 'WARNING':
                     print(f"  • {result['test']}: {result['message']}")
         
+        print("\n⏱️  TIMING:")
+        for line in self.runner.timing_report():
+            print(line)
+        
         print("\n" + "=" * 60)
         
         # Return overall status
@@ -855,11 +545,34 @@ class FlutterRealtimeBackendTester:
 
 def main():
     """Main test execution"""
-    tester = FlutterRealtimeBackendTester()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='run test methods on a pool of N workers')
+    parser.add_argument('--pool', choices=('thread', 'process'), default='thread',
+                        help='worker type used when --jobs is above 1')
+    parser.add_argument('--incremental', action='store_true',
+                        help='replay cached results for tests whose Dart files are unchanged')
+    parser.add_argument('--cache-file', default='.harness_cache/flutter_realtime_test.json',
+                        help='where --incremental keeps results between runs')
+    parser.add_argument('--catalog', default=str(CATALOG_PATH),
+                        help='check catalog (JSON, or YAML with PyYAML installed)')
+    parser.add_argument('--lib-root',
+                        help='Flutter lib/ directory to check instead of the catalog root')
+    parser.add_argument('--no-pickle', action='store_true',
+                        help='compile the catalog from source instead of reusing its pickled build')
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog, root=args.lib_root, pickled=not args.no_pickle)
+    incremental = None
+    if args.incremental:
+        # Results also depend on where the sources live and what the catalog checks
+        fingerprint = code_fingerprint(__file__, args.catalog, salt=catalog.root)
+        incremental = IncrementalCache(args.cache_file, fingerprint)
+    tester = FlutterRealtimeBackendTester(jobs=args.jobs, pool=args.pool, incremental=incremental, catalog=catalog)
     success = tester.run_all_tests()
     
     # Exit with appropriate code
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
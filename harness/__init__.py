@@ -0,0 +1,6 @@
+"""
+Shared support for the static Dart source harnesses
+
+backend_test.py and flutter_realtime_test.py check the Flutter sources under
+/app/lib for expected patterns; the helpers here are what they have in common.
+"""
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Cost of matching the check catalogs against the Dart sources, per strategy
+
+Every test in every catalog is checked against each of its files with all of
+its groups, using:
+
+  naive       `pattern in content` and re.search(pattern, ...) per check,
+              as the harnesses did before the catalogs
+  matcher     TestSpec.scan(): one precompiled search per distinct pattern
+  automaton   one Aho-Corasick automaton over the literals and one
+              alternation of named groups over the regexes, rescanning the
+              unmatched regexes until nothing new hits
+
+All three must find the same checks; a mismatch is reported and fails the
+run. The automaton is kept here only to measure: it walks the text in
+Python, one dict lookup per character, which loses to the C search behind
+`in` and re.search for catalogs and files of this size.
+
+Usage: python -m harness.bench_matcher [--lib-root DIR] [--repeat R]
+"""
+
+import argparse
+import re
+import sys
+import time
+from collections import deque
+from typing import Dict, FrozenSet, List, Mapping, Set, Tuple
+
+from harness.catalog import CATALOG_DIR, TestSpec, load_catalog
+from harness.matcher import RegexSpec
+from harness.source_cache import source_cache
+
+_INLINE_FLAGS = (
+    (re.IGNORECASE, 'i'),
+    (re.MULTILINE, 'm'),
+    (re.DOTALL, 's'),
+    (re.VERBOSE, 'x'),
+)
+
+
+class AhoCorasick:
+    """Multi-literal substring search in one pass over the text"""
+
+    def __init__(self, patterns: Mapping[object, str]):
+        self.always = {name for name, pattern in patterns.items() if pattern == ''}
+        self.names = set(patterns)
+        self._delta: List[Dict[str, int]] = [{}]
+
+        outputs: List[Set[object]] = [set()]
+        for name, pattern in patterns.items():
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                nxt = self._delta[state].get(char)
+                if nxt is None:
+                    nxt = len(self._delta)
+                    self._delta[state][char] = nxt
+                    self._delta.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(name)
+
+        # Failure links folded into a full transition table
+        fail = [0] * len(self._delta)
+        children = [dict(edges) for edges in self._delta]
+        queue = deque(children[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in children[state].items():
+                queue.append(child)
+                fail[child] = self._delta[fail[state]].get(char, 0) if state else 0
+                outputs[child] |= outputs[fail[child]]
+            if state:
+                self._delta[state] = {**self._delta[fail[state]], **children[state]}
+        self._output = [frozenset(found) for found in outputs]
+
+    def scan(self, text: str) -> Set[object]:
+        hits = set(self.always)
+        if len(hits) == len(self.names):
+            return hits
+        delta, output = self._delta, self._output
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if output[state]:
+                hits |= output[state]
+                if len(hits) == len(self.names):
+                    break
+        return hits
+
+
+class RegexAlternation:
+    """Many regexes matched through one combined alternation"""
+
+    def __init__(self, patterns: Mapping[object, RegexSpec]):
+        self._sources: Dict[object, str] = {}
+        for name, (pattern, flags) in patterns.items():
+            letters = ''.join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+            self._sources[name] = f'(?{letters}:{pattern})' if letters else f'(?:{pattern})'
+        self._group_names = {f'_{index}': name for index, name in enumerate(self._sources)}
+        self._groups = {name: group for group, name in self._group_names.items()}
+        self._compiled: Dict[FrozenSet[object], re.Pattern] = {}
+
+    def _combined(self, names: FrozenSet[object]) -> re.Pattern:
+        combined = self._compiled.get(names)
+        if combined is None:
+            combined = self._compiled[names] = re.compile('|'.join(
+                f'(?P<{self._groups[name]}>{self._sources[name]})'
+                for name in self._sources if name in names
+            ))
+        return combined
+
+    def scan(self, text: str) -> Set[object]:
+        hits: Set[object] = set()
+        remaining = frozenset(self._sources)
+        while remaining:
+            found = {self._group_names[match.lastgroup] for match in self._combined(remaining).finditer(text)}
+            if not found:
+                break
+            hits |= found
+            remaining -= found
+        return hits
+
+
+def checks_of(spec: TestSpec) -> Tuple[Dict[Tuple[str, str], str], Dict[Tuple[str, str], RegexSpec]]:
+    literals, regexes = {}, {}
+    for group_name, group in spec.groups.items():
+        for check, pattern in group.named.items():
+            if group.kind == 'literal':
+                literals[(group_name, check)] = pattern
+            else:
+                regexes[(group_name, check)] = (pattern, group.flags)
+    return literals, regexes
+
+
+def naive(literals, regexes):
+    def scan(text: str) -> Set[object]:
+        hits = {name for name, pattern in literals.items() if pattern in text}
+        hits |= {name for name, (pattern, flags) in regexes.items() if re.search(pattern, text, flags)}
+        return hits
+    return scan
+
+
+def automaton(literals, regexes):
+    literal_set, regex_set = AhoCorasick(literals), RegexAlternation(regexes)
+    return lambda text: literal_set.scan(text) | regex_set.scan(text)
+
+
+def matcher(spec: TestSpec):
+    names = tuple(spec.groups)
+
+    def scan(text: str) -> Set[object]:
+        return {(group, check) for group, checks in spec.scan(text, *names).items() for check in checks}
+    return scan
+
+
+def workload(lib_root: str):
+    """(test name, scanners by strategy, contents of the test's files) per test"""
+    for catalog_path in sorted(CATALOG_DIR.glob('*.json')):
+        catalog = load_catalog(catalog_path, root=lib_root, pickled=False)
+        for spec in catalog.tests.values():
+            paths = []
+            for key in spec.files:
+                path = spec.path(key)
+                paths.extend(path if isinstance(path, list) else [path])
+            contents = []
+            for path in paths:
+                try:
+                    contents.append(source_cache.read(path))
+                except OSError:
+                    pass
+            literals, regexes = checks_of(spec)
+            scanners = {
+                'naive': naive(literals, regexes),
+                'matcher': matcher(spec),
+                'automaton': automaton(literals, regexes),
+            }
+            yield f'{catalog_path.stem}.{spec.name}', scanners, contents
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lib-root', default=None,
+                        help='Flutter lib/ to scan (default: the catalog root, or HARNESS_LIB_ROOT)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    strategies = ('naive', 'matcher', 'automaton')
+    totals = dict.fromkeys(strategies, 0.0)
+    mismatches = 0
+    scanned = 0
+    print(f"best of {args.repeat}, ms per test over all of its files")
+    print(f"{'test':<64} {'files':>5} " + ' '.join(f'{name:>10}' for name in strategies))
+    for name, scanners, contents in workload(args.lib_root):
+        expected = [scanners['naive'](content) for content in contents]
+        for strategy in strategies[1:]:
+            if [scanners[strategy](content) for content in contents] != expected:
+                print(f"MISMATCH {name}: {strategy} disagrees with naive")
+                mismatches += 1
+        times = {
+            strategy: best_of(lambda: [scanners[strategy](content) for content in contents], args.repeat)
+            for strategy in strategies
+        }
+        for strategy, elapsed in times.items():
+            totals[strategy] += elapsed
+        scanned += len(contents)
+        print(f"{name:<64} {len(contents):>5} " + ' '.join(f'{times[s] * 1000:>10.3f}' for s in strategies))
+    print(f"{'total':<64} {scanned:>5} " + ' '.join(f'{totals[s] * 1000:>10.3f}' for s in strategies))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Declarative check catalogs for the static harnesses
+
+A catalog maps each test method to the Dart files it reads and to named
+check groups. Each group holds literal substrings or regexes:
+
+    {
+      "root": "/app/lib",
+      "tests": {
+        "test_invoice_model_structure": {
+          "files": {"invoice": "features/billing/domain/invoice.dart"},
+          "groups": {
+            "model_checks": {"kind": "literal", "patterns": {"class_definition": "class Invoice"}},
+            "transition_patterns": {"kind": "regex", "flags": ["IGNORECASE", "DOTALL"],
+                                    "patterns": ["draft.*sent"]},
+            "all_checks": {"include": ["model_checks"]}
+          },
+          "title": "Invoice Model Structure",
+          "scoring": {"mode": "all", "groups": ["all_checks"]}
+        }
+      }
+    }
+
+Patterns are either a {name: pattern} mapping or a plain list. A list is named
+by the pattern itself, like compile_checks() does. A group with "include"
+concatenates other groups of the same test and takes their kind. File
+entries are paths relative to "root", or lists of them. The root can be
+moved with --lib-root or HARNESS_LIB_ROOT to point the harness at another
+checkout.
+
+Every test declares its "scoring", which says how the checks of its
+"groups" turn into a status:
+
+    all        every check is found in at least one of the files: PASS or FAIL
+    any        at least one check is found in some file: PASS or FAIL
+    threshold  the share of (file, check) pairs found reaches "threshold"
+               percent: PASS or WARNING
+
+"files" limits the scoring to some file entries, all of them by default; a
+missing file has none of the checks. A test with no hand-written method in
+its harness is run from its scoring alone (see harness/executor.py), so a
+new catalog entry is never silently skipped.
+
+Catalogs are JSON, or YAML when PyYAML is installed. compile_catalog()
+builds every group's Matcher up front. load_catalog() can pickle the
+compiled result next to the source, keyed by the catalog's digest, so later
+runs skip parsing the catalog and assembling its groups. Compiled regexes do
+not survive pickling: re compiles each pattern again as it is unpickled. The
+pickle is rebuilt whenever the catalog or the harness code that compiles it
+changes.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from harness.matcher import Matcher
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - YAML catalogs are optional
+    yaml = None
+
+
+CATALOG_DIR = Path(__file__).resolve().parent / 'catalogs'
+PICKLE_VERSION = 1
+
+Patterns = Union[Dict[str, str], List[str]]
+SCORING_MODES = ('all', 'any', 'threshold')
+
+
+class CatalogError(ValueError):
+    """Raised for a catalog that does not follow the format above"""
+
+
+class CheckGroup:
+    """One named group of checks with its precompiled matcher"""
+
+    def __init__(self, name: str, kind: str, patterns: Patterns, flags: int = 0):
+        if kind not in ('literal', 'regex'):
+            raise CatalogError(f"Group {name}: unknown kind {kind!r}")
+        self.name = name
+        self.kind = kind
+        self.patterns = patterns
+        self.flags = flags
+        # {check name: pattern}, with list entries named by the pattern
+        self.named = patterns if isinstance(patterns, dict) else {pattern: pattern for pattern in patterns}
+        try:
+            if kind == 'literal':
+                self.matcher = Matcher(literals=self.named)
+            else:
+                self.matcher = Matcher(regexes=self.named, flags=flags)
+        except re.error as e:
+            raise CatalogError(f"Group {name}: bad regex: {e}") from e
+
+    def scan(self, text: str):
+        """Names of the group's checks found in text"""
+        return self.matcher.scan(text)
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+class Scoring:
+    """How a test's hits become PASS, FAIL or WARNING"""
+
+    def __init__(self, test_name: str, spec: dict, groups: Dict[str, CheckGroup], files: dict):
+        self.mode = spec.get('mode')
+        if self.mode not in SCORING_MODES:
+            raise CatalogError(f"{test_name}: scoring mode must be one of {', '.join(SCORING_MODES)}")
+        self.groups: Tuple[str, ...] = tuple(spec.get('groups', ()))
+        if not self.groups:
+            raise CatalogError(f"{test_name}: scoring needs at least one group")
+        for name in self.groups:
+            if name not in groups:
+                raise CatalogError(f"{test_name}: scoring uses unknown group {name}")
+        self.files: Tuple[str, ...] = tuple(spec.get('files', files))
+        for key in self.files:
+            if key not in files:
+                raise CatalogError(f"{test_name}: scoring uses unknown file {key}")
+        self.threshold: Optional[float] = spec.get('threshold')
+        if (self.mode == 'threshold') != (self.threshold is not None):
+            raise CatalogError(f"{test_name}: threshold goes with, and only with, threshold scoring")
+
+
+class TestSpec:
+    """Files, check groups and scoring of one test method"""
+
+    def __init__(self, name: str, root: str, files: dict, groups: Dict[str, CheckGroup],
+                 title: Optional[str] = None, scoring: Optional[Scoring] = None):
+        self.name = name
+        self.root = root
+        self.files = files
+        self.groups = groups
+        self.title = title or name
+        self.scoring = scoring
+        self._matchers: Dict[Tuple[str, ...], Matcher] = {}
+
+    def path(self, key: str) -> Union[str, List[str]]:
+        """Absolute path (or list of paths) declared under files"""
+        value = self.files[key]
+        if isinstance(value, list):
+            return [os.path.join(self.root, item) for item in value]
+        return os.path.join(self.root, value)
+
+    def group(self, name: str) -> CheckGroup:
+        return self.groups[name]
+
+    def scan(self, content: str, *group_names: str) -> Dict[str, Set[str]]:
+        """Names of the checks found in content for each of the groups.
+
+        One matcher covers all the groups, so a file is scanned once however
+        many groups a test checks it against, and a pattern shared between
+        groups is tested once.
+        """
+        matcher = self._matchers.get(group_names)
+        if matcher is None:
+            matcher = self._matchers[group_names] = self._union(group_names)
+        found: Dict[str, Set[str]] = {name: set() for name in group_names}
+        for group_name, check in matcher.scan(content):
+            found[group_name].add(check)
+        return found
+
+    def _union(self, group_names: Tuple[str, ...]) -> Matcher:
+        literals, regexes = {}, {}
+        for group_name in group_names:
+            group = self.groups[group_name]
+            for check, pattern in group.named.items():
+                if group.kind == 'literal':
+                    literals[(group_name, check)] = pattern
+                else:
+                    regexes[(group_name, check)] = (pattern, group.flags)
+        return Matcher(literals, regexes)
+
+
+class Catalog:
+    def __init__(self, root: str, tests: Dict[str, TestSpec], digest: str):
+        self.root = root
+        self.tests = tests
+        self.digest = digest
+
+    def test(self, name: str) -> TestSpec:
+        try:
+            return self.tests[name]
+        except KeyError:
+            raise CatalogError(f"No catalog entry for {name}") from None
+
+
+def _flags(names: List[str]) -> int:
+    flags = 0
+    for name in names:
+        try:
+            flags |= getattr(re, name)
+        except AttributeError:
+            raise CatalogError(f"Unknown regex flag {name}") from None
+    return flags
+
+
+def _compile_groups(test_name: str, raw_groups: dict) -> Dict[str, CheckGroup]:
+    groups: Dict[str, CheckGroup] = {}
+
+    def build(name: str, seen=()) -> CheckGroup:
+        if name in groups:
+            return groups[name]
+        if name in seen:
+            raise CatalogError(f"{test_name}: include cycle through {name}")
+        spec = raw_groups.get(name)
+        if spec is None:
+            raise CatalogError(f"{test_name}: unknown group {name}")
+
+        if 'include' in spec:
+            parts = [build(part, (*seen, name)) for part in spec['include']]
+            kinds = {(part.kind, part.flags) for part in parts}
+            if len(kinds) != 1:
+                raise CatalogError(f"{test_name}.{name}: included groups mix kinds or flags")
+            patterns: dict = {}
+            for part in parts:
+                patterns.update(part.named)
+            kind, flags = kinds.pop()
+            group = CheckGroup(name, kind, patterns, flags)
+        else:
+            patterns = spec.get('patterns')
+            if not isinstance(patterns, (dict, list)):
+                raise CatalogError(f"{test_name}.{name}: patterns must be a mapping or a list")
+            group = CheckGroup(name, spec.get('kind', 'literal'), patterns, _flags(spec.get('flags', [])))
+        groups[name] = group
+        return group
+
+    for name in raw_groups:
+        build(name)
+    return groups
+
+
+def parse_catalog(text: str, suffix: str = '.json'):
+    if suffix in ('.yaml', '.yml'):
+        if yaml is None:
+            raise CatalogError("PyYAML is required for YAML catalogs")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def _compile_test(name: str, root: str, spec: dict) -> TestSpec:
+    files = spec.get('files', {})
+    groups = _compile_groups(name, spec.get('groups', {}))
+    scoring = Scoring(name, spec['scoring'], groups, files) if 'scoring' in spec else None
+    return TestSpec(name, root, files, groups, spec.get('title'), scoring)
+
+
+def compile_catalog(data: dict, digest: str = '') -> Catalog:
+    """Turn a parsed catalog into TestSpecs with compiled check groups"""
+    root = data.get('root', '/app/lib')
+    tests = {name: _compile_test(name, root, spec) for name, spec in data.get('tests', {}).items()}
+    return Catalog(root, tests, digest)
+
+
+def _with_root(catalog: Catalog, root: Optional[str]) -> Catalog:
+    if root:
+        catalog.root = root
+        for spec in catalog.tests.values():
+            spec.root = root
+    return catalog
+
+
+def load_catalog(path: Union[str, Path], root: Optional[str] = None, pickled: bool = True) -> Catalog:
+    """Load and compile a catalog, reusing the pickled build when it is current"""
+    path = Path(path)
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    # The pickle also depends on the classes it was built from
+    build_digest = hashlib.sha256(digest.encode() + Path(__file__).read_bytes()
+                                  + (Path(__file__).parent / 'matcher.py').read_bytes()).hexdigest()
+    root = root or os.environ.get('HARNESS_LIB_ROOT')
+    pickle_path = path.with_suffix(path.suffix + '.pickle')
+
+    if pickled:
+        try:
+            with open(pickle_path, 'rb') as f:
+                version, cached_digest, catalog = pickle.load(f)
+            if version == PICKLE_VERSION and cached_digest == build_digest:
+                return _with_root(catalog, root)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError):
+            pass
+
+    catalog = compile_catalog(parse_catalog(raw.decode('utf-8'), path.suffix), digest)
+    if pickled:
+        try:
+            tmp = pickle_path.with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                pickle.dump((PICKLE_VERSION, build_digest, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, pickle_path)
+        except OSError:
+            # A read-only checkout still works, it just compiles every run
+            pass
+    return _with_root(catalog, root)
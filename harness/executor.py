@@ -0,0 +1,92 @@
+"""
+Generic execution of catalog tests from their declared scoring
+
+The harnesses keep hand-written methods for tests whose report needs more
+than the scoring says. Every other catalog entry runs through CatalogTest:
+it reads the files named by the entry's scoring, scans them with the entry's
+groups and logs PASS, FAIL or WARNING as the mode dictates (see catalog.py).
+CatalogTest has a __name__ like a bound test method, so the runner times,
+caches and pools it the same way.
+"""
+
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+from harness.catalog import Catalog, TestSpec
+from harness.source_cache import source_cache
+
+MAX_LISTED = 5
+
+
+class CatalogTest:
+    """Test method for a catalog entry without a hand-written one"""
+
+    def __init__(self, spec: TestSpec, log_result: Callable):
+        self.spec = spec
+        self.log_result = log_result
+        self.__name__ = spec.name
+
+    def __call__(self):
+        run_catalog_test(self.spec, self.log_result)
+
+
+def catalog_tests(catalog: Catalog, test_methods: Sequence[Callable], log_result: Callable) -> List[CatalogTest]:
+    """CatalogTests for the entries none of test_methods covers, in catalog order"""
+    handled = {test_method.__name__ for test_method in test_methods}
+    return [CatalogTest(spec, log_result) for name, spec in catalog.tests.items() if name not in handled]
+
+
+def _paths(spec: TestSpec, keys: Sequence[str]) -> List[str]:
+    paths = []
+    for key in keys:
+        value = spec.path(key)
+        paths.extend(value if isinstance(value, list) else [value])
+    return paths
+
+
+def run_catalog_test(spec: TestSpec, log_result: Callable):
+    scoring = spec.scoring
+    if scoring is None:
+        log_result(spec.title, 'FAIL', f'{spec.name} has no hand-written method and declares no scoring')
+        return
+
+    checks: List[Tuple[str, str]] = [(group, check) for group in scoring.groups for check in spec.group(group).named]
+    paths = _paths(spec, scoring.files)
+    found: Dict[str, Set[Tuple[str, str]]] = {}
+    missing_files = []
+    for path in paths:
+        try:
+            content = source_cache.read(path)
+        except FileNotFoundError:
+            missing_files.append(path.split('/')[-1])
+            found[path] = set()
+            continue
+        hits = spec.scan(content, *scoring.groups)
+        found[path] = {(group, check) for group, names in hits.items() for check in names}
+
+    details = {'mode': scoring.mode, 'files': len(paths)}
+    if missing_files:
+        details['missing_files'] = missing_files
+    anywhere = set().union(*found.values())
+    missing = [check for group, check in checks if (group, check) not in anywhere]
+
+    if scoring.mode == 'threshold':
+        expected = len(checks) * len(paths)
+        score = sum(len(hits) for hits in found.values()) / expected * 100 if expected else 0.0
+        details['score'] = f'{score:.1f}%'
+        if score >= scoring.threshold:
+            log_result(spec.title, 'PASS', f'{score:.1f}% of checks found', details)
+        else:
+            details['missing'] = missing
+            log_result(spec.title, 'WARNING',
+                       f'Coverage below {scoring.threshold:g}%: {score:.1f}%', details)
+        return
+
+    passed = not missing if scoring.mode == 'all' else bool(anywhere)
+    details['found'] = f'{len(checks) - len(missing)}/{len(checks)}'
+    if passed:
+        log_result(spec.title, 'PASS', f'{len(checks) - len(missing)} of {len(checks)} checks found', details)
+    elif scoring.mode == 'all':
+        details['missing'] = missing
+        log_result(spec.title, 'FAIL', f'Missing patterns: {", ".join(missing[:MAX_LISTED])}', details)
+    else:
+        log_result(spec.title, 'FAIL', 'None of the patterns found', details)
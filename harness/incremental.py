@@ -0,0 +1,76 @@
+"""
+On-disk results of previous harness runs, replayed when inputs are unchanged
+
+For every test the cache keeps the files it read with their SHA-256 digests
+(None for files that were missing) and the output it produced. A later run
+replays that output instead of running the test when every recorded digest
+still matches. The whole cache is dropped when the harness code itself
+changes, since a different check catalog can give a different verdict on
+the same sources. Tests that crashed are never cached.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from harness.source_cache import source_cache
+
+CACHE_VERSION = 1
+HARNESS_DIR = Path(__file__).resolve().parent
+
+
+def code_fingerprint(*paths: str, salt: str = '') -> str:
+    """Digest of the given files plus every module in this package"""
+    digest = hashlib.sha256(salt.encode())
+    for path in sorted({*map(str, paths), *map(str, HARNESS_DIR.glob('*.py'))}):
+        digest.update(path.encode())
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+class IncrementalCache:
+    """Per-test inputs and output, persisted as JSON between runs"""
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.tests: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION and data.get('fingerprint') == self.fingerprint:
+            self.tests = data.get('tests', {})
+
+    def lookup(self, name: str) -> Optional[List[list]]:
+        """Cached output of a test if none of the files it read changed"""
+        entry = self.tests.get(name)
+        if entry is None:
+            return None
+        for path, digest in entry['inputs'].items():
+            if source_cache.digest(path) != digest:
+                return None
+        return entry['entries']
+
+    def store(self, name: str, inputs: Dict[str, Optional[str]], entries: Iterable):
+        entries = [list(entry) for entry in entries]
+        if any(stream == 'stderr' for _, _, stream in entries):
+            # A crash is not a verdict on the sources; run it again next time
+            self.tests.pop(name, None)
+            return
+        self.tests[name] = {'inputs': inputs, 'entries': entries}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp.write_text(json.dumps({
+            'version': CACHE_VERSION,
+            'fingerprint': self.fingerprint,
+            'tests': self.tests,
+        }, ensure_ascii=False))
+        os.replace(tmp, self.path)
@@ -0,0 +1,69 @@
+"""
+Precompiled matching of a check catalog against one source file
+
+Each literal check is a plain `pattern in content` and each regex check one
+search with a pattern compiled up front. Both run in C over the file, so
+for checks a few dozen long against files of a few kilobytes they beat
+anything that walks the text in Python; harness/bench_matcher.py keeps the
+numbers for an Aho-Corasick automaton and a combined alternation. What a
+Matcher adds is doing each distinct pattern once: checks that share a
+pattern (a group and the groups it includes) are tested once and every name
+on it is reported.
+
+Check names can be any hashable, so a matcher built from several groups can
+key its checks by (group, name).
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+RegexSpec = Union[str, Tuple[str, int]]
+Checks = Union[Mapping[str, str], Iterable[str]]
+
+
+class Matcher:
+    """Literal and regex checks for one file, each distinct pattern tested once"""
+
+    def __init__(self, literals: Optional[Mapping[Hashable, str]] = None,
+                 regexes: Optional[Mapping[Hashable, RegexSpec]] = None, flags: int = 0):
+        self._literals: Dict[str, List[Hashable]] = {}
+        for name, pattern in (literals or {}).items():
+            self._literals.setdefault(pattern, []).append(name)
+
+        sources: Dict[Tuple[str, int], List[Hashable]] = {}
+        for name, spec in (regexes or {}).items():
+            pattern, own_flags = spec if isinstance(spec, tuple) else (spec, 0)
+            sources.setdefault((pattern, flags | own_flags), []).append(name)
+        self._regexes = [(re.compile(pattern, pattern_flags), names)
+                         for (pattern, pattern_flags), names in sources.items()]
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Names of every check found in text"""
+        hits: Set[Hashable] = set()
+        for pattern, names in self._literals.items():
+            if pattern in text:
+                hits.update(names)
+        for regex, names in self._regexes:
+            if regex.search(text):
+                hits.update(names)
+        return hits
+
+
+def _freeze(checks: Optional[Checks]) -> Tuple[Tuple[str, object], ...]:
+    if checks is None:
+        return ()
+    if isinstance(checks, Mapping):
+        return tuple(checks.items())
+    # Plain lists of patterns are named by the pattern itself
+    return tuple((pattern, pattern) for pattern in checks)
+
+
+@lru_cache(maxsize=None)
+def _compile(literals, regexes, flags: int) -> Matcher:
+    return Matcher(dict(literals), dict(regexes), flags)
+
+
+def compile_checks(literals: Optional[Checks] = None, regexes: Optional[Checks] = None, flags: int = 0) -> Matcher:
+    """Matcher for the given checks, built once per distinct catalog"""
+    return _compile(_freeze(literals), _freeze(regexes), flags)
@@ -0,0 +1,153 @@
+"""
+Sequential or pooled execution of a harness's test methods
+
+Test methods report through log_result, which hands each result to the
+runner. Each method's output is buffered while it runs and printed once it
+finishes, in declaration order, so with jobs > 1 the report reads the same
+whatever order the pool completes in. Every method's wall time is kept so
+the summary can show the critical path. With an IncrementalCache, methods
+whose input files are unchanged are replayed from it instead of run.
+
+Process workers each have their own source cache, so every call also
+returns the cache hits and misses it caused, and source_stats() adds those
+up instead of reading the parent's cache, which such a run never touches.
+"""
+
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from harness.incremental import IncrementalCache
+from harness.source_cache import source_cache
+
+# (result or None, text, stream name) as produced inside a worker
+Entry = Tuple[object, str, str]
+# Source cache hits and misses caused by one call
+Counts = Dict[str, int]
+
+
+class HarnessRunner:
+    """Runs test methods and collects their results in a stable order"""
+
+    def __init__(self, jobs: int = 1, pool: str = 'thread', incremental: Optional[IncrementalCache] = None):
+        if pool not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool type: {pool}")
+        self.jobs = max(1, jobs)
+        self.pool = pool
+        self.incremental = incremental
+        self.replayed: List[str] = []
+        self.results: List[dict] = []
+        self.timings: List[Tuple[str, float]] = []
+        self.wall_time = 0.0
+        self._files_read: Set[str] = set()
+        self._source_counts: Counts = {'hits': 0, 'misses': 0}
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Process workers get a fresh runner; results and reads travel back via _call
+        return {'jobs': self.jobs, 'pool': self.pool}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def record(self, result: dict, text: str):
+        """Called by log_result, from the main thread or a worker"""
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None:
+            pending.append((result, text, 'stdout'))
+            return
+        self.results.append(result)
+        print(text)
+
+    def _emit(self, entries: Sequence[Entry]):
+        for result, text, stream in entries:
+            if result is not None:
+                self.results.append(result)
+            print(text, file=sys.stderr if stream == 'stderr' else sys.stdout)
+
+    def _call(self, test_method: Callable, log_result: Callable) -> Tuple[List[Entry], float, Dict, Counts]:
+        self._local.pending = []
+        before = source_cache.stats()
+        started = time.perf_counter()
+        try:
+            with source_cache.track() as reads:
+                try:
+                    test_method()
+                except Exception as e:
+                    log_result(test_method.__name__, 'FAIL', f'Test execution failed: {str(e)}')
+                    self._local.pending.append((None, traceback.format_exc().rstrip('\n'), 'stderr'))
+            elapsed = time.perf_counter() - started
+            after = source_cache.stats()
+            # Exact in a process worker, which runs one call at a time
+            counts = {key: after[key] - before[key] for key in ('hits', 'misses')}
+            return self._local.pending, elapsed, reads, counts
+        finally:
+            self._local.pending = None
+
+    def _outcomes(self, test_methods: Sequence[Callable], log_result: Callable) -> Iterator[tuple]:
+        """(method, entries, elapsed, reads, counts) in declaration order; reads and counts are None when replayed"""
+        cached = {}
+        if self.incremental is not None:
+            for test_method in test_methods:
+                entries = self.incremental.lookup(test_method.__name__)
+                if entries is not None:
+                    cached[test_method.__name__] = entries
+
+        if self.jobs == 1:
+            for test_method in test_methods:
+                if test_method.__name__ in cached:
+                    yield test_method, cached[test_method.__name__], 0.0, None, None
+                else:
+                    yield (test_method, *self._call(test_method, log_result))
+            return
+
+        executor = ThreadPoolExecutor if self.pool == 'thread' else ProcessPoolExecutor
+        with executor(max_workers=self.jobs) as pool:
+            futures = {
+                test_method.__name__: pool.submit(self._call, test_method, log_result)
+                for test_method in test_methods if test_method.__name__ not in cached
+            }
+            # Replay in declaration order, not completion order
+            for test_method in test_methods:
+                if test_method.__name__ in cached:
+                    yield test_method, cached[test_method.__name__], 0.0, None, None
+                else:
+                    yield (test_method, *futures[test_method.__name__].result())
+
+    def run(self, test_methods: Sequence[Callable], log_result: Callable):
+        started = time.perf_counter()
+        for test_method, entries, elapsed, reads, counts in self._outcomes(test_methods, log_result):
+            self._emit(entries)
+            self.timings.append((test_method.__name__, elapsed))
+            if reads is None:
+                self.replayed.append(test_method.__name__)
+                continue
+            self._files_read.update(path for path, digest in reads.items() if digest is not None)
+            for key, count in counts.items():
+                self._source_counts[key] += count
+            if self.incremental is not None:
+                self.incremental.store(test_method.__name__, reads, entries)
+        self.wall_time = time.perf_counter() - started
+        if self.incremental is not None:
+            self.incremental.save()
+
+    def source_stats(self) -> dict:
+        """Source files read and cache hits, summed over worker processes if any"""
+        if self.jobs > 1 and self.pool == 'process':
+            return {'files': len(self._files_read), **self._source_counts}
+        return source_cache.stats()
+
+    def timing_report(self) -> List[str]:
+        """Slowest tests first; with a pool the slowest one bounds the run"""
+        lines = [
+            f"  {elapsed * 1000:9.1f} ms  {name}{' (cached)' if name in self.replayed else ''}"
+            for name, elapsed in sorted(self.timings, key=lambda item: item[1], reverse=True)
+        ]
+        total = sum(elapsed for _, elapsed in self.timings)
+        lines.append(f"  wall {self.wall_time * 1000:.1f} ms, sum {total * 1000:.1f} ms, "
+                     f"jobs {self.jobs} ({self.pool} pool)"
+                     + (f", {len(self.replayed)} replayed" if self.incremental is not None else ''))
+        return lines
@@ -0,0 +1,126 @@
+"""
+Process-wide cache of decoded Dart sources
+
+The harness tests look at the same few files over and over (five tests read
+billing_repository.dart alone), so every read goes through one cache keyed by
+path and mtime. A file is mapped, decoded and newline-normalised once per
+run; later reads return the same str. A file that changes on disk between
+reads is picked up again because its mtime or size no longer matches.
+
+Each entry also keeps a content digest, and track() records which files (and
+which digests) a block of code read, which is what incremental runs key on.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+Stamp = Tuple[int, int]
+
+
+class SourceCache:
+    """Decoded file contents keyed by path, invalidated by mtime and size"""
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self.encoding = encoding
+        self._entries: Dict[str, Tuple[Stamp, str, str]] = {}
+        self._lock = threading.Lock()
+        # One lock per path, so concurrent readers of a missing file load it once
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path: str) -> str:
+        """Contents of path as open(path, 'r').read() would return them.
+
+        Raises the same OSError (FileNotFoundError and friends) as open().
+        """
+        content, digest = self._get(path)
+        return content
+
+    def digest(self, path: str) -> Optional[str]:
+        """SHA-256 of the file's bytes, or None when it cannot be read"""
+        try:
+            return self._get(path)[1]
+        except OSError:
+            return None
+
+    @contextmanager
+    def track(self) -> Iterator[Dict[str, Optional[str]]]:
+        """Collect {path: digest} for every read made by this thread.
+
+        Files that could not be read are recorded with a None digest, so a
+        file appearing later still counts as a change.
+        """
+        reads: Dict[str, Optional[str]] = {}
+        previous = getattr(self._local, 'reads', None)
+        self._local.reads = reads
+        try:
+            yield reads
+        finally:
+            self._local.reads = previous
+
+    def _get(self, path: str) -> Tuple[str, str]:
+        reads = getattr(self._local, 'reads', None)
+        try:
+            st = os.stat(path)
+        except OSError:
+            if reads is not None:
+                reads[path] = None
+            raise
+
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self._lookup(path, stamp)
+        if entry is None:
+            with self._path_lock(path):
+                # Another thread may have loaded it while we waited
+                entry = self._lookup(path, stamp)
+                if entry is None:
+                    content, digest = self._load(path, st.st_size)
+                    entry = (stamp, content, digest)
+                    with self._lock:
+                        self._entries[path] = entry
+                        self.misses += 1
+
+        if reads is not None:
+            reads[path] = entry[2]
+        return entry[1], entry[2]
+
+    def _lookup(self, path: str, stamp: Stamp) -> Optional[Tuple[Stamp, str, str]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != stamp:
+                return None
+            self.hits += 1
+            return entry
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def _load(self, path: str, size: int) -> Tuple[str, str]:
+        with open(path, 'rb') as f:
+            if size == 0:
+                data = b''
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    data = mapped[:]
+        # Universal newlines, like text-mode open()
+        content = data.decode(self.encoding).replace('\r\n', '\n').replace('\r', '\n')
+        return content, hashlib.sha256(data).hexdigest()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'files': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+source_cache = SourceCache()
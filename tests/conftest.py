@@ -0,0 +1,19 @@
+"""
+Shared setup for the test suite
+
+The backend modules import each other flat (``import billing``), the way
+uvicorn runs them from backend/, so that directory goes on sys.path. Tests
+that need the backend's dependencies skip themselves when those are not
+installed.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / 'backend'
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('fastapi')
+mongomock_motor = pytest.importorskip('mongomock_motor')
+
+from pymongo.errors import AutoReconnect  # noqa: E402
+
+import billing_run  # noqa: E402
+from billing_run import BillingRunCreate, RunInProgress, due_periods, execute_run, resume_run, start_run  # noqa: E402
+
+WINDOW_START = datetime(2024, 1, 1)
+WINDOW_END = datetime(2024, 3, 20)
+
+
+class FailOnce:
+    """Collection proxy whose ``method`` raises AutoReconnect the first time"""
+
+    def __init__(self, collection, method: str):
+        self._collection = collection
+        self._method = method
+        self.failed = False
+
+    def __getattr__(self, name):
+        if name == self._method and not self.failed:
+            async def fail(*args, **kwargs):
+                self.failed = True
+                raise AutoReconnect('connection reset by peer')
+            return fail
+        return getattr(self._collection, name)
+
+
+class FlakyDatabase:
+    """Database proxy that swaps in FailOnce for one collection"""
+
+    def __init__(self, db, collection: str, method: str):
+        self._db = db
+        self._failing = {collection: FailOnce(db[collection], method)}
+
+    def __getattr__(self, name):
+        return self._failing.get(name) or getattr(self._db, name)
+
+    def __getitem__(self, name):
+        return self._failing.get(name) or self._db[name]
+
+
+async def seeded_db():
+    db = mongomock_motor.AsyncMongoMockClient()['billing_run_test']
+    await db.tenants.insert_one({'id': 't1', 'name': 'Acme Cold Chain', 'email': 'ops@acme.test'})
+    await db.contracts.insert_many([
+        {'id': 'c1', 'tenant_id': 't1', 'status': 'active', 'billing_cycle': 'monthly',
+         'start_date': datetime(2024, 1, 15), 'price_paisa': 150000, 'type': 'amc'},
+        {'id': 'c2', 'tenant_id': 't1', 'status': 'active', 'billing_cycle': 'monthly',
+         'start_date': datetime(2024, 2, 1), 'price_paisa': 99900, 'type': 'cmc'},
+    ])
+    return db
+
+
+def new_run():
+    return BillingRunCreate(window_start=WINDOW_START, window_end=WINDOW_END, batch_size=1)
+
+
+async def invoices_and_lines(db):
+    invoices = await db.invoices.find({}, {'_id': 0}).to_list(None)
+    lines = await db.invoice_lines.find({}, {'_id': 0}).to_list(None)
+    return invoices, lines
+
+
+@pytest.mark.parametrize('collection, method', [
+    ('invoice_lines', 'bulk_write'),
+    ('invoices', 'insert_many'),
+    ('contracts', 'bulk_write'),
+    ('billing_runs', 'update_one'),
+])
+def test_resume_after_failed_write_bills_every_period_once_with_lines(collection, method):
+    async def scenario():
+        db = await seeded_db()
+        flaky = FlakyDatabase(db, collection, method)
+        run = await start_run(flaky, new_run())
+        with pytest.raises(AutoReconnect):
+            await execute_run(flaky, run['id'], run['lease_owner'])
+        failed = await db.billing_runs.find_one({'id': run['id']})
+
+        run = await resume_run(db, run['id'])
+        run = await execute_run(db, run['id'], run['lease_owner'])
+        return failed, run, *(await invoices_and_lines(db))
+
+    failed, run, invoices, lines = asyncio.run(scenario())
+    if collection != 'billing_runs':
+        assert failed['status'] == 'failed'
+    assert run['status'] == 'completed'
+    # c1: Jan 15, Feb 15, Mar 15; c2: Feb 1, Mar 1
+    periods = sorted((invoice['contract_id'], invoice['period_start']) for invoice in invoices)
+    assert periods == [
+        ('c1', datetime(2024, 1, 15)), ('c1', datetime(2024, 2, 15)), ('c1', datetime(2024, 3, 15)),
+        ('c2', datetime(2024, 2, 1)), ('c2', datetime(2024, 3, 1)),
+    ]
+    assert sorted(line['invoice_id'] for line in lines) == sorted(invoice['id'] for invoice in invoices)
+    assert len({invoice['invoice_number'] for invoice in invoices}) == len(invoices)
+
+
+def test_completed_run_replayed_creates_nothing():
+    async def scenario():
+        db = await seeded_db()
+        first = await start_run(db, new_run())
+        await execute_run(db, first['id'], first['lease_owner'])
+        second = await start_run(db, new_run())
+        second = await execute_run(db, second['id'], second['lease_owner'])
+        return second, *(await invoices_and_lines(db))
+
+    second, invoices, lines = asyncio.run(scenario())
+    assert second['invoices_created'] == 0
+    assert len(invoices) == len(lines) == 5
+
+
+def test_only_one_run_holds_the_lease():
+    async def scenario():
+        db = await seeded_db()
+        first = await start_run(db, new_run())
+        with pytest.raises(RunInProgress):
+            await start_run(db, new_run())
+        with pytest.raises(RunInProgress):
+            await resume_run(db, first['id'])
+        await execute_run(db, first['id'], first['lease_owner'])
+        # Released when the run finished
+        second = await start_run(db, new_run())
+        return second
+
+    assert asyncio.run(scenario())['status'] == 'running'
+
+
+def test_periods_before_the_first_run_are_left_to_the_app():
+    contract = {'billing_cycle': 'monthly', 'start_date': datetime(2023, 6, 10)}
+    assert [start for _, start, _ in due_periods(contract, datetime(2024, 3, 20))] == [datetime(2024, 3, 10)]
+    assert [start for _, start, _ in due_periods(contract, datetime(2024, 3, 20), datetime(2024, 1, 1))] == [
+        datetime(2024, 1, 10), datetime(2024, 2, 10), datetime(2024, 3, 10),
+    ]
+
+
+def test_due_periods_continue_from_the_checkpointed_period():
+    contract = {'billing_cycle': 'annual', 'start_date': datetime(2020, 2, 29), 'next_billing_period': 3}
+    assert due_periods(contract, datetime(2025, 3, 1)) == [
+        (3, datetime(2023, 2, 28), datetime(2024, 2, 29)),
+        (4, datetime(2024, 2, 29), datetime(2025, 2, 28)),
+        (5, datetime(2025, 2, 28), datetime(2026, 2, 28)),
+    ]
+
+
+def test_invoice_ids_are_stable_per_contract_period():
+    assert billing_run.invoice_id_for('c1', datetime(2024, 1, 15)) == billing_run.invoice_id_for('c1', datetime(2024, 1, 15))
+    assert billing_run.invoice_id_for('c1', datetime(2024, 1, 15)) != billing_run.invoice_id_for('c1', datetime(2024, 2, 15))
@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import pytest
+
+import backend_test
+import flutter_realtime_test
+from harness.catalog import CATALOG_DIR, CatalogError, compile_catalog, load_catalog
+from harness.executor import catalog_tests, run_catalog_test
+from harness.runner import HarnessRunner
+
+LIB_ROOT = Path(__file__).resolve().parent.parent / 'lib'
+HARNESSES = [
+    ('billing', backend_test.BillingBackendTester),
+    ('realtime', flutter_realtime_test.FlutterRealtimeBackendTester),
+]
+
+
+def catalog_for(root, scoring, files=None):
+    return compile_catalog({'root': str(root), 'tests': {'test_new_entry': {
+        'title': 'New Entry',
+        'files': files or {'model': 'model.dart', 'service': 'service.dart'},
+        'groups': {
+            'model_checks': {'patterns': {'invoice': 'class Invoice', 'payment': 'class Payment'}},
+            'service_checks': {'kind': 'regex', 'patterns': {'send': r'Future<\w+> send'}},
+        },
+        'scoring': scoring,
+    }}})
+
+
+def run(spec):
+    """(test name, status, details) that run_catalog_test logged for spec"""
+    results = []
+    run_catalog_test(spec, lambda test_name, status, message, details=None: results.append((test_name, status, details)))
+    [result] = results
+    return result
+
+
+def score(catalog):
+    return run(catalog.test('test_new_entry'))
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / 'model.dart').write_text('class Invoice {}')
+    (tmp_path / 'service.dart').write_text('class Invoice {}\nFuture<void> send() {}')
+    return tmp_path
+
+
+def test_all_needs_every_check_in_some_file(root):
+    assert score(catalog_for(root, {'mode': 'all', 'groups': ['service_checks']}))[1] == 'PASS'
+    title, status, details = score(catalog_for(root, {'mode': 'all', 'groups': ['model_checks', 'service_checks']}))
+    assert (title, status, details['missing']) == ('New Entry', 'FAIL', ['payment'])
+
+
+def test_any_needs_one_check(root):
+    assert score(catalog_for(root, {'mode': 'any', 'groups': ['model_checks'], 'files': ['model']}))[1] == 'PASS'
+    (root / 'model.dart').write_text('enum Status {}')
+    assert score(catalog_for(root, {'mode': 'any', 'groups': ['model_checks'], 'files': ['model']}))[1] == 'FAIL'
+
+
+def test_threshold_scores_every_file_and_check(root):
+    # model: invoice; service: invoice, send -> 3 of 6 pairs
+    groups = ['model_checks', 'service_checks']
+    _, status, details = score(catalog_for(root, {'mode': 'threshold', 'threshold': 50, 'groups': groups}))
+    assert (status, details['score']) == ('PASS', '50.0%')
+    _, status, details = score(catalog_for(root, {'mode': 'threshold', 'threshold': 60, 'groups': groups}))
+    assert (status, details['missing']) == ('WARNING', ['payment'])
+
+
+def test_missing_files_have_no_checks(root):
+    files = {'model': 'model.dart', 'extra': ['service.dart', 'missing.dart']}
+    _, status, details = score(catalog_for(root, {'mode': 'threshold', 'threshold': 50,
+                                                  'groups': ['service_checks'], 'files': ['extra']}, files))
+    assert (status, details['score'], details['missing_files']) == ('PASS', '50.0%', ['missing.dart'])
+
+
+@pytest.mark.parametrize('scoring, error', [
+    ({'mode': 'most', 'groups': ['model_checks']}, 'scoring mode'),
+    ({'mode': 'all', 'groups': []}, 'at least one group'),
+    ({'mode': 'all', 'groups': ['nope']}, 'unknown group nope'),
+    ({'mode': 'all', 'groups': ['model_checks'], 'files': ['nope']}, 'unknown file nope'),
+    ({'mode': 'threshold', 'groups': ['model_checks']}, 'threshold'),
+    ({'mode': 'any', 'threshold': 50, 'groups': ['model_checks']}, 'threshold'),
+])
+def test_bad_scoring_is_a_catalog_error(root, scoring, error):
+    with pytest.raises(CatalogError, match=error):
+        catalog_for(root, scoring)
+
+
+def test_entries_without_a_method_run_from_their_scoring(root):
+    catalog = catalog_for(root, {'mode': 'all', 'groups': ['service_checks']})
+
+    class Harness:
+        def __init__(self):
+            self.runner = HarnessRunner()
+
+        def log_result(self, test_name, status, message, details=None):
+            self.runner.record({'test': test_name, 'status': status}, f'{status} {test_name}')
+
+        def test_handled(self):
+            self.log_result('Handled', 'PASS', '')
+
+    harness = Harness()
+    methods = [harness.test_handled]
+    added = catalog_tests(catalog, methods, harness.log_result)
+    assert [test.__name__ for test in added] == ['test_new_entry']
+    assert catalog_tests(catalog, methods + added, harness.log_result) == []
+    harness.runner.run(methods + added, harness.log_result)
+    assert harness.runner.results == [{'test': 'Handled', 'status': 'PASS'}, {'test': 'New Entry', 'status': 'PASS'}]
+
+
+def test_unscored_entry_without_a_method_fails(root):
+    catalog = compile_catalog({'root': str(root), 'tests': {'test_new_entry': {'groups': {}}}})
+    assert score(catalog)[:2] == ('test_new_entry', 'FAIL')
+
+
+@pytest.mark.skipif(not LIB_ROOT.is_dir(), reason='Flutter sources not checked out')
+@pytest.mark.parametrize('name, tester_class', HARNESSES, ids=[name for name, _ in HARNESSES])
+def test_declared_scoring_agrees_with_the_hand_written_methods(name, tester_class, capsys):
+    catalog = load_catalog(CATALOG_DIR / f'{name}.json', root=str(LIB_ROOT), pickled=False)
+    tester = tester_class(catalog=catalog)
+    tester.run_all_tests()
+    by_hand = {result['test']: result['status'] for result in tester.test_results}
+    assert len(by_hand) == len(catalog.tests)
+    for spec in catalog.tests.values():
+        assert spec.scoring is not None, spec.name
+        assert run(spec)[1] == by_hand[spec.title], spec.name
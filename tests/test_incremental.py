@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from harness.incremental import IncrementalCache, code_fingerprint
+from harness.runner import HarnessRunner
+from harness.source_cache import source_cache
+
+
+class Harness:
+    """Test methods over a model file, a service file and an optional file"""
+
+    def __init__(self, root, incremental, crash=False):
+        self.root = root
+        self.crash = crash
+        self.runner = HarnessRunner(incremental=incremental)
+
+    def log_result(self, test_name, status, message):
+        self.runner.record({'test': test_name, 'status': status, 'message': message}, f'{status} {test_name}: {message}')
+
+    def test_model(self):
+        content = source_cache.read(str(self.root / 'model.dart'))
+        self.log_result('model', 'PASS' if 'class Invoice' in content else 'FAIL', content)
+
+    def test_service(self):
+        content = source_cache.read(str(self.root / 'service.dart'))
+        if self.crash:
+            raise RuntimeError('boom')
+        self.log_result('service', 'PASS', content)
+
+    def test_optional(self):
+        try:
+            content = source_cache.read(str(self.root / 'optional.dart'))
+        except FileNotFoundError:
+            self.log_result('optional', 'SKIP', 'missing')
+            return
+        self.log_result('optional', 'PASS', content)
+
+    def run(self):
+        self.runner.run([self.test_model, self.test_service, self.test_optional], self.log_result)
+        return self.runner
+
+
+@pytest.fixture
+def root(tmp_path):
+    sources = tmp_path / 'lib'
+    sources.mkdir()
+    (sources / 'model.dart').write_text('class Invoice {}')
+    (sources / 'service.dart').write_text('class BillingService {}')
+    return sources
+
+
+def run(root, cache_file, fingerprint='v1', crash=False):
+    runner = Harness(root, IncrementalCache(str(cache_file), fingerprint), crash).run()
+    return runner.replayed, [(result['test'], result['status'], result['message']) for result in runner.results]
+
+
+def test_unchanged_inputs_are_replayed_with_the_same_output(root, tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    replayed, first = run(root, cache_file)
+    assert replayed == []
+    replayed, second = run(root, cache_file)
+    assert replayed == ['test_model', 'test_service', 'test_optional']
+    assert second == first
+
+
+def test_changed_file_reruns_only_the_tests_that_read_it(root, tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    run(root, cache_file)
+    (root / 'model.dart').write_text('class Payment {} // renamed')
+    replayed, results = run(root, cache_file)
+    assert replayed == ['test_service', 'test_optional']
+    assert results[0] == ('model', 'FAIL', 'class Payment {} // renamed')
+
+
+def test_deleted_file_reruns_its_tests(root, tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    run(root, cache_file)
+    (root / 'service.dart').unlink()
+    replayed, results = run(root, cache_file)
+    assert 'test_service' not in replayed
+    assert results[1][0] == 'test_service' and results[1][1] == 'FAIL'
+
+
+def test_file_that_appears_later_reruns_its_tests(root, tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    run(root, cache_file)
+    assert json.loads(cache_file.read_text())['tests']['test_optional']['inputs'] == {
+        str(root / 'optional.dart'): None,
+    }
+    (root / 'optional.dart').write_text('class Extra {}')
+    replayed, results = run(root, cache_file)
+    assert replayed == ['test_model', 'test_service']
+    assert results[2] == ('optional', 'PASS', 'class Extra {}')
+
+
+def test_new_fingerprint_drops_the_whole_cache(root, tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    run(root, cache_file, fingerprint='v1')
+    replayed, _ = run(root, cache_file, fingerprint='v2')
+    assert replayed == []
+
+
+def test_crashed_tests_are_not_cached(root, tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    run(root, cache_file, crash=True)
+    assert 'test_service' not in json.loads(cache_file.read_text())['tests']
+    replayed, results = run(root, cache_file)
+    assert replayed == ['test_model', 'test_optional']
+    assert results[1] == ('service', 'PASS', 'class BillingService {}')
+
+
+def test_unreadable_cache_file_starts_empty(tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    cache_file.write_text('{not json')
+    assert IncrementalCache(str(cache_file), 'v1').tests == {}
+
+
+def test_fingerprint_covers_the_given_files_and_salt(tmp_path):
+    catalog = tmp_path / 'catalog.json'
+    catalog.write_text('{}')
+    before = code_fingerprint(str(catalog), salt='/app/lib')
+    assert code_fingerprint(str(catalog), salt='/app/lib') == before
+    assert code_fingerprint(str(catalog), salt='/other/lib') != before
+    catalog.write_text('{"tests": {}}')
+    assert code_fingerprint(str(catalog), salt='/app/lib') != before
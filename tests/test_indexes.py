@@ -0,0 +1,83 @@
+import asyncio
+import logging
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('motor')
+
+import server  # noqa: E402
+
+
+class Collection:
+    """index_information() from a fixed dict; create_indexes() recorded"""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.created = []
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_indexes(self, indexes):
+        self.created.extend(index.document['name'] for index in indexes)
+
+
+class Database(dict):
+    def __missing__(self, name):
+        collection = self[name] = Collection({'_id_': {'key': [('_id', 1)]}})
+        return collection
+
+
+def declared_as_existing(collection_name):
+    return {
+        index.document['name']: {'key': list(index.document['key'].items()),
+                                 **{option: index.document[option] for option in server.INDEX_OPTIONS
+                                    if option in index.document}}
+        for index in server.INDEX_REGISTRY[collection_name]
+    }
+
+
+def run_ensure(monkeypatch, collections):
+    db = Database(collections)
+    monkeypatch.setattr(server, 'db', db)
+    asyncio.run(server.ensure_indexes())
+    return db
+
+
+def test_missing_indexes_are_created(monkeypatch):
+    db = run_ensure(monkeypatch, {})
+    assert db['invoices'].created == [index.document['name'] for index in server.INDEX_REGISTRY['invoices']]
+
+
+def test_matching_indexes_are_left_alone(monkeypatch, caplog):
+    invoices = Collection(declared_as_existing('invoices'))
+    with caplog.at_level(logging.WARNING, logger='server'):
+        run_ensure(monkeypatch, {'invoices': invoices})
+    assert invoices.created == []
+    assert not [record for record in caplog.records if 'invoices' in record.getMessage()]
+
+
+@pytest.mark.parametrize('collection_name, name, option', [
+    ('invoice_lines', 'id_unique', 'unique'),
+    ('invoices', 'contract_period_unique', 'partialFilterExpression'),
+])
+def test_options_missing_from_an_existing_index_are_drift(monkeypatch, caplog, collection_name, name, option):
+    existing = declared_as_existing(collection_name)
+    del existing[name][option]
+    collection = Collection(existing)
+    with caplog.at_level(logging.WARNING, logger='server'):
+        run_ensure(monkeypatch, {collection_name: collection})
+    assert collection.created == []
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(f'{collection_name}.{name} differs' in message and option in message for message in messages)
+
+
+def test_index_drift_compares_keys_and_options():
+    declared = {'key': {'a': 1}, 'name': 'a', 'expireAfterSeconds': 60}
+    assert server.index_drift(declared, {'key': [('a', 1)], 'expireAfterSeconds': 60}) == []
+    assert server.index_drift(declared, {'key': [('a', -1)], 'sparse': True}) == [
+        "key existing=[('a', -1)] declared=[('a', 1)]",
+        'sparse existing=True declared=False',
+        'expireAfterSeconds existing=None declared=60',
+    ]
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('fastapi')
+mongomock_motor = pytest.importorskip('mongomock_motor')
+
+import billing  # noqa: E402
+import server  # noqa: E402
+
+MAY = datetime(2024, 5, 20)
+
+
+class YieldingCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        return await self._cursor.__anext__()
+
+
+class Yielding:
+    """Collection proxy that lets other tasks run before every call and fetch, like a network round trip"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        if name == 'find':
+            return lambda *args, **kwargs: YieldingCursor(method(*args, **kwargs))
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0)
+            return await method(*args, **kwargs)
+        return call
+
+
+class Database:
+    def __init__(self, db):
+        self.invoices = Yielding(db.invoices)
+        self.invoice_counters = Yielding(db.invoice_counters)
+
+
+@pytest.fixture
+def db():
+    db = mongomock_motor.AsyncMongoMockClient()['invoice_numbers_test']
+    asyncio.run(db.invoice_counters.create_indexes(server.INDEX_REGISTRY['invoice_counters']))
+    return Database(db)
+
+
+def test_concurrent_callers_get_distinct_blocks(db):
+    async def allocate(count, delay):
+        for _ in range(delay):
+            await asyncio.sleep(0)
+        return await billing.allocate_invoice_numbers(db, 't1', count, now=MAY)
+
+    async def allocate_all():
+        await db.invoices.insert_one({'tenant_id': 't1', 'invoice_number': 'INV-202405-003'})
+        # Staggered starts: later callers seed the month while earlier ones already increment it
+        return await asyncio.gather(*(allocate(count, delay) for delay, count in enumerate((1, 3, 2, 5, 1, 4))))
+
+    blocks = asyncio.run(allocate_all())
+    numbers = [number for block in blocks for number in block.numbers]
+    assert sorted(numbers) == [f'INV-202405-{sequence:03d}' for sequence in range(4, 20)]
+    for block in blocks:
+        assert block.last_sequence - block.first_sequence + 1 == len(block.numbers)
+
+
+def test_month_continues_after_existing_numbers(db):
+    async def allocate():
+        await db.invoices.insert_many([
+            {'tenant_id': 't1', 'invoice_number': 'INV-202405-002'},
+            {'tenant_id': 't1', 'invoice_number': 'INV-202405-007'},
+            {'tenant_id': 't1', 'invoice_number': 'INV-202404-031'},
+            {'tenant_id': 't2', 'invoice_number': 'INV-202405-050'},
+        ])
+        first = await billing.allocate_invoice_numbers(db, 't1', 2, now=MAY)
+        second = await billing.allocate_invoice_numbers(db, 't1', now=MAY)
+        other_tenant = await billing.allocate_invoice_numbers(db, 't3', now=MAY)
+        return first, second, other_tenant
+
+    first, second, other_tenant = asyncio.run(allocate())
+    assert first.numbers == ['INV-202405-008', 'INV-202405-009']
+    assert second.numbers == ['INV-202405-010']
+    assert other_tenant.numbers == ['INV-202405-001']
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('fastapi')
+mongomock_motor = pytest.importorskip('mongomock_motor')
+
+import kpis  # noqa: E402
+
+INCREMENTAL = ('open_requests', 'unpaid_invoices', 'outstanding_amount')
+MAY = datetime(2024, 5, 3)
+JUNE = datetime(2024, 6, 1)
+
+
+@pytest.fixture(autouse=True)
+def mongomock_is_before(monkeypatch):
+    # mongomock has no $type expression; dates sort after null, numbers and strings
+    monkeypatch.setattr(kpis, 'is_before', lambda field, moment: {
+        '$and': [{'$gte': [field, datetime(1, 1, 1)]}, {'$lt': [field, moment]}]})
+
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient()['kpis_test']
+
+
+class Tenant:
+    """Writes source documents and applies the matching incremental change"""
+
+    def __init__(self, db, tenant_id='t1'):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    async def save(self, collection: str, doc: dict):
+        doc = {**doc, 'tenant_id': self.tenant_id}
+        old = await self.db[collection].find_one_and_replace({'id': doc['id']}, doc, upsert=True)
+        apply = kpis.apply_request_change if collection == 'requests' else kpis.apply_invoice_change
+        await apply(self.db, self.tenant_id, old, doc)
+
+    async def delete(self, collection: str, doc_id: str):
+        old = await self.db[collection].find_one_and_delete({'id': doc_id})
+        apply = kpis.apply_request_change if collection == 'requests' else kpis.apply_invoice_change
+        await apply(self.db, self.tenant_id, old, None)
+
+
+async def counters(db, tenant_id='t1') -> dict:
+    snapshot = await db.kpi_snapshots.find_one({'tenant_id': tenant_id}) or {}
+    values = {counter: snapshot.get(counter, 0) for counter in INCREMENTAL}
+    values['paid_revenue'] = {month: total for month, total in snapshot.get('paid_revenue', {}).items() if total}
+    return values
+
+
+async def incremental_then_reconciled(db, tenant_id='t1'):
+    incremental = await counters(db, tenant_id)
+    await kpis.reconcile(db)
+    return incremental, await counters(db, tenant_id)
+
+
+def test_request_status_transitions(db):
+    async def scenario():
+        tenant = Tenant(db)
+        await tenant.save('requests', {'id': 'r1', 'status': 'new'})
+        await tenant.save('requests', {'id': 'r2', 'status': 'new'})
+        await tenant.save('requests', {'id': 'r3', 'status': 'triaged'})
+        await tenant.save('requests', {'id': 'r1', 'status': 'assigned'})
+        await tenant.save('requests', {'id': 'r2', 'status': 'completed'})
+        await tenant.save('requests', {'id': 'r2', 'status': 'on_site'})
+        await tenant.save('requests', {'id': 'r3', 'status': 'cancelled'})
+        await tenant.delete('requests', 'r1')
+        await tenant.save('requests', {'id': 'r4', 'status': 'en_route'})
+        return await incremental_then_reconciled(db)
+
+    incremental, reconciled = asyncio.run(scenario())
+    assert incremental['open_requests'] == 2
+    assert incremental == reconciled
+
+
+def test_invoice_status_transitions(db):
+    async def scenario():
+        tenant = Tenant(db)
+        await tenant.save('invoices', {'id': 'i1', 'status': 'draft', 'total': 100})
+        await tenant.save('invoices', {'id': 'i1', 'status': 'sent', 'total': 100})
+        await tenant.save('invoices', {'id': 'i2', 'status': 'pending', 'total': 40})
+        await tenant.save('invoices', {'id': 'i2', 'status': 'pending', 'total': 55})
+        await tenant.save('invoices', {'id': 'i3', 'status': 'sent', 'total': 10})
+        await tenant.save('invoices', {'id': 'i3', 'status': 'void', 'total': 10})
+        await tenant.save('invoices', {'id': 'i1', 'status': 'paid', 'total': 100, 'updated_at': MAY})
+        return await incremental_then_reconciled(db)
+
+    incremental, reconciled = asyncio.run(scenario())
+    assert incremental == {'open_requests': 0, 'unpaid_invoices': 1, 'outstanding_amount': 55,
+                           'paid_revenue': {'2024-05': 100}}
+    assert incremental == reconciled
+
+
+def test_paid_revenue_moves_between_months(db):
+    async def scenario():
+        tenant = Tenant(db)
+        await tenant.save('invoices', {'id': 'i1', 'status': 'paid', 'total': 100, 'updated_at': MAY})
+        await tenant.save('invoices', {'id': 'i2', 'status': 'paid', 'total': 30, 'updated_at': MAY})
+        await tenant.save('invoices', {'id': 'i1', 'status': 'paid', 'total': 120, 'updated_at': JUNE})
+        await tenant.save('invoices', {'id': 'i2', 'status': 'sent', 'total': 30})
+        return await incremental_then_reconciled(db)
+
+    incremental, reconciled = asyncio.run(scenario())
+    assert incremental['paid_revenue'] == {'2024-06': 120}
+    assert incremental == reconciled
+
+
+def test_reconcile_zeroes_tenants_with_nothing_open(db):
+    async def scenario():
+        await Tenant(db, 't1').save('requests', {'id': 'r1', 'status': 'new'})
+        stale = Tenant(db, 't2')
+        await stale.save('requests', {'id': 'r2', 'status': 'new'})
+        await stale.save('invoices', {'id': 'i2', 'status': 'sent', 'total': 70})
+        # Source rows removed without going through the incremental path
+        await db.requests.delete_many({'tenant_id': 't2'})
+        await db.invoices.delete_many({'tenant_id': 't2'})
+        before = await counters(db, 't2')
+        assert await kpis.reconcile(db) == 1
+        return before, await counters(db, 't1'), await counters(db, 't2')
+
+    before, kept, zeroed = asyncio.run(scenario())
+    assert before['open_requests'] == 1 and before['outstanding_amount'] == 70
+    assert kept['open_requests'] == 1
+    assert zeroed == {'open_requests': 0, 'unpaid_invoices': 0, 'outstanding_amount': 0, 'paid_revenue': {}}
@@ -0,0 +1,104 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from harness.catalog import CATALOG_DIR, CatalogError, compile_catalog, load_catalog
+from harness.matcher import Matcher, compile_checks
+
+LIB_ROOT = Path(__file__).resolve().parent.parent / 'lib'
+CATALOGS = sorted(CATALOG_DIR.glob('*.json'))
+
+
+def test_literals_and_regexes_match_like_in_and_re_search():
+    text = 'class Invoice {\n  final int totalPaisa;\n}\n'
+    matcher = Matcher(
+        literals={'class': 'class Invoice', 'missing': 'class Payment', 'empty': ''},
+        regexes={'total': r'final\s+int\s+total', 'multiline': (r'^}$', re.MULTILINE), 'dotall': r'\{.*\}'},
+    )
+    assert matcher.scan(text) == {'class', 'empty', 'total', 'multiline'}
+    assert Matcher(regexes={'dotall': r'\{.*\}'}, flags=re.DOTALL).scan(text) == {'dotall'}
+
+
+def test_shared_patterns_report_every_name():
+    matcher = Matcher(literals={('a', 'x'): 'Invoice', ('b', 'y'): 'Invoice', ('b', 'z'): 'Payment'})
+    assert matcher.scan('Invoice') == {('a', 'x'), ('b', 'y')}
+
+
+def test_overlapping_regexes_are_all_found():
+    # An alternation reports one match per position; each regex is searched on its own
+    assert compile_checks(regexes=['draft.*sent', 'sent', 'aft']).scan('draft sent') == {'draft.*sent', 'sent', 'aft'}
+
+
+def test_backreferences():
+    catalog = compile_catalog({'tests': {'t': {'groups': {
+        'first': {'kind': 'regex', 'patterns': {'doubled': r'(\w+) \1'}},
+        'second': {'kind': 'regex', 'patterns': {'quoted': r'(["\']).*?\1', 'doubled': r'(\w+)-\1'}},
+    }}}})
+    spec = catalog.test('t')
+    assert spec.scan('paid paid', 'first', 'second') == {'first': {'doubled'}, 'second': set()}
+    assert spec.scan("'x' a-a", 'first', 'second') == {'first': set(), 'second': {'quoted', 'doubled'}}
+    assert compile_checks(regexes=[r'(a)\1']).scan('aa') == {r'(a)\1'}
+
+
+def test_bad_regex_is_a_catalog_error():
+    with pytest.raises(CatalogError):
+        compile_catalog({'tests': {'t': {'groups': {'g': {'kind': 'regex', 'patterns': ['(']}}}}})
+
+
+def test_scan_keeps_groups_apart_when_names_repeat():
+    catalog = compile_catalog({'tests': {'t': {'groups': {
+        'literal': {'patterns': {'check': 'Invoice'}},
+        'regex': {'kind': 'regex', 'flags': ['IGNORECASE'], 'patterns': {'check': 'payment'}},
+    }}}})
+    spec = catalog.test('t')
+    assert spec.scan('Invoice', 'literal', 'regex') == {'literal': {'check'}, 'regex': set()}
+    assert spec.scan('PAYMENT', 'literal', 'regex') == {'literal': set(), 'regex': {'check'}}
+    assert spec.scan('PAYMENT', 'regex') == {'regex': {'check'}}
+
+
+def naive(group, content):
+    """What the harnesses did before the catalogs: one `in` or re.search per check"""
+    if group.kind == 'literal':
+        return {name for name, pattern in group.named.items() if pattern in content}
+    return {name for name, pattern in group.named.items() if re.search(pattern, content, group.flags)}
+
+
+def catalog_files(spec):
+    for key in spec.files:
+        paths = spec.path(key)
+        for path in paths if isinstance(paths, list) else [paths]:
+            try:
+                with open(path) as f:
+                    yield path, f.read()
+            except FileNotFoundError:
+                continue
+
+
+@pytest.mark.skipif(not LIB_ROOT.is_dir(), reason='Flutter sources not checked out')
+@pytest.mark.parametrize('catalog_path', CATALOGS, ids=[path.stem for path in CATALOGS])
+def test_catalogs_match_the_naive_checks_on_lib(catalog_path):
+    catalog = load_catalog(catalog_path, root=str(LIB_ROOT), pickled=False)
+    compared = 0
+    for spec in catalog.tests.values():
+        group_names = tuple(spec.groups)
+        for path, content in catalog_files(spec):
+            found = spec.scan(content, *group_names)
+            for name, group in spec.groups.items():
+                expected = naive(group, content)
+                assert found[name] == expected, (spec.name, name, path)
+                assert group.scan(content) == expected, (spec.name, name, path)
+                compared += 1
+    assert compared
+
+
+def test_pickled_catalog_scans_the_same(tmp_path):
+    source = tmp_path / 'small.json'
+    source.write_text(json.dumps({'tests': {'t': {'groups': {
+        'g': {'kind': 'regex', 'flags': ['IGNORECASE'], 'patterns': {'paid': r'status\s*=\s*paid'}},
+    }}}}))
+    built = load_catalog(source)
+    cached = load_catalog(source)
+    assert (tmp_path / 'small.json.pickle').exists()
+    assert built.test('t').scan('STATUS = PAID', 'g') == cached.test('t').scan('STATUS = PAID', 'g') == {'g': {'paid'}}
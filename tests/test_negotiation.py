@@ -0,0 +1,134 @@
+import asyncio
+import gzip
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('motor')
+
+from starlette.requests import Request  # noqa: E402
+
+import server  # noqa: E402
+from compression import CompressionMiddleware, choose_encoding, parse_qvalues  # noqa: E402
+
+BODY = b'{"status": "ok"}' * 200
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('*', 'zstd'),
+    ('*;q=0.5, zstd;q=0', 'br'),
+    ('gzip;q=1.0, br;q=0.5, zstd;q=0.2', 'gzip'),
+    ('zstd, br, gzip', 'zstd'),
+    ('br;q=bogus, gzip', 'gzip'),
+])
+def test_choose_encoding(header, expected):
+    available = {'gzip': None, 'br': None, 'zstd': None}
+    assert choose_encoding(header, available) == expected
+
+
+def test_unavailable_codecs_are_skipped():
+    assert choose_encoding('zstd, br;q=0.9, gzip;q=0.1', {'gzip': None}) == 'gzip'
+
+
+def test_parse_qvalues_keeps_media_type_parameters_out_of_the_key():
+    assert parse_qvalues('application/msgpack;q=0, Application/JSON; charset=utf-8') == {
+        'application/msgpack': 0.0,
+        'application/json': 1.0,
+    }
+
+
+def respond(body: bytes, status: int = 200, content_type: bytes = b'application/json', chunks: int = 1):
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+        ]})
+        size = -(-len(body) // chunks) if body else 0
+        for index in range(chunks):
+            part = body[index * size:(index + 1) * size]
+            await send({'type': 'http.response.body', 'body': part, 'more_body': index < chunks - 1})
+    return app
+
+
+def call(app, method: str = 'GET', accept_encoding: bytes = b'gzip', minimum_size: int = 0):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'headers': [(b'accept-encoding', accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, None, send))
+    start, bodies = messages[0], messages[1:]
+    return dict(start['headers']), b''.join(message['body'] for message in bodies)
+
+
+def test_json_is_compressed_with_the_chosen_codec():
+    headers, body = call(respond(BODY))
+    assert headers[b'content-encoding'] == b'gzip'
+    assert headers[b'vary'] == b'Accept-Encoding'
+    assert int(headers[b'content-length']) == len(body)
+    assert gzip.decompress(body) == BODY
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk():
+    headers, body = call(respond(BODY, content_type=b'application/x-ndjson', chunks=4))
+    assert headers[b'content-encoding'] == b'gzip'
+    assert b'content-length' not in headers
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize('method, status, body', [
+    ('GET', 204, b''),
+    ('GET', 304, b''),
+    ('GET', 200, b''),
+    ('HEAD', 200, b''),
+])
+def test_empty_bodies_are_never_compressed(method, status, body):
+    headers, sent = call(respond(body, status=status), method=method)
+    assert b'content-encoding' not in headers
+    assert sent == b''
+
+
+def test_small_and_binary_bodies_pass_through():
+    headers, body = call(respond(b'{}'), minimum_size=1024)
+    assert b'content-encoding' not in headers
+    assert headers[b'vary'] == b'Accept-Encoding'
+    assert body == b'{}'
+
+    headers, body = call(respond(BODY, content_type=b'image/png'))
+    assert b'content-encoding' not in headers
+    assert body == BODY
+
+
+def test_identity_only_client_gets_the_body_untouched():
+    headers, body = call(respond(BODY), accept_encoding=b'identity')
+    assert b'content-encoding' not in headers
+    assert body == BODY
+
+
+def request_accepting(accept: str) -> Request:
+    return Request({'type': 'http', 'method': 'GET', 'headers': [(b'accept', accept.encode())]})
+
+
+@pytest.mark.parametrize('accept, expected', [
+    ('', 'application/json'),
+    ('application/json', 'application/json'),
+    ('*/*', 'application/json'),
+    ('application/msgpack', server.MSGPACK_MEDIA_TYPE),
+    ('application/msgpack, application/json', server.MSGPACK_MEDIA_TYPE),
+    ('application/msgpack;q=0', 'application/json'),
+    ('application/msgpack;q=0, */*', 'application/json'),
+    ('application/msgpack;q=0.5, application/json', 'application/json'),
+    ('application/json;q=0.5, application/msgpack', server.MSGPACK_MEDIA_TYPE),
+    ('application/msgpack;q=0.8, */*;q=0.1', server.MSGPACK_MEDIA_TYPE),
+    ('application/msgpack;q=0.5, application/json;q=0.1, */*', server.MSGPACK_MEDIA_TYPE),
+])
+def test_response_media_type_honours_q_values(accept, expected):
+    if server.msgpack is None and expected == server.MSGPACK_MEDIA_TYPE:
+        pytest.skip('msgpack is not installed')
+    assert server.response_media_type(request_accepting(accept)) == expected
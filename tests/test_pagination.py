@@ -0,0 +1,70 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('fastapi')
+
+from fastapi import HTTPException  # noqa: E402
+
+from pagination import decode_cursor, encode_cursor, keyset_filter  # noqa: E402
+
+
+@pytest.mark.parametrize('timestamp, id', [
+    (datetime(2025, 1, 25, 12, 0, 0), 'a1b2'),
+    (datetime(2025, 1, 25, 12, 0, 0, 123456), '7f1c9e6a-2d4b-4c1e-9a3f-0b8e5d6c7a21'),
+    (datetime(1999, 12, 31, 23, 59, 59), 'id with spaces & symbols/+='),
+])
+def test_cursor_round_trip(timestamp, id):
+    cursor = encode_cursor(timestamp, id)
+    assert '=' not in cursor  # padding is stripped to keep query strings clean
+    assert decode_cursor(cursor) == (timestamp, id)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-base64!',
+    base64.urlsafe_b64encode(b'not json').decode(),
+    base64.urlsafe_b64encode(b'{"id": "x"}').decode(),
+    base64.urlsafe_b64encode(b'{"ts": "yesterday", "id": "x"}').decode(),
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_keyset_filter_selects_rows_strictly_after_the_cursor():
+    timestamp = datetime(2025, 1, 25, 12, 0, 0)
+    cursor = encode_cursor(timestamp, 'm')
+    assert keyset_filter(cursor, 'created_at') == {'$or': [
+        {'created_at': {'$lt': timestamp}},
+        {'created_at': timestamp, 'id': {'$lt': 'm'}},
+    ]}
+
+
+def test_no_cursor_means_first_page():
+    assert keyset_filter(None, 'timestamp') == {}
+    assert keyset_filter('', 'timestamp') == {}
+
+
+def test_pages_walk_every_row_once():
+    """Paging a sorted list with the cursor filter visits each row exactly once"""
+    rows = [
+        {'timestamp': datetime(2025, 1, 1, hour), 'id': f'{index:02d}'}
+        for hour in range(3) for index in range(4)  # ties on timestamp
+    ]
+    rows.sort(key=lambda row: (row['timestamp'], row['id']), reverse=True)
+
+    def after(row, cursor):
+        timestamp, id = decode_cursor(cursor)
+        return row['timestamp'] < timestamp or (row['timestamp'] == timestamp and row['id'] < id)
+
+    seen, cursor = [], None
+    while True:
+        page = [row for row in rows if cursor is None or after(row, cursor)][:5]
+        seen.extend(page)
+        if len(page) < 5:
+            break
+        cursor = encode_cursor(page[-1]['timestamp'], page[-1]['id'])
+    assert seen == rows
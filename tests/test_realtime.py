@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('fastapi')
+
+from pymongo.errors import OperationFailure  # noqa: E402
+
+import realtime  # noqa: E402
+from realtime import RealtimeHub, Subscriber  # noqa: E402
+
+
+class IdleStream:
+    resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.Event().wait()
+
+
+class Database:
+    """watch() fails with ``error`` once, then opens a stream that stays quiet"""
+
+    def __init__(self, error):
+        self.error = error
+        self.resumed_after = []
+        self.reopened = asyncio.Event()
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        self.resumed_after.append(resume_after)
+        if len(self.resumed_after) == 1:
+            raise self.error
+        self.reopened.set()
+        return IdleStream()
+
+
+def drain(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait())
+    return messages
+
+
+@pytest.mark.parametrize('code', [260, 286])
+def test_lost_history_restarts_the_stream_with_a_resync(code):
+    async def scenario():
+        hub = RealtimeHub()
+        subscriber = Subscriber()
+        hub.subscribe(subscriber, 'pm_visits', 't1')
+        hub.subscribe(subscriber, 'requests', 't1')
+        hub.resume_token = {'_data': 'old'}
+        hub._recent.append(('requests_t1', ('old', '{}')))
+        hub.add_event('requests', 't1', {'table': 'requests'}, token='pending')
+        db = Database(OperationFailure('resume point lost', code=code))
+        hub.start(db)
+        await asyncio.wait_for(db.reopened.wait(), 1)
+        await hub.stop()
+        return hub, db, drain(subscriber)
+
+    hub, db, messages = asyncio.run(scenario())
+    assert db.resumed_after == [{'_data': 'old'}, None]
+    assert hub.resume_token is None
+    assert hub.replay_after('old', ['requests_t1']) is None
+    assert sorted(json.loads(data)['table'] for _, data in messages) == ['pm_visits', 'requests']
+    assert all(event_id is None and json.loads(data)['type'] == 'resync' for event_id, data in messages)
+
+
+def test_other_stream_errors_keep_the_resume_token(monkeypatch):
+    async def scenario():
+        sleeps = []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+        monkeypatch.setattr(realtime.asyncio, 'sleep', sleep)
+        hub = RealtimeHub()
+        subscriber = Subscriber()
+        hub.subscribe(subscriber, 'requests', 't1')
+        hub.resume_token = {'_data': 'kept'}
+        db = Database(OperationFailure('not primary', code=10107))
+        hub.start(db)
+        await asyncio.wait_for(db.reopened.wait(), 1)
+        await hub.stop()
+        return db, sleeps, drain(subscriber)
+
+    db, sleeps, messages = asyncio.run(scenario())
+    assert db.resumed_after == [{'_data': 'kept'}, {'_data': 'kept'}]
+    assert sleeps == [1.0]
+    assert messages == []
+
+
+class CatchUpStream(IdleStream):
+    """try_next() over (token, table, id) changes, then None"""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.resume_token = None
+
+    async def try_next(self):
+        if not self.changes:
+            return None
+        token, table, doc_id = self.changes.pop(0)
+        self.resume_token = {'_data': token}
+        return {'ns': {'coll': table}, 'operationType': 'insert',
+                'fullDocument': {'id': doc_id, 'tenant_id': 't1'}}
+
+
+class CatchUpDatabase:
+    def __init__(self, changes):
+        self.changes = changes
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        return CatchUpStream(self.changes)
+
+
+def test_catch_up_flushes_every_table_before_moving_the_id_on(monkeypatch):
+    monkeypatch.setattr(realtime, 'MAX_BATCH_EVENTS', 2)
+    changes = [('t1', 'pm_visits', 'p1'), ('t2', 'requests', 'r1'), ('t3', 'pm_visits', 'p2'),
+               ('t4', 'invoices', 'i1'), ('t5', 'requests', 'r2')]
+
+    async def collect():
+        seen = set()
+        messages = [message async for message in realtime.catch_up(
+            CatchUpDatabase(changes), 't1', ['requests', 'pm_visits', 'invoices'], 't0', seen)]
+        return messages, seen
+
+    messages, seen = asyncio.run(collect())
+    batches = [(event_id, json.loads(data)) for event_id, data in messages]
+    assert [(event_id, batch['table'], [event['new']['id'] for event in batch['events']])
+            for event_id, batch in batches] == [
+        ('t0', 'pm_visits', ['p1', 'p2']),
+        ('t3', 'requests', ['r1']),
+        ('t3', 'invoices', ['i1']),
+        ('t5', 'requests', ['r2']),
+    ]
+    assert all(batch['id'] == event_id for event_id, batch in batches)
+    assert seen == {'t1', 't2', 't3', 't4', 't5'}
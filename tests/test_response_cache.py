@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('motor')
+
+from server import ResponseCache  # noqa: E402
+
+
+class SlowLoader:
+    """Loader that blocks until released, counting its calls"""
+
+    def __init__(self, value: bytes = b'value'):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        loader = SlowLoader()
+        waiters = [asyncio.create_task(cache.get_or_load(('k',), loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*waiters)
+        return cache, loader, results
+
+    cache, loader, results = asyncio.run(scenario())
+    assert results == [b'value'] * 5
+    assert loader.calls == 1
+    assert cache.misses == 1
+    assert cache.coalesced == 4
+
+
+def test_cancelled_leader_does_not_cancel_the_waiters():
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        loader = SlowLoader()
+        leader = asyncio.create_task(cache.get_or_load(('k',), loader))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_load(('k',), loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # The client that started the load disconnects
+        leader.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*followers)
+        cached = await cache.get_or_load(('k',), loader)
+        return leader, results, cached, loader
+
+    leader, results, cached, loader = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert results == [b'value'] * 3
+    assert cached == b'value'
+    assert loader.calls == 1
+
+
+def test_hit_after_load():
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        loader = SlowLoader()
+        loader.release.set()
+        await cache.get_or_load(('k',), loader)
+        await cache.get_or_load(('k',), loader)
+        return cache, loader
+
+    cache, loader = asyncio.run(scenario())
+    assert loader.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_invalidation_during_load_is_not_cached():
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        stale = SlowLoader(b'stale')
+        pending = asyncio.create_task(cache.get_or_load(('k',), stale))
+        await asyncio.sleep(0)
+        # A write lands while the read is still running
+        cache.invalidate()
+        stale.release.set()
+        first = await pending
+
+        fresh = SlowLoader(b'fresh')
+        fresh.release.set()
+        second = await cache.get_or_load(('k',), fresh)
+        return first, second, fresh
+
+    first, second, fresh = asyncio.run(scenario())
+    assert first == b'stale'  # the caller that started the load still gets it
+    assert second == b'fresh'
+    assert fresh.calls == 1
+
+
+def test_load_after_invalidation_does_not_join_old_flight():
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        old = SlowLoader(b'old')
+        pending = asyncio.create_task(cache.get_or_load(('k',), old))
+        await asyncio.sleep(0)
+        cache.invalidate()
+
+        new = SlowLoader(b'new')
+        new.release.set()
+        value = await cache.get_or_load(('k',), new)
+        old.release.set()
+        await pending
+        return value, cache
+
+    value, cache = asyncio.run(scenario())
+    assert value == b'new'
+    assert cache.coalesced == 0
+
+
+def test_failed_load_propagates_to_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def failing() -> bytes:
+            await release.wait()
+            raise RuntimeError('mongo down')
+
+        waiters = [asyncio.create_task(cache.get_or_load(('k',), failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()['size'] == 0
+
+
+def test_expired_entries_are_reloaded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('server.time.monotonic', lambda: now[0])
+
+    async def scenario():
+        cache = ResponseCache(max_entries=8, ttl_seconds=5)
+        loader = SlowLoader()
+        loader.release.set()
+        await cache.get_or_load(('k',), loader)
+        now[0] += 6
+        await cache.get_or_load(('k',), loader)
+        return cache, loader
+
+    cache, loader = asyncio.run(scenario())
+    assert loader.calls == 2
+    assert cache.expirations == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def scenario():
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+
+        async def load_key(key):
+            async def loader():
+                return key.encode()
+            return await cache.get_or_load((key,), loader)
+
+        await load_key('a')
+        await load_key('b')
+        await load_key('a')  # refresh a, so b is the oldest
+        await load_key('c')
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.evictions == 1
+    assert ('a',) in cache._entries and ('c',) in cache._entries
+    assert ('b',) not in cache._entries
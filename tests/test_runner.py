@@ -0,0 +1,58 @@
+import pytest
+
+from harness.runner import HarnessRunner
+from harness.source_cache import source_cache
+
+
+class Harness:
+    """Three test methods reading two files, like the Dart harnesses"""
+
+    def __init__(self, paths, jobs=1, pool='thread'):
+        self.paths = paths
+        self.runner = HarnessRunner(jobs, pool)
+
+    def log_result(self, test_name, status, message):
+        self.runner.record({'test': test_name, 'status': status, 'message': message}, f'{status} {test_name}')
+
+    def test_first(self):
+        self.log_result('first', 'PASS', source_cache.read(self.paths[0]))
+
+    def test_both(self):
+        self.log_result('both', 'PASS', source_cache.read(self.paths[0]) + source_cache.read(self.paths[1]))
+
+    def test_broken(self):
+        raise RuntimeError('boom')
+
+    def run(self):
+        self.runner.run([self.test_first, self.test_both, self.test_broken], self.log_result)
+        return self.runner
+
+
+@pytest.fixture
+def paths(tmp_path):
+    created = []
+    for name, text in (('a.dart', 'A'), ('b.dart', 'B')):
+        path = tmp_path / name
+        path.write_text(text)
+        created.append(str(path))
+    return created
+
+
+@pytest.mark.parametrize('jobs, pool', [(1, 'thread'), (3, 'thread'), (2, 'process')])
+def test_results_keep_declaration_order(paths, jobs, pool, capsys):
+    runner = Harness(paths, jobs, pool).run()
+    assert [(result['test'], result['status']) for result in runner.results] == [
+        ('first', 'PASS'), ('both', 'PASS'), ('test_broken', 'FAIL'),
+    ]
+    assert runner.results[1]['message'] == 'AB'
+    assert [name for name, _ in runner.timings] == ['test_first', 'test_both', 'test_broken']
+    assert 'RuntimeError: boom' in capsys.readouterr().err
+
+
+def test_process_runs_report_the_workers_source_reads(paths):
+    runner = Harness(paths, jobs=2, pool='process').run()
+    stats = runner.source_stats()
+    assert stats['files'] == 2
+    # a.dart is read twice; the second read is a hit only if one worker ran both tests
+    assert stats['hits'] + stats['misses'] == 3
+    assert stats['misses'] >= 2
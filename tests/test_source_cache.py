@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from harness.source_cache import SourceCache
+
+
+def test_reads_match_text_mode_open(tmp_path):
+    path = tmp_path / 'a.dart'
+    path.write_bytes(b'class A {}\r\nclass B {}\rclass C {}\n')
+    cache = SourceCache()
+    with open(path) as f:
+        assert cache.read(str(path)) == f.read()
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / 'a.dart'
+    path.write_text('one')
+    cache = SourceCache()
+    assert cache.read(str(path)) == 'one'
+    path.write_text('three')
+    assert cache.read(str(path)) == 'three'
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_concurrent_readers_load_a_file_once(tmp_path):
+    path = tmp_path / 'a.dart'
+    path.write_text('class A {}')
+    cache = SourceCache()
+    loads = []
+    load = cache._load
+
+    def slow_load(*args):
+        loads.append(args)
+        time.sleep(0.05)
+        return load(*args)
+
+    cache._load = slow_load
+    barrier = threading.Barrier(8)
+
+    def read():
+        barrier.wait()
+        return cache.read(str(path))
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: read(), range(8)))
+
+    assert results == ['class A {}'] * 8
+    assert len(loads) == 1
+    assert (cache.hits, cache.misses) == (7, 1)
+
+
+def test_track_records_missing_files(tmp_path):
+    cache = SourceCache()
+    missing = os.path.join(tmp_path, 'missing.dart')
+    with cache.track() as reads:
+        assert cache.digest(missing) is None
+    assert reads == {missing: None}
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('fastapi')
+mongomock_motor = pytest.importorskip('mongomock_motor')
+
+from fastapi import HTTPException  # noqa: E402
+
+import server  # noqa: E402
+
+
+class BulkRequest:
+    """Just enough of a Request for create_status_checks_bulk"""
+
+    def __init__(self, body: bytes, content_type: str):
+        self._body = body
+        self.headers = {'content-type': content_type}
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+class FailingInserts:
+    """status_checks proxy whose insert_many raises after the first call"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.calls = 0
+
+    async def insert_many(self, docs, **kwargs):
+        self.calls += 1
+        if self.calls > 1:
+            raise RuntimeError('connection reset')
+        return await self._collection.insert_many(docs, **kwargs)
+
+
+class Database:
+    def __init__(self, status_checks):
+        self.status_checks = status_checks
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock_motor.AsyncMongoMockClient()['status_bulk_test']
+    monkeypatch.setattr(server, 'db', db)
+    return db
+
+
+def post(body: bytes, content_type: str = 'application/x-ndjson'):
+    return asyncio.run(server.create_status_checks_bulk(BulkRequest(body, content_type)))
+
+
+def test_malformed_ndjson_line_fails_only_that_item(db):
+    result = post(b'{"client_name":"a"}\nnot json\n\n{"client_name":"c"}\n{"wrong": 1}\n')
+    assert (result.inserted, result.failed) == (2, 2)
+    errors = {item.index: item.error for item in result.results if item.error}
+    assert set(errors) == {1, 3}
+    assert errors[1].startswith('Malformed JSON')
+    stored = asyncio.run(db.status_checks.find({}, {'_id': 0, 'client_name': 1}).to_list(None))
+    assert sorted(doc['client_name'] for doc in stored) == ['a', 'c']
+
+
+def test_malformed_json_array_is_still_a_400(db):
+    with pytest.raises(HTTPException) as error:
+        post(b'[{"client_name":"a"},', 'application/json')
+    assert error.value.status_code == 400
+
+
+def test_cache_is_invalidated_when_a_later_chunk_fails(db, monkeypatch):
+    monkeypatch.setattr(server, 'BULK_CHUNK_SIZE', 2)
+    monkeypatch.setattr(server, 'db', Database(FailingInserts(db.status_checks)))
+    invalidations = server.status_cache.invalidations
+    body = '\n'.join(json.dumps({'client_name': f'c{index}'}) for index in range(5)).encode()
+    with pytest.raises(RuntimeError):
+        post(body)
+    assert server.status_cache.invalidations == invalidations + 1
+    assert asyncio.run(db.status_checks.count_documents({})) == 2
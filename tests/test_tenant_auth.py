@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+pytest.importorskip('fastapi')
+mongomock_motor = pytest.importorskip('mongomock_motor')
+jwt = pytest.importorskip('jwt')
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import billing  # noqa: E402
+import billing_run  # noqa: E402
+import kpis  # noqa: E402
+import pm  # noqa: E402
+import service_requests  # noqa: E402
+
+SECRET = 'test-jwt-secret-of-at-least-32-bytes'
+
+# (method, path, json body) for every route under /api/tenants/{tenant_id}
+TENANT_ROUTES = [
+    ('get', '/api/tenants/t1/kpis', None),
+    ('post', '/api/tenants/t1/kpis/reconcile', None),
+    ('get', '/api/tenants/t1/kpis/billing', None),
+    ('post', '/api/tenants/t1/invoice-numbers', None),
+    ('post', '/api/tenants/t1/invoices', {'status': 'draft', 'total': 100}),
+    ('patch', '/api/tenants/t1/invoices/missing', {'status': 'sent'}),
+    ('post', '/api/tenants/t1/contracts/missing/pm-schedule', None),
+    ('get', '/api/tenants/t1/requests', None),
+    ('post', '/api/tenants/t1/requests', {'facility_id': 'f1', 'type': 'on_demand', 'description': 'Leak'}),
+    ('patch', '/api/tenants/t1/requests/missing', {'status': 'triaged'}),
+]
+# Cross-tenant jobs, open to the service role only
+SERVICE_ROUTES = [
+    ('post', '/api/billing-runs', {'window_end': '2025-02-01T00:00:00'}),
+    ('post', '/api/billing-runs/missing/resume', None),
+    ('get', '/api/billing-runs/missing', None),
+]
+ROUTERS = [kpis.router, billing.router, pm.router, service_requests.router, billing_run.router]
+
+
+def token(sub: str, **claims) -> str:
+    payload = {'sub': sub, 'aud': 'authenticated', 'exp': int(time.time()) + 300, **claims}
+    return jwt.encode(payload, SECRET, algorithm='HS256')
+
+
+def service_token(secret: str = SECRET) -> str:
+    """Shaped like Supabase's service_role key: no audience, no subject"""
+    payload = {'iss': 'supabase', 'role': 'service_role', 'exp': int(time.time()) + 300}
+    return jwt.encode(payload, secret, algorithm='HS256')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('SUPABASE_JWT_SECRET', SECRET)
+    db = mongomock_motor.AsyncMongoMockClient()['tenant_auth_test']
+    app = FastAPI()
+    for router in ROUTERS:
+        app.include_router(router)
+    app.state.db = db
+    with TestClient(app) as client:
+        client.portal.call(db.profiles.insert_many, [
+            {'user_id': 'u1', 'tenant_id': 't1'},
+            {'user_id': 'u2', 'tenant_id': 't2'},
+        ])
+        yield client
+
+
+def call(client, method, path, body, headers=None):
+    return getattr(client, method)(path, headers=headers or {}, **({'json': body} if body is not None else {}))
+
+
+@pytest.mark.parametrize('method, path, body', TENANT_ROUTES)
+def test_tenant_routes_need_a_token(client, method, path, body):
+    response = call(client, method, path, body)
+    assert response.status_code == 401
+    assert response.headers['www-authenticate'] == 'Bearer'
+
+
+@pytest.mark.parametrize('method, path, body', TENANT_ROUTES)
+def test_tenant_routes_refuse_other_tenants(client, method, path, body):
+    response = call(client, method, path, body, {'Authorization': f"Bearer {token('u2')}"})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('method, path, body', TENANT_ROUTES)
+def test_tenant_routes_refuse_bad_tokens(client, method, path, body):
+    forged = jwt.encode({'sub': 'u1', 'aud': 'authenticated', 'exp': int(time.time()) + 300},
+                        'another-secret-of-at-least-32-bytes', algorithm='HS256')
+    assert call(client, method, path, body, {'Authorization': f'Bearer {forged}'}).status_code == 401
+    assert call(client, method, path, body, {'Authorization': f"Bearer {token('nobody')}"}).status_code == 401
+
+
+def test_members_reach_their_own_tenant(client):
+    response = client.get('/api/tenants/t1/kpis', headers={'Authorization': f"Bearer {token('u1')}"})
+    assert response.status_code == 200
+    assert response.json()['openRequests'] == 0
+
+
+def test_members_get_past_auth_on_pm_schedule(client):
+    response = client.post('/api/tenants/t1/contracts/missing/pm-schedule',
+                           headers={'Authorization': f"Bearer {token('u1')}"})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('method, path, body', SERVICE_ROUTES)
+def test_service_routes_need_the_service_role(client, method, path, body):
+    assert call(client, method, path, body).status_code == 401
+    forged = {'Authorization': f"Bearer {service_token('another-secret-of-at-least-32-bytes')}"}
+    assert call(client, method, path, body, forged).status_code == 401
+    member = {'Authorization': f"Bearer {token('u1', role='authenticated')}"}
+    assert call(client, method, path, body, member).status_code == 403
+
+
+def test_service_role_reaches_billing_runs(client):
+    response = client.get('/api/billing-runs/missing', headers={'Authorization': f'Bearer {service_token()}'})
+    assert response.status_code == 404
+
+
+def test_members_create_and_list_their_requests(client):
+    headers = {'Authorization': f"Bearer {token('u1')}"}
+    created = client.post('/api/tenants/t1/requests', headers=headers,
+                          json={'facility_id': 'f1', 'type': 'on_demand', 'description': 'Leak'})
+    assert created.status_code == 200
+    listed = client.get('/api/tenants/t1/requests', headers=headers)
+    assert [item['id'] for item in listed.json()['items']] == [created.json()['id']]